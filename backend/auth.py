@@ -1,9 +1,26 @@
 import jwt
 import datetime
+import hashlib
+import logging
+import os
+import time
+from typing import Optional
+from fastapi import Header, HTTPException
 from jwt import ExpiredSignatureError, InvalidTokenError
 
+from fitness_engine.cache import LRUCache
+
+logger = logging.getLogger(__name__)
+
 SECRET_KEY = "SUPER_SECRET_KEY"
 
+# Cache token yang sudah diverifikasi: digest token -> user_id, berlaku sampai exp token
+TOKEN_CACHE_SIZE = int(os.getenv("FITNESS_TOKEN_CACHE_SIZE", "4096"))
+# Batas atas umur entry walaupun exp token masih jauh (token berlaku 7 hari)
+TOKEN_CACHE_MAX_TTL = float(os.getenv("FITNESS_TOKEN_CACHE_MAX_TTL", "3600"))
+
+token_cache = LRUCache(maxsize=TOKEN_CACHE_SIZE)
+
 def create_token(user_id: int):
     return jwt.encode(
         {
@@ -14,15 +31,51 @@ def create_token(user_id: int):
         algorithm="HS256"
     )
 
-def decode_token(token: str):
+def _token_key(token: str) -> bytes:
+    # Token asli tidak disimpan di memori, hanya digest-nya
+    return hashlib.blake2b(token.encode(), digest_size=16).digest()
+
+def _verify_token(token: str):
     try:
         payload = jwt.decode(token, SECRET_KEY, algorithms=["HS256"])
-        return payload["user_id"]
+        return payload["user_id"], payload.get("exp")
 
     except ExpiredSignatureError:
-        print("Token expired")
-        return None
+        logger.info("Token expired")
+        return None, None
 
     except InvalidTokenError:
-        print("Invalid token")
-        return None
+        logger.info("Invalid token")
+        return None, None
+
+def decode_token(token: str):
+    key = _token_key(token)
+    user_id = token_cache.get(key)
+    if user_id is not None:
+        return user_id
+
+    user_id, exp = _verify_token(token)
+    if user_id is not None:
+        # Entry kedaluwarsa bersamaan dengan token, jadi hit tidak pernah mengembalikan token expired
+        ttl = TOKEN_CACHE_MAX_TTL if exp is None else min(exp - time.time(), TOKEN_CACHE_MAX_TTL)
+        if ttl > 0:
+            token_cache.set(key, user_id, ttl=ttl)
+    return user_id
+
+def token_cache_stats() -> dict:
+    return token_cache.stats()
+
+async def require_user(authorization: Optional[str] = Header(None)) -> int:
+    """FastAPI dependency untuk route yang butuh login: user_id dari header Bearer token"""
+    if not authorization:
+        raise HTTPException(401, "Missing token", headers={"WWW-Authenticate": "Bearer"})
+
+    scheme, _, token = authorization.partition(" ")
+    if scheme.lower() != "bearer" or not token:
+        # Kompatibel dengan client lama yang mengirim token tanpa prefix
+        token = authorization
+
+    user_id = decode_token(token.strip())
+    if not user_id:
+        raise HTTPException(401, "Invalid token", headers={"WWW-Authenticate": "Bearer"})
+    return user_id
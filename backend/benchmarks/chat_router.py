@@ -0,0 +1,121 @@
+"""
+Micro-benchmark router intent chat: rantai `any(word in query ...)` lama vs
+IntentRouter (skor keyword dalam satu pass, memo per token). Pesan yang routing-nya
+berbeda dari rantai lama (intent lain punya lebih banyak keyword) dicetak di akhir;
+daftarnya dikunci di tests/test_router.py.
+
+Jalankan dari folder backend:
+    python -m benchmarks.chat_router --repeat 2000
+"""
+import argparse
+import time
+
+from benchmarks.corpus import CHAT_MESSAGES, LONG_CHAT_MESSAGES
+from fitness_engine.engine import CHAT_ROUTER, WORKOUT_ROUTER, HEALTH_ROUTER
+
+# ----- rantai lama (salinan dari handle_chat_query & sub-handler sebelum router) -----
+
+def legacy_top_level(query_lower: str) -> str:
+    if any(word in query_lower for word in ['workout', 'exercise', 'train', 'gym', 'cardio', 'strength']):
+        return "workout"
+    elif any(word in query_lower for word in ['diet', 'meal', 'food', 'eat', 'nutrition', 'calorie', 'protein']):
+        return "diet"
+    elif any(word in query_lower for word in ['progress', 'result', 'weight', 'lose', 'gain', 'fat']):
+        return "progress"
+    elif any(word in query_lower for word in ['health', 'healthy', 'wellness', 'lifestyle', 'tip']):
+        return "health"
+    elif any(word in query_lower for word in ['recipe', 'cook', 'ingredient', 'prepare', 'make']):
+        return "recipe"
+    elif any(word in query_lower for word in ['grocery', 'shop', 'buy', 'shopping', 'list']):
+        return "grocery"
+    return "general"
+
+
+def legacy_workout(query: str) -> str:
+    if 'today' in query or 'now' in query or 'day' in query:
+        return "todays_workout"
+    elif 'schedule' in query or 'week' in query or 'plan' in query:
+        return "workout_schedule"
+    elif 'intensity' in query or 'hard' in query or 'easy' in query:
+        return "workout_intensity"
+    elif 'rest' in query or 'recover' in query:
+        return "recovery_tips"
+    elif any(word in query for word in ['push', 'pull', 'leg', 'split']):
+        return "workout_split"
+    elif 'cardio' in query:
+        return "cardio_advice"
+    elif any(word in query for word in ['form', 'technique', 'proper', 'correct']):
+        return "exercise_form"
+    elif 'alternative' in query or 'replace' in query or 'instead' in query:
+        return "exercise_alternatives"
+    elif 'duration' in query or 'long' in query or 'time' in query:
+        return "workout_duration"
+    return "unknown"
+
+
+def legacy_health(query: str) -> str:
+    if any(word in query for word in ['sleep', 'rest', 'recover']):
+        return "sleep_advice"
+    elif any(word in query for word in ['stress', 'anxiety', 'mental']):
+        return "stress_management"
+    elif any(word in query for word in ['energy', 'tired', 'fatigue']):
+        return "energy_boost"
+    elif 'immune' in query or 'sick' in query or 'health' in query:
+        return "immune_support"
+    elif any(word in query for word in ['age', 'older', 'senior']):
+        return "age_specific_advice"
+    elif any(word in query for word in ['women', 'female', 'menstrual']):
+        return "womens_health"
+    elif any(word in query for word in ['men', 'male', 'testosterone']):
+        return "mens_health"
+    return "unknown"
+
+
+def legacy_route(query_lower: str) -> str:
+    top = legacy_top_level(query_lower)
+    if top == "workout":
+        return f"{top}/{legacy_workout(query_lower)}"
+    if top == "health":
+        return f"{top}/{legacy_health(query_lower)}"
+    return top
+
+
+def router_route(query_lower: str) -> str:
+    top = CHAT_ROUTER.classify(query_lower).name
+    if top == "workout":
+        return f"{top}/{WORKOUT_ROUTER.classify(query_lower).name}"
+    if top == "health":
+        return f"{top}/{HEALTH_ROUTER.classify(query_lower).name}"
+    return top
+
+
+def bench(fn, messages, repeat: int) -> float:
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for msg in messages:
+            fn(msg)
+    elapsed = time.perf_counter() - start
+    return elapsed / (repeat * len(messages)) * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=2000)
+    args = parser.parse_args()
+
+    for label, corpus in (("short", CHAT_MESSAGES), ("long", LONG_CHAT_MESSAGES)):
+        messages = [m.lower() for m in corpus]
+        legacy_us = bench(legacy_route, messages, args.repeat)
+        router_us = bench(router_route, messages, args.repeat)
+        print(f"[{label}] {len(messages)} messages: legacy {legacy_us:.2f} us/msg, "
+              f"router {router_us:.2f} us/msg ({legacy_us / router_us:.2f}x)")
+
+    messages = [m.lower() for m in CHAT_MESSAGES]
+    changed = [(m, legacy_route(m), router_route(m)) for m in messages if legacy_route(m) != router_route(m)]
+    print(f"\nRouting changes vs legacy chain: {len(changed)}/{len(messages)}")
+    for msg, old, new in changed:
+        print(f"  {msg!r}: {old} -> {new}")
+
+
+if __name__ == "__main__":
+    main()
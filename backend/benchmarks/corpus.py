@@ -0,0 +1,101 @@
+"""Corpus sintetis untuk benchmark: profil UserData dan pesan chat (router dan endpoint /chat)"""
+import itertools
+import random
+
+from models.user_model import UserData
+
+GOALS = ("fat_loss", "muscle_gain", "maintain")
+ACTIVITY_LEVELS = ("sedentary", "light", "moderate", "active", "very_active")
+GENDERS = ("male", "female")
+
+
+def synthetic_profiles(count: int, seed: int = 42) -> list:
+    """Dict profil UserData yang deterministik.
+
+    Semua kombinasi goal x activity level x vegan x gender muncul dulu (60 profil),
+    sisanya acak; umur/tinggi/berat dan target_weight (50%) selalu diacak dari seed.
+    """
+    rng = random.Random(seed)
+    grid = list(itertools.product(GOALS, ACTIVITY_LEVELS, (False, True), GENDERS))
+    profiles = []
+    for i in range(count):
+        if i < len(grid):
+            goal, active_level, vegan, gender = grid[i]
+        else:
+            goal, active_level = rng.choice(GOALS), rng.choice(ACTIVITY_LEVELS)
+            vegan, gender = rng.random() < 0.2, rng.choice(GENDERS)
+        profile = dict(
+            name=f"user{i}",
+            age=rng.randint(16, 79),
+            gender=gender,
+            height_cm=round(rng.uniform(150, 200), 1),
+            weight_kg=round(rng.uniform(45, 140), 1),
+            goal=goal,
+            active_level=active_level,
+            vegan=vegan,
+        )
+        if rng.random() < 0.5:
+            profile["target_weight"] = round(profile["weight_kg"] * rng.uniform(0.8, 1.1), 1)
+        profiles.append(profile)
+    return profiles
+
+
+def synthetic_users(count: int, seed: int = 42) -> list:
+    return [UserData(**profile) for profile in synthetic_profiles(count, seed)]
+
+
+CHAT_MESSAGES = [
+    "What's my workout for today?",
+    "Show me today's workout",
+    "What's my workout schedule for the week?",
+    "How hard should my gym sessions be?",
+    "Give me recovery tips after training",
+    "Explain push/pull/leg split",
+    "How should I do cardio?",
+    "What is the proper squat form for my leg workout?",
+    "Alternative exercise instead of bench press",
+    "How long should a workout take?",
+    "Any general exercise advice?",
+    "Tell me about my calorie needs",
+    "How much protein should I eat?",
+    "What about carbohydrates in my diet?",
+    "Is fat bad in my meal plan?",
+    "Give me meal ideas",
+    "Which supplement and vitamin should I take with my diet?",
+    "Hydration tips for food and water",
+    "Can I have a cheat meal?",
+    "Vegan nutrition tips",
+    "What time should I eat my meals?",
+    "How long until I see results?",
+    "What results can I expect?",
+    "How to track my progress?",
+    "I'm stuck, not losing weight anymore",
+    "How do I stay motivated and consistent with weight loss?",
+    "Will I gain muscle?",
+    "Sleep and recovery tips",
+    "How can I manage stress and anxiety?",
+    "I feel tired all the time, any lifestyle tip?",
+    "How do I stay healthy when sick?",
+    "Advice for older adults' health",
+    "Women's health tips about the menstrual cycle",
+    "Men's health and testosterone tips",
+    "Give me wellness tips",
+    "Quick easy recipe ideas",
+    "How do I cook and prepare food in advance?",
+    "Which ingredient makes food tasty?",
+    "Give me a grocery list",
+    "Show me my grocery list",
+    "Budget-friendly shopping tips",
+    "What should I buy at the store?",
+    "Hello!",
+    "Thanks a lot",
+    "Goodbye",
+    "What can you do? help",
+    "Give me a motivation quote",
+    "Random question about nothing",
+]
+
+# Pesan yang lebih panjang, untuk melihat skala terhadap panjang pesan
+LONG_CHAT_MESSAGES = [
+    (msg + " ") * 8 for msg in CHAT_MESSAGES[::4]
+]
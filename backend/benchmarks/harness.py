@@ -0,0 +1,184 @@
+"""Alat ukur bersama untuk benchmark: latency per panggilan (p50/p99), alokasi (tracemalloc), baseline JSON"""
+import json
+import math
+import os
+import platform
+import sys
+import time
+import tracemalloc
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Sequence
+
+# Panggilan yang tidak ikut dihitung di awal setiap benchmark (import lazy, cache cold start)
+WARMUP = 5
+
+# p50 lebih lambat dari baseline lebih dari ini (relatif) = regresi
+DEFAULT_THRESHOLD = 0.25
+
+
+def percentile(sorted_values: Sequence[float], q: float) -> float:
+    """Nearest-rank percentile dari list yang sudah diurutkan"""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, math.ceil(q / 100 * len(sorted_values)))
+    return sorted_values[rank - 1]
+
+
+def summarize(samples: List[float]) -> Dict[str, float]:
+    """Ringkasan durasi (detik) dalam mikrodetik"""
+    ordered = sorted(samples)
+    total = sum(ordered)
+    return {
+        "n": len(ordered),
+        "mean_us": round(total / len(ordered) * 1e6, 2) if ordered else 0.0,
+        "p50_us": round(percentile(ordered, 50) * 1e6, 2),
+        "p99_us": round(percentile(ordered, 99) * 1e6, 2),
+        "max_us": round(ordered[-1] * 1e6, 2) if ordered else 0.0,
+        "ops_per_s": round(len(ordered) / total, 1) if total else 0.0,
+    }
+
+
+def measure(fn: Callable[[int], Any], iterations: int,
+            setup: Optional[Callable[[int], Any]] = None) -> Dict[str, float]:
+    """Waktu fn(i) per panggilan; setup(i) (tidak ikut diukur) dijalankan sebelumnya"""
+    for i in range(WARMUP):
+        if setup is not None:
+            setup(i)
+        fn(i)
+    samples = []
+    for i in range(iterations):
+        if setup is not None:
+            setup(i)
+        start = time.perf_counter()
+        fn(i)
+        samples.append(time.perf_counter() - start)
+    return summarize(samples)
+
+
+async def measure_async(fn: Callable[[int], Awaitable[Any]], iterations: int,
+                        setup: Optional[Callable[[int], Any]] = None) -> Dict[str, float]:
+    for i in range(WARMUP):
+        if setup is not None:
+            setup(i)
+        await fn(i)
+    samples = []
+    for i in range(iterations):
+        if setup is not None:
+            setup(i)
+        start = time.perf_counter()
+        await fn(i)
+        samples.append(time.perf_counter() - start)
+    return summarize(samples)
+
+
+def _allocation_summary(peaks: List[int], retained: List[int]) -> Dict[str, float]:
+    return {
+        "alloc_peak_kb": round(sum(peaks) / len(peaks) / 1024, 1) if peaks else 0.0,
+        "alloc_retained_kb": round(sum(retained) / len(retained) / 1024, 1) if retained else 0.0,
+    }
+
+
+def measure_allocations(fn: Callable[[int], Any], iterations: int,
+                        setup: Optional[Callable[[int], Any]] = None) -> Dict[str, float]:
+    """Rata-rata puncak memori yang dialokasikan per panggilan (tracemalloc, pass terpisah
+    karena tracemalloc memperlambat eksekusi beberapa kali lipat)"""
+    peaks, retained = [], []
+    tracemalloc.start()
+    try:
+        for i in range(iterations):
+            if setup is not None:
+                setup(i)
+            base = tracemalloc.get_traced_memory()[0]
+            tracemalloc.reset_peak()
+            fn(i)
+            current, peak = tracemalloc.get_traced_memory()
+            peaks.append(peak - base)
+            retained.append(current - base)
+    finally:
+        tracemalloc.stop()
+    return _allocation_summary(peaks, retained)
+
+
+async def measure_allocations_async(fn: Callable[[int], Awaitable[Any]], iterations: int,
+                                    setup: Optional[Callable[[int], Any]] = None) -> Dict[str, float]:
+    peaks, retained = [], []
+    tracemalloc.start()
+    try:
+        for i in range(iterations):
+            if setup is not None:
+                setup(i)
+            base = tracemalloc.get_traced_memory()[0]
+            tracemalloc.reset_peak()
+            await fn(i)
+            current, peak = tracemalloc.get_traced_memory()
+            peaks.append(peak - base)
+            retained.append(current - base)
+    finally:
+        tracemalloc.stop()
+    return _allocation_summary(peaks, retained)
+
+
+def environment() -> Dict[str, Any]:
+    """Info mesin, disimpan di baseline supaya perbandingan lintas mesin terlihat"""
+    from fitness_engine.serialization import JSON_BACKEND
+    return {
+        "python": platform.python_version(),
+        "implementation": platform.python_implementation(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "optimized": not __debug__,
+        "json_backend": JSON_BACKEND,
+        "argv": sys.argv[1:],
+    }
+
+
+def save_baseline(path: str, results: Dict[str, Dict]):
+    with open(path, "w") as f:
+        json.dump({"environment": environment(), "results": results}, f, indent=2, sort_keys=True)
+
+
+def load_baseline(path: str) -> Dict[str, Dict]:
+    with open(path) as f:
+        return json.load(f)["results"]
+
+
+def compare(results: Dict[str, Dict], baseline: Dict[str, Dict],
+            threshold: float = DEFAULT_THRESHOLD) -> List[Dict[str, Any]]:
+    """Perubahan p50/p99 relatif terhadap baseline per benchmark (yang ada di keduanya)"""
+    rows = []
+    for name, current in results.items():
+        before = baseline.get(name)
+        if not before or not before.get("p50_us"):
+            continue
+        p50_change = current["p50_us"] / before["p50_us"] - 1
+        p99_change = current["p99_us"] / before["p99_us"] - 1 if before.get("p99_us") else 0.0
+        rows.append({
+            "name": name,
+            "p50_change": p50_change,
+            "p99_change": p99_change,
+            "regression": p50_change > threshold,
+        })
+    return rows
+
+
+def format_results(results: Dict[str, Dict]) -> str:
+    width = max((len(name) for name in results), default=10)
+    lines = [f"{'benchmark':<{width}}  {'n':>5}  {'p50 us':>10}  {'p99 us':>10}  {'mean us':>10}  "
+             f"{'ops/s':>9}  {'peak KB':>8}  {'kept KB':>8}"]
+    for name, r in results.items():
+        lines.append(
+            f"{name:<{width}}  {r['n']:>5}  {r['p50_us']:>10.1f}  {r['p99_us']:>10.1f}  {r['mean_us']:>10.1f}  "
+            f"{r['ops_per_s']:>9.1f}  {r.get('alloc_peak_kb', float('nan')):>8.1f}  "
+            f"{r.get('alloc_retained_kb', float('nan')):>8.1f}"
+        )
+    return "\n".join(lines)
+
+
+def format_comparison(rows: List[Dict[str, Any]]) -> str:
+    if not rows:
+        return "no overlapping benchmarks with baseline"
+    width = max(len(row["name"]) for row in rows)
+    lines = []
+    for row in rows:
+        flag = "  REGRESSION" if row["regression"] else ""
+        lines.append(f"{row['name']:<{width}}  p50 {row['p50_change']:+7.1%}  p99 {row['p99_change']:+7.1%}{flag}")
+    return "\n".join(lines)
@@ -0,0 +1,322 @@
+"""
+Load generator async: replay traffic campuran (register/login/plan/chat/save_history/history)
+dan laporkan throughput, latency percentile dan error rate per operasi.
+
+Jalankan dari folder backend:
+    python -m benchmarks.loadgen                                  # app in-process (ASGI), profil mixed
+    python -m benchmarks.loadgen --profile plan --concurrency 32 --duration 20
+    python -m benchmarks.loadgen --workers 1,2,4 --duration 15    # uvicorn sungguhan, kurva scaling
+    python -m benchmarks.loadgen --url http://127.0.0.1:8000      # server yang sudah jalan
+
+Target:
+    (default)   app di-load in-process lewat httpx ASGITransport: tanpa network dan
+                tanpa proses lain, cocok untuk membandingkan perubahan kode.
+    --workers   jalankan `serve.py --workers N` (mode multi-worker dengan cache bersama)
+                di port kosong untuk tiap N, dengan SQLite sementara; hasilnya
+                throughput per jumlah worker.
+    --url       server yang sudah berjalan (DB dan rate limit milik server tersebut).
+
+Model beban closed-loop: --concurrency virtual user, masing-masing register + login
+sekali lalu mengirim request berikutnya segera setelah response sebelumnya diterima.
+Untuk target lokal rate limit login dilonggarkan (FITNESS_LOGIN_LIMIT_*); dengan --url
+response 429 dihitung terpisah sebagai "limited".
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from collections import Counter, defaultdict
+from typing import Dict, List, Optional
+
+from benchmarks.corpus import CHAT_MESSAGES, synthetic_profiles
+from benchmarks.harness import percentile
+
+# Bobot operasi per profil traffic
+TRAFFIC_PROFILES = {
+    "mixed": {"plan": 30, "chat": 30, "save_history": 15, "history": 15, "login": 5, "register": 5},
+    "plan": {"plan": 100},
+    "chat": {"chat": 100},
+    "history": {"save_history": 50, "history": 50},
+    "save": {"save_history": 100},
+    "auth": {"login": 70, "register": 30},
+}
+
+# Environment untuk app yang dijalankan loadgen sendiri (in-process atau uvicorn)
+LOCAL_ENV = {
+    "FITNESS_LOGIN_LIMIT_EMAIL": "1000000/1",
+    "FITNESS_LOGIN_LIMIT_IP": "1000000/1",
+    "FITNESS_LOG_LEVEL": "ERROR",
+}
+
+SERVER_START_TIMEOUT = 30
+
+
+class Stats:
+    def __init__(self):
+        self.latencies: Dict[str, List[float]] = defaultdict(list)
+        self.statuses: Dict[str, Counter] = defaultdict(Counter)
+
+    def record(self, op: str, seconds: float, status: str):
+        self.latencies[op].append(seconds)
+        self.statuses[op][status] += 1
+
+    def report(self, elapsed: float) -> Dict:
+        operations = {}
+        total = errors = limited = 0
+        for op in sorted(self.statuses):
+            statuses = self.statuses[op]
+            count = sum(statuses.values())
+            op_limited = statuses.get("429", 0)
+            op_errors = sum(n for status, n in statuses.items() if not status.startswith("2") and status != "429")
+            latencies = sorted(self.latencies[op])
+            operations[op] = {
+                "requests": count,
+                "rps": round(count / elapsed, 1),
+                "error_rate": round(op_errors / count, 4),
+                "limited": op_limited,
+                "p50_ms": _ms(percentile(latencies, 50)),
+                "p90_ms": _ms(percentile(latencies, 90)),
+                "p99_ms": _ms(percentile(latencies, 99)),
+                "max_ms": _ms(latencies[-1]),
+                "statuses": dict(statuses),
+            }
+            total += count
+            errors += op_errors
+            limited += op_limited
+        all_latencies = sorted(s for values in self.latencies.values() for s in values)
+        return {
+            "elapsed_s": round(elapsed, 2),
+            "requests": total,
+            "rps": round(total / elapsed, 1) if elapsed else 0.0,
+            "error_rate": round(errors / total, 4) if total else 0.0,
+            "limited": limited,
+            "p50_ms": _ms(percentile(all_latencies, 50)),
+            "p99_ms": _ms(percentile(all_latencies, 99)),
+            "operations": operations,
+        }
+
+
+def _ms(seconds: float) -> float:
+    return round(seconds * 1000, 2)
+
+
+class VirtualUser:
+    """Satu client: akun sendiri, profil fitness dari corpus, token dari login"""
+
+    def __init__(self, client, stats: Stats, index: int, run_id: str, profiles: List[Dict], rng: random.Random):
+        self.client = client
+        self.stats = stats
+        self.rng = rng
+        self.profiles = profiles
+        self.run_id = run_id
+        self.index = index
+        self.registrations = 0
+        self.credentials = self._new_credentials()
+        self.headers: Dict[str, str] = {}
+        self.last_plan: Optional[bytes] = None
+
+    def _new_credentials(self) -> Dict[str, str]:
+        self.registrations += 1
+        return {"email": f"load-{self.run_id}-{self.index}-{self.registrations}@example.com",
+                "password": f"pw-{self.index}-{self.registrations}"}
+
+    async def _request(self, op: str, method: str, url: str, **kwargs):
+        start = time.perf_counter()
+        try:
+            response = await self.client.request(method, url, **kwargs)
+            status = str(response.status_code)
+        except Exception as exc:  # timeout, koneksi putus, error app in-process
+            response, status = None, type(exc).__name__
+        self.stats.record(op, time.perf_counter() - start, status)
+        return response
+
+    async def register(self, new_account: bool = True):
+        if new_account:
+            self.credentials = self._new_credentials()
+        await self._request("register", "POST", "/register", json={"name": f"load{self.index}", **self.credentials})
+
+    async def login(self):
+        response = await self._request("login", "POST", "/login", json=self.credentials)
+        if response is not None and response.status_code == 200:
+            self.headers = {"Authorization": f"Bearer {response.json()['token']}"}
+
+    async def plan(self):
+        response = await self._request("plan", "POST", "/plan", json=self.rng.choice(self.profiles))
+        if response is not None and response.status_code == 200:
+            self.last_plan = response.content
+
+    async def chat(self):
+        await self._request("chat", "POST", "/chat", json={
+            "user": self.rng.choice(self.profiles), "message": self.rng.choice(CHAT_MESSAGES)})
+
+    async def save_history(self):
+        if self.last_plan is None:
+            await self.plan()
+        await self._request("save_history", "POST", "/save_history", content=self.last_plan,
+                            headers={**self.headers, "Content-Type": "application/json"})
+
+    async def history(self):
+        await self._request("history", "GET", "/history?limit=20", headers=self.headers)
+
+    async def run(self, weights: Dict[str, int], deadline: float, max_requests: Optional[List[int]]):
+        await self.register(new_account=False)
+        await self.login()
+        ops, op_weights = list(weights), list(weights.values())
+        while time.perf_counter() < deadline:
+            if max_requests is not None:
+                if max_requests[0] <= 0:
+                    return
+                max_requests[0] -= 1
+            op = self.rng.choices(ops, op_weights)[0]
+            if op == "register":
+                await self.register()
+                await self.login()
+            else:
+                await getattr(self, op)()
+
+
+async def run_load(client, weights: Dict[str, int], concurrency: int, duration: float,
+                   max_requests: Optional[int], profile_count: int, seed: int) -> Dict:
+    stats = Stats()
+    profiles = synthetic_profiles(profile_count, seed)
+    run_id = f"{os.getpid()}-{int(time.time())}"
+    budget = [max_requests] if max_requests else None
+    start = time.perf_counter()
+    users = [VirtualUser(client, stats, i, run_id, profiles, random.Random(seed + i)) for i in range(concurrency)]
+    await asyncio.gather(*(user.run(weights, start + duration, budget) for user in users))
+    return stats.report(time.perf_counter() - start)
+
+
+def _httpx():
+    try:
+        import httpx
+    except ImportError:
+        sys.exit("benchmarks.loadgen needs httpx (pip install httpx)")
+    return httpx
+
+
+async def run_in_process(args, weights) -> Dict:
+    httpx = _httpx()
+    workdir = tempfile.mkdtemp(prefix="fitness-load-")
+    os.environ["FITNESS_DB"] = os.path.join(workdir, "load.db")
+    for key, value in LOCAL_ENV.items():
+        os.environ.setdefault(key, value)
+    import main
+
+    transport = httpx.ASGITransport(app=main.app)
+    async with main.app.router.lifespan_context(main.app):
+        async with httpx.AsyncClient(transport=transport, base_url="http://loadgen", timeout=args.timeout) as client:
+            return await run_load(client, weights, args.concurrency, args.duration, args.requests,
+                                  args.profiles, args.seed)
+
+
+async def run_against_url(url: str, args, weights) -> Dict:
+    httpx = _httpx()
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    async with httpx.AsyncClient(base_url=url, timeout=args.timeout, limits=limits) as client:
+        return await run_load(client, weights, args.concurrency, args.duration, args.requests,
+                              args.profiles, args.seed)
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _wait_for_server(url: str, process: subprocess.Popen):
+    httpx = _httpx()
+    deadline = time.monotonic() + SERVER_START_TIMEOUT
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"uvicorn exited with code {process.returncode}")
+        try:
+            if httpx.get(url + "/", timeout=1).status_code == 200:
+                return
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.2)
+    raise RuntimeError(f"uvicorn did not start within {SERVER_START_TIMEOUT}s")
+
+
+def run_with_workers(workers: int, args, weights) -> Dict:
+    """Jalankan serve.py (uvicorn, N worker) dengan SQLite sementara, ukur, lalu hentikan"""
+    workdir = tempfile.mkdtemp(prefix="fitness-load-")
+    port = _free_port()
+    env = {**os.environ, **LOCAL_ENV, "FITNESS_DB": os.path.join(workdir, "load.db")}
+    backend_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    process = subprocess.Popen(
+        [sys.executable, "serve.py", "--host", "127.0.0.1", "--port", str(port),
+         "--workers", str(workers), "--log-level", "warning", "--no-access-log"],
+        cwd=backend_dir, env=env,
+    )
+    url = f"http://127.0.0.1:{port}"
+    try:
+        _wait_for_server(url, process)
+        return asyncio.run(run_against_url(url, args, weights))
+    finally:
+        process.terminate()
+        try:
+            process.wait(timeout=15)
+        except subprocess.TimeoutExpired:
+            process.kill()
+
+
+def format_report(title: str, report: Dict) -> str:
+    lines = [f"== {title}: {report['requests']} requests in {report['elapsed_s']}s, "
+             f"{report['rps']} req/s, errors {report['error_rate']:.2%}, 429 {report['limited']}, "
+             f"p50 {report['p50_ms']}ms, p99 {report['p99_ms']}ms"]
+    lines.append(f"{'operation':<14}{'requests':>9}{'req/s':>9}{'errors':>8}{'p50 ms':>9}{'p90 ms':>9}"
+                 f"{'p99 ms':>9}{'max ms':>9}  statuses")
+    for op, r in report["operations"].items():
+        lines.append(f"{op:<14}{r['requests']:>9}{r['rps']:>9}{r['error_rate']:>8.1%}{r['p50_ms']:>9}"
+                     f"{r['p90_ms']:>9}{r['p99_ms']:>9}{r['max_ms']:>9}  {r['statuses']}")
+    return "\n".join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--profile", choices=sorted(TRAFFIC_PROFILES), default="mixed")
+    parser.add_argument("--concurrency", type=int, default=16, help="virtual users")
+    parser.add_argument("--duration", type=float, default=10.0, help="seconds per run")
+    parser.add_argument("--requests", type=int, help="stop after this many requests (per run)")
+    parser.add_argument("--profiles", type=int, default=200,
+                        help="distinct fitness profiles; fewer = more plan cache hits")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--timeout", type=float, default=30.0)
+    target = parser.add_mutually_exclusive_group()
+    target.add_argument("--url", help="load an already running server")
+    target.add_argument("--workers", help="spawn uvicorn with these worker counts, e.g. 1,2,4")
+    parser.add_argument("--json", help="write the report(s) to this file")
+    args = parser.parse_args()
+
+    weights = TRAFFIC_PROFILES[args.profile]
+    reports = {}
+    if args.workers:
+        for workers in [int(n) for n in args.workers.split(",")]:
+            report = run_with_workers(workers, args, weights)
+            reports[f"workers={workers}"] = report
+            print(format_report(f"{args.profile}, {workers} worker(s)", report), flush=True)
+        base = reports[next(iter(reports))]["rps"]
+        print("\nscaling: " + ", ".join(
+            f"{name} {r['rps']} req/s ({r['rps'] / base:.2f}x)" for name, r in reports.items()))
+    elif args.url:
+        reports["url"] = asyncio.run(run_against_url(args.url, args, weights))
+        print(format_report(f"{args.profile} @ {args.url}", reports["url"]))
+    else:
+        reports["in-process"] = asyncio.run(run_in_process(args, weights))
+        print(format_report(f"{args.profile}, in-process ASGI", reports["in-process"]))
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"profile": args.profile, "concurrency": args.concurrency, "reports": reports}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""
+Benchmark biaya logging per plan di generate_full_plan.
+
+Jalankan dari folder backend:
+    python -m benchmarks.logging_overhead --plans 300
+    python -O -m benchmarks.logging_overhead --plans 300   # debug path dihapus compiler
+
+Mode yang dibandingkan:
+    debug-sync   : level DEBUG, StreamHandler langsung ke file (setara print() lama)
+    debug-queue  : level DEBUG lewat QueueHandler (I/O di thread listener)
+    info-queue   : level INFO lewat QueueHandler (default production)
+"""
+import argparse
+import logging
+import random
+import statistics
+import tempfile
+import time
+
+from logging_config import setup_logging, shutdown_logging
+from models.user_model import UserData
+from fitness_engine.engine import generate_full_plan
+
+USER = UserData(name="bench", age=30, gender="male", height_cm=175, weight_kg=80,
+                goal="fat_loss", active_level="moderate", target_weight=72)
+
+
+def _reset_root():
+    shutdown_logging()
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+        handler.close()
+
+
+def configure(mode: str, sink):
+    _reset_root()
+    if mode == "debug-sync":
+        handler = logging.StreamHandler(sink)
+        handler.setFormatter(logging.Formatter("%(asctime)s %(levelname)s %(name)s: %(message)s"))
+        root = logging.getLogger()
+        root.setLevel(logging.DEBUG)
+        root.addHandler(handler)
+    elif mode == "debug-queue":
+        setup_logging("DEBUG", stream=sink)
+    elif mode == "info-queue":
+        setup_logging("INFO", stream=sink)
+    else:
+        raise ValueError(f"Unknown mode: {mode}")
+
+
+def time_plans(n: int) -> list:
+    random.seed(0)
+    samples = []
+    for _ in range(n):
+        start = time.perf_counter()
+        generate_full_plan(USER, cache=False)
+        samples.append((time.perf_counter() - start) * 1000)
+    return samples
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--plans", type=int, default=200)
+    parser.add_argument("--modes", default="debug-sync,debug-queue,info-queue")
+    args = parser.parse_args()
+
+    print(f"__debug__ = {__debug__} ({'debug path aktif' if __debug__ else 'python -O: debug path dihapus'})")
+
+    results = {}
+    with tempfile.TemporaryFile("w") as sink:
+        for mode in args.modes.split(","):
+            configure(mode, sink)
+            time_plans(10)  # warm-up
+            samples = time_plans(args.plans)
+            _reset_root()
+            results[mode] = statistics.mean(samples)
+
+    baseline = results.get("debug-sync")
+    print(f"{'mode':<12} {'ms/plan':>9} {'saved':>9}")
+    for mode, mean_ms in results.items():
+        saved = f"{baseline - mean_ms:+.3f}" if baseline is not None else "-"
+        print(f"{mode:<12} {mean_ms:9.3f} {saved:>9}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+"""
+Benchmark throughput verifikasi password (inti /login) pada biaya KDF target.
+
+Jalankan dari folder backend:
+    python -m benchmarks.login_throughput --logins 200
+    FITNESS_PASSWORD_KDF=pbkdf2 python -m benchmarks.login_throughput
+    FITNESS_KDF_WORKERS=8 python -m benchmarks.login_throughput --concurrency 32
+
+Yang diukur:
+    single   : latency satu hash (ms) dengan parameter dari env
+    inline   : verify_password langsung di event loop, satu per satu (event loop terblokir)
+    pool     : verify_password lewat run_kdf dengan N request bersamaan
+    loop lag : keterlambatan maksimum event loop selama mode pool (harus kecil)
+"""
+import argparse
+import asyncio
+import time
+
+import executors
+import passwords
+from executors import run_kdf, shutdown_executors
+from passwords import hash_password, verify_password
+
+
+def describe_cost() -> str:
+    if passwords.PASSWORD_KDF == "scrypt":
+        return f"scrypt N={passwords.SCRYPT_N} r={passwords.SCRYPT_R} p={passwords.SCRYPT_P}"
+    return f"pbkdf2_sha256 iterations={passwords.PBKDF2_ITERATIONS}"
+
+
+async def inline_logins(password: str, stored: str, count: int) -> float:
+    start = time.perf_counter()
+    for _ in range(count):
+        verify_password(password, stored)
+    return time.perf_counter() - start
+
+
+async def pooled_logins(password: str, stored: str, count: int, concurrency: int):
+    semaphore = asyncio.Semaphore(concurrency)
+    max_lag = 0.0
+    done = False
+
+    async def login():
+        async with semaphore:
+            ok, _ = await run_kdf(verify_password, password, stored)
+            assert ok
+
+    async def lag_probe():
+        nonlocal max_lag
+        while not done:
+            before = time.perf_counter()
+            await asyncio.sleep(0.005)
+            max_lag = max(max_lag, time.perf_counter() - before - 0.005)
+
+    probe = asyncio.create_task(lag_probe())
+    start = time.perf_counter()
+    await asyncio.gather(*(login() for _ in range(count)))
+    elapsed = time.perf_counter() - start
+    done = True
+    await probe
+    return elapsed, max_lag
+
+
+async def run(args):
+    password = "correct horse battery staple"
+    start = time.perf_counter()
+    stored = hash_password(password)
+    single_ms = (time.perf_counter() - start) * 1000
+
+    # warmup pool (thread/process dibuat lazy)
+    await asyncio.gather(*(run_kdf(verify_password, password, stored) for _ in range(executors.KDF_WORKERS)))
+
+    print(f"{describe_cost()}, single hash {single_ms:.1f} ms")
+    inline_s = await inline_logins(password, stored, args.inline)
+    print(f"[inline] {args.inline} logins: {inline_s:.2f}s ({args.inline / inline_s:,.1f} logins/s), "
+          f"event loop blocked {inline_s / args.inline * 1000:.1f} ms per login")
+
+    pool_s, max_lag = await pooled_logins(password, stored, args.logins, args.concurrency)
+    print(f"[pool]   {args.logins} logins, {executors.KDF_EXECUTOR} x{executors.KDF_WORKERS}, "
+          f"concurrency {args.concurrency}: {pool_s:.2f}s ({args.logins / pool_s:,.1f} logins/s), "
+          f"max loop lag {max_lag * 1000:.1f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--logins", type=int, default=200)
+    parser.add_argument("--inline", type=int, default=20)
+    parser.add_argument("--concurrency", type=int, default=16)
+    args = parser.parse_args()
+    try:
+        asyncio.run(run(args))
+    finally:
+        shutdown_executors()
+
+
+if __name__ == "__main__":
+    main()
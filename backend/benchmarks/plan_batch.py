@@ -0,0 +1,71 @@
+"""
+Benchmark generate_plans_batch vs loop generate_full_plan per user.
+
+Jalankan dari folder backend:
+    python -m benchmarks.plan_batch --users 10000
+    python -m benchmarks.plan_batch --users 10000 --skip-details   # hanya bagian numerik
+
+Mode yang dibandingkan:
+    numeric : kalori/makro + target + time_to_target + kurva progress
+              (loop: calculate_calories, calculate_time_to_target, predict_progress)
+    full    : full plan termasuk workout/diet/grocery (loop: generate_full_plan)
+"""
+import argparse
+import logging
+import time
+
+from benchmarks.corpus import synthetic_users
+from fitness_engine.batch import generate_plans_batch
+from fitness_engine.cache import clear_nutrition_cache
+from fitness_engine.calories import calculate_calories
+from fitness_engine.engine import generate_full_plan
+from fitness_engine.progress import calculate_time_to_target, predict_progress
+
+
+def numeric_loop(users):
+    plans = []
+    for user in users:
+        cal_data = calculate_calories(user)
+        time_estimate = calculate_time_to_target(user)
+        weeks = max(min(time_estimate["weeks_to_target"], 16), 8)
+        plans.append((cal_data, time_estimate, predict_progress(user, weeks=weeks)))
+    return plans
+
+
+def full_loop(users):
+    return [generate_full_plan(user, cache=False) for user in users]
+
+
+def timed(fn, *args, **kwargs) -> float:
+    clear_nutrition_cache()
+    start = time.perf_counter()
+    fn(*args, **kwargs)
+    return time.perf_counter() - start
+
+
+def report(label: str, count: int, loop_s: float, batch_s: float):
+    print(f"[{label}] {count} users: loop {loop_s:.3f}s ({count / loop_s:,.0f} users/s), "
+          f"batch {batch_s:.3f}s ({count / batch_s:,.0f} users/s), {loop_s / batch_s:.1f}x")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--users", type=int, default=10000)
+    parser.add_argument("--skip-details", action="store_true")
+    args = parser.parse_args()
+
+    logging.disable(logging.WARNING)
+    users = synthetic_users(args.users)
+
+    report("numeric", len(users),
+           timed(numeric_loop, users),
+           timed(generate_plans_batch, users, details=False))
+
+    if not args.skip_details:
+        report("full", len(users),
+               timed(full_loop, users),
+               timed(generate_plans_batch, users))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+"""
+Benchmark kurva progress: predict_progress per user vs progress_trajectory untuk batch.
+
+Jalankan dari folder backend:
+    python -m benchmarks.progress_curve --users 10000
+
+Yang diukur:
+    single : predict_progress(user, weeks) untuk 12/52/104 minggu (rows dan columnar)
+    batch  : kurva semua user sekaligus (array 2D), dibanding loop predict_progress
+"""
+import argparse
+import time
+import timeit
+
+import numpy as np
+
+from benchmarks.plan_batch import synthetic_users
+from fitness_engine.batch import UserColumns, progress_targets_batch, weekly_weight_change_batch
+from fitness_engine.progress import predict_progress, progress_trajectory, trajectory_rows
+
+HORIZONS = (12, 52, 104)
+
+
+def per_call_us(fn, number: int = 2000) -> float:
+    return min(timeit.repeat(fn, number=number, repeat=5)) / number * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--users", type=int, default=10000)
+    args = parser.parse_args()
+
+    users = synthetic_users(args.users)
+    user = users[0]
+    for weeks in HORIZONS:
+        rows = per_call_us(lambda: predict_progress(user, weeks))
+        columnar = per_call_us(lambda: predict_progress(user, weeks, columnar=True))
+        print(f"[single] weeks={weeks:3d}: rows {rows:6.1f} us, columnar {columnar:6.1f} us")
+
+    cols = UserColumns(users)
+    target = progress_targets_batch(cols)
+    weekly = weekly_weight_change_batch(cols, cols.weight_kg, target)
+    for weeks in HORIZONS:
+        start = time.perf_counter()
+        for u in users:
+            predict_progress(u, weeks)
+        loop_s = time.perf_counter() - start
+
+        start = time.perf_counter()
+        trajectory = progress_trajectory(cols.weight_kg, target, weekly, weeks)
+        arrays_s = time.perf_counter() - start
+
+        start = time.perf_counter()
+        [trajectory_rows(trajectory, i, weeks) for i in range(len(users))]
+        rows_s = time.perf_counter() - start
+
+        cells = len(users) * (weeks + 1)
+        print(f"[batch] {len(users)} users x {weeks + 1} weeks: loop {loop_s:.3f}s, "
+              f"arrays {arrays_s * 1e3:.1f} ms ({cells / arrays_s / 1e6:.1f}M points/s), "
+              f"arrays+rows {arrays_s + rows_s:.3f}s")
+
+    assert np.array_equal(trajectory["week"], np.arange(HORIZONS[-1] + 1))
+
+
+if __name__ == "__main__":
+    main()
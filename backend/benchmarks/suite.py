@@ -0,0 +1,220 @@
+"""
+Benchmark suite: fungsi publik fitness_engine dan endpoint FastAPI (in-process lewat ASGI).
+
+Jalankan dari folder backend:
+    python -m benchmarks.suite                                   # engine + http
+    python -m benchmarks.suite --only engine --iterations 500
+    python -m benchmarks.suite --save-baseline /tmp/baseline.json
+    python -m benchmarks.suite --baseline /tmp/baseline.json --fail-on-regression
+
+Per benchmark dilaporkan p50/p99/mean (us), ops/s, dan alokasi per panggilan
+(tracemalloc, pass terpisah): peak = puncak memori selama panggilan, kept = yang
+masih hidup setelahnya (cache yang terisi ikut terhitung).
+
+Engine dijalankan cold: cache nutrisi/plan dikosongkan sebelum setiap panggilan
+(tidak ikut diukur). Endpoint HTTP memakai SQLite sementara dan httpx.AsyncClient
+dengan ASGITransport (tanpa network, tanpa uvicorn); varian warm/304 mengukur
+response cache.
+"""
+import argparse
+import asyncio
+import itertools
+import logging
+import os
+import sys
+import tempfile
+from typing import Dict
+
+from benchmarks.corpus import CHAT_MESSAGES, synthetic_profiles, synthetic_users
+from benchmarks.harness import (
+    DEFAULT_THRESHOLD, compare, format_comparison, format_results, load_baseline,
+    measure, measure_allocations, measure_allocations_async, measure_async, save_baseline,
+)
+
+CORPUS_SIZE = 500
+BATCH_USERS = 50
+
+
+def clear_engine_caches(_=None):
+    from fitness_engine.cache import clear_nutrition_cache
+    from fitness_engine.plan_cache import clear_plan_cache
+    clear_nutrition_cache()
+    clear_plan_cache()
+
+
+def engine_benchmarks(iterations: int) -> Dict[str, tuple]:
+    """nama -> (fn(i), setup(i) atau None, jumlah iterasi)"""
+    import fitness_engine
+    from fitness_engine.compact import expand_plan
+    from fitness_engine.engine import process_chat_message
+    from fitness_engine.meal_tables import get_meal_tables
+    from fitness_engine.progress import predict_progress
+    from fitness_engine.serialization import dumps
+
+    users = synthetic_users(CORPUS_SIZE)
+    tables = get_meal_tables()
+    meals = [(name, entry.portions) for (name, _goal), entry in tables.entries.items()]
+    foods = [(p["food"], p["grams"]) for _, portions in meals for p in portions]
+    plans = [fitness_engine.generate_full_plan(user, cache=False) for user in users[:50]]
+    heavy = max(5, iterations // 10)
+
+    def user(i):
+        return users[i % len(users)]
+
+    return {
+        "engine.generate_full_plan": (
+            lambda i: fitness_engine.generate_full_plan(user(i), cache=False), clear_engine_caches, iterations),
+        "engine.generate_calories_for_user": (
+            lambda i: fitness_engine.generate_calories_for_user(user(i)), clear_engine_caches, iterations),
+        "engine.generate_meal_plan_only": (
+            lambda i: fitness_engine.generate_meal_plan_only(user(i)), clear_engine_caches, iterations),
+        "engine.generate_workout_plan_only": (
+            lambda i: fitness_engine.generate_workout_plan_only(user(i)), clear_engine_caches, iterations),
+        "engine.generate_plans_batch": (
+            lambda i: fitness_engine.generate_plans_batch(users[:BATCH_USERS]), clear_engine_caches, heavy),
+        "engine.predict_progress": (
+            lambda i: predict_progress(user(i), weeks=16), None, iterations),
+        "engine.get_recipe_for_meal": (
+            lambda i: fitness_engine.get_recipe_for_meal(*meals[i % len(meals)]), None, iterations),
+        "engine.get_food_recipe": (
+            lambda i: fitness_engine.get_food_recipe(*foods[i % len(foods)]), None, iterations),
+        "engine.estimate_meal_cost": (
+            lambda i: fitness_engine.estimate_meal_cost(*meals[i % len(meals)]), None, iterations),
+        "engine.process_chat_message": (
+            lambda i: process_chat_message(user(i), CHAT_MESSAGES[i % len(CHAT_MESSAGES)]), None, iterations),
+        "engine.expand_plan": (
+            lambda i: expand_plan(plans[i % len(plans)]), None, iterations),
+        "engine.dumps_plan": (
+            lambda i: dumps(plans[i % len(plans)]), None, iterations),
+    }
+
+
+def run_engine_suite(iterations: int, allocations: bool) -> Dict[str, Dict]:
+    results = {}
+    for name, (fn, setup, count) in engine_benchmarks(iterations).items():
+        result = measure(fn, count, setup)
+        if allocations:
+            result.update(measure_allocations(fn, max(5, count // 5), setup))
+        results[name] = result
+        print(f"  {name}: p50 {result['p50_us']:.1f}us", file=sys.stderr)
+    return results
+
+
+async def run_http_suite(iterations: int, allocations: bool) -> Dict[str, Dict]:
+    try:
+        import httpx
+    except ImportError:
+        print("httpx is not installed (pip install httpx); skipping HTTP benchmarks", file=sys.stderr)
+        return {}
+
+    # Harus di-set sebelum main di-import: DB sementara dan rate limit login yang longgar
+    workdir = tempfile.mkdtemp(prefix="fitness-bench-")
+    os.environ["FITNESS_DB"] = os.path.join(workdir, "bench.db")
+    os.environ.setdefault("FITNESS_LOGIN_LIMIT_EMAIL", "1000000/1")
+    os.environ.setdefault("FITNESS_LOGIN_LIMIT_IP", "1000000/1")
+    import main
+
+    profiles = synthetic_profiles(CORPUS_SIZE)
+    heavy = max(5, iterations // 10)
+    nonce = os.getpid()
+
+    transport = httpx.ASGITransport(app=main.app)
+    async with main.app.router.lifespan_context(main.app):
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            credentials = {"email": "bench@example.com", "password": "bench-password"}
+            await client.post("/register", json={"name": "bench", **credentials})
+            token = (await client.post("/login", json=credentials)).json()["token"]
+            auth = {"Authorization": f"Bearer {token}"}
+
+            warm = profiles[0]
+            warm_plan = await client.post("/plan", json=warm)
+            etag = warm_plan.headers["etag"]
+            saved_plan = warm_plan.content
+            for _ in range(30):
+                await client.post("/save_history", content=saved_plan, headers=auth)
+
+            unique = itertools.count()
+
+            def fresh(i):
+                # Nama unik per panggilan -> miss di plan cache dan response cache
+                return {**profiles[i % len(profiles)], "name": f"bench-{nonce}-{next(unique)}"}
+
+            async def ok(response):
+                response = await response
+                if response.status_code >= 400:
+                    raise RuntimeError(f"{response.request.url} -> {response.status_code}: {response.text[:200]}")
+
+            benchmarks = {
+                "http.POST /plan (cold)": (lambda i: ok(client.post("/plan", json=fresh(i))), None, iterations),
+                "http.POST /plan (cached)": (lambda i: ok(client.post("/plan", json=warm)), None, iterations),
+                "http.POST /plan (304)": (
+                    lambda i: ok(client.post("/plan", json=warm, headers={"If-None-Match": etag})), None, iterations),
+                "http.POST /plan?expand=recipes (cold)": (
+                    lambda i: ok(client.post("/plan?expand=recipes", json=fresh(i))), None, iterations),
+                "http.POST /meal_plan (cold)": (
+                    lambda i: ok(client.post("/meal_plan", json=fresh(i))), None, iterations),
+                "http.POST /workout_plan (cold)": (
+                    lambda i: ok(client.post("/workout_plan", json=fresh(i))), None, iterations),
+                "http.POST /plan/batch": (
+                    lambda i: ok(client.post("/plan/batch", json=[fresh(i + k) for k in range(BATCH_USERS)])),
+                    None, heavy),
+                "http.POST /progress": (
+                    lambda i: ok(client.post("/progress?weeks=16", json=profiles[i % len(profiles)])), None, iterations),
+                "http.POST /chat": (
+                    lambda i: ok(client.post("/chat", json={"user": profiles[i % len(profiles)],
+                                                            "message": CHAT_MESSAGES[i % len(CHAT_MESSAGES)]})),
+                    None, iterations),
+                "http.GET /meals/{id}": (lambda i: ok(client.get(f"/meals/{i % 40}?goal=fat_loss")), None, iterations),
+                "http.POST /save_history": (
+                    lambda i: ok(client.post("/save_history", content=saved_plan, headers=auth)), None, iterations),
+                "http.GET /history": (lambda i: ok(client.get("/history?limit=20", headers=auth)), None, iterations),
+                "http.GET /history?summary": (
+                    lambda i: ok(client.get("/history?limit=20&summary=true", headers=auth)), None, iterations),
+                "http.POST /login": (lambda i: ok(client.post("/login", json=credentials)), None, heavy),
+            }
+
+            results = {}
+            for name, (fn, setup, count) in benchmarks.items():
+                result = await measure_async(fn, count, setup)
+                if allocations:
+                    result.update(await measure_allocations_async(fn, max(5, count // 5), setup))
+                results[name] = result
+                print(f"  {name}: p50 {result['p50_us']:.1f}us", file=sys.stderr)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--iterations", type=int, default=200)
+    parser.add_argument("--only", choices=("engine", "http"))
+    parser.add_argument("--no-alloc", action="store_true", help="skip the tracemalloc pass")
+    parser.add_argument("--baseline", help="compare against a baseline JSON written by --save-baseline")
+    parser.add_argument("--save-baseline", help="write results as a baseline JSON")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help="relative p50 slowdown counted as a regression (default 0.25)")
+    parser.add_argument("--fail-on-regression", action="store_true")
+    args = parser.parse_args()
+
+    logging.disable(logging.WARNING)
+    results = {}
+    if args.only in (None, "engine"):
+        results.update(run_engine_suite(args.iterations, not args.no_alloc))
+    if args.only in (None, "http"):
+        results.update(asyncio.run(run_http_suite(args.iterations, not args.no_alloc)))
+
+    print(format_results(results))
+
+    if args.save_baseline:
+        save_baseline(args.save_baseline, results)
+        print(f"baseline written to {args.save_baseline}")
+
+    if args.baseline:
+        rows = compare(results, load_baseline(args.baseline), args.threshold)
+        print(f"\nvs {args.baseline} (regression = p50 > +{args.threshold:.0%}):")
+        print(format_comparison(rows))
+        if args.fail_on_regression and any(row["regression"] for row in rows):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,31 +1,284 @@
+import os
+import queue
 import sqlite3
+import threading
+from contextlib import contextmanager
+from typing import Callable, Optional
 
-def get_db():
-    conn = sqlite3.connect("fitness.db")
-    conn.row_factory = sqlite3.Row
+from executors import run_db
+from history_store import init_history
+
+DB_PATH = os.getenv("FITNESS_DB", "fitness.db")
+
+# Jumlah koneksi maksimum per worker (per proses uvicorn)
+POOL_SIZE = int(os.getenv("FITNESS_DB_POOL_SIZE", "8"))
+
+# Berapa lama (ms) SQLite menunggu lock sebelum "database is locked"
+BUSY_TIMEOUT_MS = int(os.getenv("FITNESS_DB_BUSY_TIMEOUT_MS", "5000"))
+
+# Berapa lama (detik) request menunggu koneksi kosong dari pool
+ACQUIRE_TIMEOUT = float(os.getenv("FITNESS_DB_ACQUIRE_TIMEOUT", "10"))
+
+# Ukuran cache prepared statement per koneksi (sqlite3 cached_statements)
+STATEMENT_CACHE_SIZE = int(os.getenv("FITNESS_DB_STATEMENT_CACHE", "128"))
+
+# Tuning WAL. NORMAL: fsync hanya saat checkpoint (commit tetap atomik, setelah crash OS
+# transaksi terakhir bisa hilang); FULL: fsync setiap commit
+SYNCHRONOUS = os.getenv("FITNESS_DB_SYNCHRONOUS", "NORMAL").upper()
+# Checkpoint otomatis setiap N halaman WAL; file WAL dipotong ke JOURNAL_SIZE_LIMIT sesudahnya
+WAL_AUTOCHECKPOINT = int(os.getenv("FITNESS_DB_WAL_AUTOCHECKPOINT", "1000"))
+JOURNAL_SIZE_LIMIT = 64 * 1024 * 1024
+# Page cache per koneksi dan mmap (dipakai bersama lewat page cache OS oleh semua worker)
+CACHE_MB = int(os.getenv("FITNESS_DB_CACHE_MB", "16"))
+MMAP_MB = int(os.getenv("FITNESS_DB_MMAP_MB", "128"))
+
+
+class PoolTimeout(Exception):
+    pass
+
+
+def connect(path: str, busy_timeout_ms: int = BUSY_TIMEOUT_MS,
+            isolation_level: Optional[str] = "IMMEDIATE") -> sqlite3.Connection:
+    """Koneksi SQLite dengan tuning WAL dari environment (FITNESS_DB_*).
+
+    Transaksi tulis implisit memakai BEGIN IMMEDIATE: write lock diambil di awal
+    (menunggu lewat busy_timeout), jadi writer dari worker lain tidak gagal
+    "database is locked" saat upgrade dari read ke write di tengah transaksi.
+    isolation_level=None untuk mode autocommit.
+    """
+    conn = sqlite3.connect(
+        path,
+        timeout=busy_timeout_ms / 1000,
+        check_same_thread=False,
+        cached_statements=STATEMENT_CACHE_SIZE,
+        isolation_level=isolation_level,
+    )
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute(f"PRAGMA busy_timeout={int(busy_timeout_ms)}")
+    conn.execute(f"PRAGMA synchronous={SYNCHRONOUS}")
+    conn.execute(f"PRAGMA wal_autocheckpoint={WAL_AUTOCHECKPOINT}")
+    conn.execute(f"PRAGMA journal_size_limit={JOURNAL_SIZE_LIMIT}")
+    conn.execute(f"PRAGMA cache_size={-CACHE_MB * 1024}")
+    conn.execute(f"PRAGMA mmap_size={MMAP_MB * 1024 * 1024}")
+    conn.execute("PRAGMA temp_store=MEMORY")
     return conn
 
+
+class ProcessConnection:
+    """Satu koneksi per proses untuk store kecil di luar pool (rate limit, plan store, spill cache).
+
+    Worker hasil fork tidak boleh memakai koneksi parent, jadi koneksi dibuka ulang
+    kalau pid berubah; setup(conn) dipanggil sekali per koneksi (CREATE TABLE dsb).
+    Tidak thread-safe: pemanggil memegang lock sendiri selama memakai koneksi.
+    """
+
+    def __init__(self, path: str, setup: Optional[Callable[[sqlite3.Connection], None]] = None,
+                 isolation_level: Optional[str] = "IMMEDIATE"):
+        self.path = path
+        self.setup = setup
+        self.isolation_level = isolation_level
+        self._conn = None
+        self._pid = None
+
+    def get(self) -> sqlite3.Connection:
+        if self._conn is not None and self._pid == os.getpid():
+            return self._conn
+        conn = connect(self.path, isolation_level=self.isolation_level)
+        if self.setup is not None:
+            self.setup(conn)
+            if conn.in_transaction:
+                conn.commit()
+        self._conn = conn
+        self._pid = os.getpid()
+        return conn
+
+
+class ConnectionPool:
+    """Bounded pool of SQLite connections shared by the request threads of one worker"""
+
+    def __init__(self, path: str, size: int = POOL_SIZE,
+                 busy_timeout_ms: int = BUSY_TIMEOUT_MS,
+                 acquire_timeout: float = ACQUIRE_TIMEOUT):
+        self.path = path
+        self.size = size
+        self.busy_timeout_ms = busy_timeout_ms
+        self.acquire_timeout = acquire_timeout
+
+        self._idle = queue.LifoQueue(maxsize=size)
+        self._lock = threading.Lock()
+        self._created = 0
+        self._in_use = 0
+        self._peak_in_use = 0
+        self._acquired_total = 0
+        self._waits = 0
+        self._timeouts = 0
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = connect(self.path, self.busy_timeout_ms)
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    def acquire(self) -> sqlite3.Connection:
+        try:
+            conn = self._idle.get_nowait()
+        except queue.Empty:
+            conn = None
+            with self._lock:
+                if self._created < self.size:
+                    self._created += 1
+                    create = True
+                else:
+                    create = False
+                    self._waits += 1
+
+            if create:
+                try:
+                    conn = self._connect()
+                except Exception:
+                    with self._lock:
+                        self._created -= 1
+                    raise
+            else:
+                try:
+                    conn = self._idle.get(timeout=self.acquire_timeout)
+                except queue.Empty:
+                    with self._lock:
+                        self._timeouts += 1
+                    raise PoolTimeout(
+                        f"No free database connection after {self.acquire_timeout}s "
+                        f"(pool size {self.size})"
+                    )
+
+        with self._lock:
+            self._in_use += 1
+            self._acquired_total += 1
+            self._peak_in_use = max(self._peak_in_use, self._in_use)
+        return conn
+
+    def release(self, conn: sqlite3.Connection):
+        # Jangan kembalikan transaksi yang setengah jalan ke pool
+        if conn.in_transaction:
+            conn.rollback()
+
+        with self._lock:
+            self._in_use -= 1
+        self._idle.put_nowait(conn)
+
+    @contextmanager
+    def connection(self):
+        conn = self.acquire()
+        try:
+            yield conn
+        finally:
+            self.release(conn)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "size": self.size,
+                "created": self._created,
+                "in_use": self._in_use,
+                "idle": self._idle.qsize(),
+                "peak_in_use": self._peak_in_use,
+                "acquired_total": self._acquired_total,
+                "waits": self._waits,
+                "timeouts": self._timeouts,
+            }
+
+    def close(self):
+        while True:
+            try:
+                conn = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            conn.close()
+            with self._lock:
+                self._created -= 1
+
+
+pool = ConnectionPool(DB_PATH)
+
+
+class PooledSession:
+    """Koneksi pool milik satu request, baru dipinjam saat query pertama (lewat run_db),
+    jadi tidak ditahan selama pekerjaan sebelum query pertama (misalnya hash password)"""
+
+    def __init__(self, pool: ConnectionPool):
+        self._pool = pool
+        self.conn: Optional[sqlite3.Connection] = None
+
+    def call(self, fn, *args, **kwargs):
+        """fn(conn, ...) dengan koneksi request ini; jalankan di executor DB: run_db(db.call, fn, ...)"""
+        if self.conn is None:
+            self.conn = self._pool.acquire()
+        return fn(self.conn, *args, **kwargs)
+
+    def close(self):
+        if self.conn is not None:
+            conn, self.conn = self.conn, None
+            self._pool.release(conn)
+
+
+async def get_async_db():
+    """FastAPI dependency: satu PooledSession per request, koneksinya dikembalikan ke pool
+    (di executor DB, bukan di event loop) setelah request selesai"""
+    session = PooledSession(pool)
+    try:
+        yield session
+    finally:
+        if session.conn is not None:
+            await run_db(session.close)
+
+
+def with_connection(fn, *args, **kwargs):
+    """Jalankan fn(conn, ...) dengan koneksi pinjaman dari pool (dipakai lewat run_db)"""
+    with pool.connection() as conn:
+        return fn(conn, *args, **kwargs)
+
+
+def pool_stats() -> dict:
+    return pool.stats()
+
+
 def init_db():
-    conn = get_db()
-    c = conn.cursor()
-
-    c.execute("""
-        CREATE TABLE IF NOT EXISTS users(
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            name TEXT,
-            email TEXT UNIQUE,
-            password TEXT
-        )
-    """)
-
-    c.execute("""
-        CREATE TABLE IF NOT EXISTS history(
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            user_id INTEGER,
-            plan_json TEXT,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-        )
-    """)
+    with pool.connection() as conn:
+        c = conn.cursor()
+
+        c.execute("""
+            CREATE TABLE IF NOT EXISTS users(
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                name TEXT,
+                email TEXT UNIQUE,
+                password TEXT
+            )
+        """)
+
+        conn.commit()
+
+        # Tabel history (blob terkompresi + index) dan migrasi dari skema lama
+        init_history(conn)
+
+
+# ----- query helpers (sync, dipanggil lewat run_db dari endpoint async) -----
+
+def create_user(conn, name: str, email: str, password_hash: str) -> bool:
+    """password_hash dari passwords.hash_password (kolom password tidak lagi berisi plaintext)"""
+    try:
+        conn.execute("INSERT INTO users(name, email, password) VALUES (?, ?, ?)",
+                     (name, email, password_hash))
+        conn.commit()
+        return True
+    except sqlite3.IntegrityError:
+        conn.rollback()
+        return False
+
+
+def find_user(conn, email: str):
+    """Baris user berdasarkan email; password dicek di luar SQL dengan passwords.verify_password"""
+    c = conn.execute("SELECT id, name, password FROM users WHERE email = ?", (email,))
+    return c.fetchone()
+
 
+def update_password_hash(conn, user_id: int, password_hash: str):
+    conn.execute("UPDATE users SET password = ? WHERE id = ?", (password_hash, user_id))
     conn.commit()
-    conn.close()
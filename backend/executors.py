@@ -0,0 +1,121 @@
+import asyncio
+import functools
+import os
+import threading
+from concurrent.futures import Executor, ThreadPoolExecutor, ProcessPoolExecutor
+
+# "thread" atau "process" untuk generate plan (fitness_engine)
+ENGINE_EXECUTOR = os.getenv("FITNESS_ENGINE_EXECUTOR", "thread").lower()
+ENGINE_WORKERS = int(os.getenv("FITNESS_ENGINE_WORKERS", str(os.cpu_count() or 4)))
+
+# Thread khusus untuk SQLite, terpisah dari threadpool default FastAPI
+DB_WORKERS = int(os.getenv("FITNESS_DB_WORKERS", "4"))
+
+# Pool khusus hash/verifikasi password (scrypt/PBKDF2), terpisah supaya login tidak
+# menghabiskan slot engine/DB. hashlib melepas GIL selama KDF, jadi thread sudah paralel.
+KDF_EXECUTOR = os.getenv("FITNESS_KDF_EXECUTOR", "thread").lower()
+KDF_WORKERS = int(os.getenv("FITNESS_KDF_WORKERS", str(min(4, os.cpu_count() or 1))))
+# Maksimum job KDF yang antre + berjalan; lebih dari itu request langsung ditolak (503)
+KDF_MAX_PENDING = int(os.getenv("FITNESS_KDF_MAX_PENDING", "64"))
+
+_lock = threading.Lock()
+_db_executor = None
+_engine_executor = None
+_kdf_executor = None
+_kdf_pending = 0
+
+
+class ExecutorBusy(Exception):
+    pass
+
+
+def get_db_executor() -> Executor:
+    global _db_executor
+    with _lock:
+        if _db_executor is None:
+            _db_executor = ThreadPoolExecutor(
+                max_workers=DB_WORKERS, thread_name_prefix="fitness-db"
+            )
+        return _db_executor
+
+
+def get_engine_executor() -> Executor:
+    global _engine_executor
+    with _lock:
+        if _engine_executor is None:
+            if ENGINE_EXECUTOR == "process":
+                _engine_executor = ProcessPoolExecutor(max_workers=ENGINE_WORKERS)
+            elif ENGINE_EXECUTOR == "thread":
+                _engine_executor = ThreadPoolExecutor(
+                    max_workers=ENGINE_WORKERS, thread_name_prefix="fitness-engine"
+                )
+            else:
+                raise ValueError(
+                    f"FITNESS_ENGINE_EXECUTOR must be 'thread' or 'process', got '{ENGINE_EXECUTOR}'"
+                )
+        return _engine_executor
+
+
+def get_kdf_executor() -> Executor:
+    global _kdf_executor
+    with _lock:
+        if _kdf_executor is None:
+            if KDF_EXECUTOR == "process":
+                _kdf_executor = ProcessPoolExecutor(max_workers=KDF_WORKERS)
+            elif KDF_EXECUTOR == "thread":
+                _kdf_executor = ThreadPoolExecutor(
+                    max_workers=KDF_WORKERS, thread_name_prefix="fitness-kdf"
+                )
+            else:
+                raise ValueError(
+                    f"FITNESS_KDF_EXECUTOR must be 'thread' or 'process', got '{KDF_EXECUTOR}'"
+                )
+        return _kdf_executor
+
+
+async def run_db(fn, *args, **kwargs):
+    """Jalankan fungsi SQLite (blocking) di executor DB tanpa memblokir event loop"""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(get_db_executor(), functools.partial(fn, *args, **kwargs))
+
+
+async def run_engine(fn, *args, **kwargs):
+    """Jalankan pekerjaan CPU fitness_engine di thread/process pool.
+
+    Untuk mode process, fn dan argumennya harus bisa di-pickle (fungsi level modul).
+    """
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(get_engine_executor(), functools.partial(fn, *args, **kwargs))
+
+
+async def run_kdf(fn, *args, **kwargs):
+    """Jalankan hash/verifikasi password di pool KDF (bounded).
+
+    Raise ExecutorBusy kalau sudah ada KDF_MAX_PENDING job yang antre/berjalan,
+    supaya banjir login tidak membuat antrean (dan latency) tak terbatas.
+    """
+    global _kdf_pending
+    with _lock:
+        if _kdf_pending >= KDF_MAX_PENDING:
+            raise ExecutorBusy(f"Password hashing queue is full ({KDF_MAX_PENDING} pending)")
+        _kdf_pending += 1
+    try:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(get_kdf_executor(), functools.partial(fn, *args, **kwargs))
+    finally:
+        with _lock:
+            _kdf_pending -= 1
+
+
+def shutdown_executors(wait: bool = True):
+    global _db_executor, _engine_executor, _kdf_executor
+    with _lock:
+        if _kdf_executor is not None:
+            _kdf_executor.shutdown(wait=wait)
+            _kdf_executor = None
+        if _engine_executor is not None:
+            _engine_executor.shutdown(wait=wait)
+            _engine_executor = None
+        if _db_executor is not None:
+            _db_executor.shutdown(wait=wait)
+            _db_executor = None
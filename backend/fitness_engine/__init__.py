@@ -7,6 +7,7 @@ from .engine import (
     get_food_recipe,
     estimate_meal_cost
 )
+from .batch import generate_plans_batch
 
 __all__ = [
     "generate_full_plan",
@@ -15,5 +16,6 @@ __all__ = [
     "generate_workout_plan_only", 
     "get_recipe_for_meal",
     "get_food_recipe",
-    "estimate_meal_cost"
+    "estimate_meal_cost",
+    "generate_plans_batch"
 ]
\ No newline at end of file
@@ -0,0 +1,254 @@
+import numpy as np
+from typing import Dict, List, Optional, Sequence
+
+from models.user_model import UserData
+from .calories import ACTIVITY_FACTORS
+from .progress import WEEKLY_CHANGE_ACTIVITY_MULTIPLIERS, progress_trajectory, trajectory_rows
+from .engine import build_full_plan
+from .rounding import round_half_even
+
+
+class UserColumns:
+    """Field UserData dalam bentuk kolom NumPy (satu baris per user)"""
+
+    def __init__(self, users: Sequence[UserData]):
+        n = len(users)
+        self.n = n
+        self.age = np.fromiter((u.age for u in users), float, n)
+        self.height_cm = np.fromiter((u.height_cm for u in users), float, n)
+        self.weight_kg = np.fromiter((u.weight_kg for u in users), float, n)
+        # target_weight kosong/0 dianggap tidak diisi (sama dengan `if user.target_weight`)
+        self.has_target = np.fromiter((bool(u.target_weight) for u in users), bool, n)
+        self.target_weight = np.fromiter((u.target_weight or 0.0 for u in users), float, n)
+
+        gender = [u.gender.lower() for u in users]
+        self.is_male = np.fromiter((g in ("male", "m") for g in gender), bool, n)
+        self.is_female = np.fromiter((g in ("female", "f") for g in gender), bool, n)
+
+        # calories.py memakai goal/active_level lower-case, progress.py memakai nilai mentah
+        goal = [u.goal.lower() for u in users]
+        self.fat_loss = np.fromiter((g == "fat_loss" for g in goal), bool, n)
+        self.muscle_gain = np.fromiter((g == "muscle_gain" for g in goal), bool, n)
+        self.raw_fat_loss = np.fromiter((u.goal == "fat_loss" for u in users), bool, n)
+        self.raw_muscle_gain = np.fromiter((u.goal == "muscle_gain" for u in users), bool, n)
+
+        self.activity_factor = np.fromiter(
+            (ACTIVITY_FACTORS.get(u.active_level.lower(), 1.2) for u in users), float, n)
+        self.change_multiplier = np.fromiter(
+            (WEEKLY_CHANGE_ACTIVITY_MULTIPLIERS.get(u.active_level, 1.0) for u in users), float, n)
+
+
+def validation_errors(cols: UserColumns) -> List[Optional[str]]:
+    """Pesan error per user, urutan cek sama dengan calculate_calories"""
+    age, weight, height = cols.age, cols.weight_kg, cols.height_cm
+    conditions = [
+        (age <= 0) | (weight <= 0) | (height <= 0),
+        (age < 15) | (age > 80),
+        (weight < 30) | (weight > 200),
+        (height < 100) | (height > 250),
+    ]
+    messages = [
+        "Age, weight, and height must be positive",
+        "Age must be between 15 and 80 for accurate calculation",
+        "Weight must be between 30kg and 200kg",
+        "Height must be between 100cm and 250cm",
+    ]
+    codes = np.select(conditions, range(1, len(messages) + 1), 0)
+    return [messages[c - 1] if c else None for c in codes.tolist()]
+
+
+def calculate_calories_batch(cols: UserColumns) -> Dict[str, np.ndarray]:
+    """Versi vektor dari calculate_calories (BMR, TDEE, BMI, kalori & makro)"""
+    bmr = 10 * cols.weight_kg + 6.25 * cols.height_cm - 5 * cols.age + np.where(cols.is_male, 5, -161)
+    tdee = bmr * cols.activity_factor
+
+    height_m = cols.height_cm / 100
+    bmi = cols.weight_kg / (height_m ** 2)
+
+    gain_pct = np.select([bmi < 20, bmi < 25, bmi < 30], [0.12, 0.10, 0.07], 0.05)
+    loss_pct = np.select([bmi < 20, bmi < 25, bmi < 30], [0.12, 0.15, 0.20], 0.25)
+    adjusted = np.where(cols.muscle_gain, tdee + tdee * gain_pct,
+                        np.where(cols.fat_loss, tdee - tdee * loss_pct, tdee))
+    adjusted = np.rint(adjusted)
+
+    # Safety bounds untuk kesehatan
+    min_calories = np.where(cols.is_female, 1200, 1500)
+    adjusted = np.maximum(min_calories, np.minimum(adjusted, 4000))
+
+    protein_g = cols.weight_kg * np.where(cols.fat_loss, 2.0, np.where(cols.muscle_gain, 1.8, 1.6))
+    protein_cal = protein_g * 4
+    fat_cal = adjusted * np.where(cols.fat_loss, 0.20, 0.25)
+    fat_g = fat_cal / 9
+    carbs_g = (adjusted - (protein_cal + fat_cal)) / 4
+
+    return {
+        "calories": adjusted.astype(np.int64),
+        "protein": np.rint(protein_g).astype(np.int64),
+        "fat": np.rint(fat_g).astype(np.int64),
+        "carbs": np.rint(carbs_g).astype(np.int64),
+        "bmr": np.rint(bmr).astype(np.int64),
+        "tdee": np.rint(tdee).astype(np.int64),
+        "bmi": round_half_even(bmi, 1),
+    }
+
+
+def progress_targets_batch(cols: UserColumns) -> np.ndarray:
+    """Target berat versi progress.calculate_target_weight (berbasis BMI)"""
+    height_m2 = (cols.height_cm / 100) ** 2
+    current_bmi = cols.weight_kg / height_m2
+    fat_loss_target = round_half_even(22.0 * height_m2, 1)
+    muscle_target = round_half_even(np.minimum(current_bmi + 1.5, 25.0) * height_m2, 1)
+    fallback = np.where(cols.raw_fat_loss, fat_loss_target,
+                        np.where(cols.raw_muscle_gain, muscle_target, cols.weight_kg))
+    return np.where(cols.has_target, cols.target_weight, fallback)
+
+
+def plan_targets_batch(cols: UserColumns) -> np.ndarray:
+    """Target berat versi engine.calculate_target_weight (ditampilkan di user_info)"""
+    fallback = np.where(cols.raw_fat_loss, cols.weight_kg * 0.85,
+                        np.where(cols.raw_muscle_gain, cols.weight_kg * 1.08, cols.weight_kg))
+    return np.where(cols.has_target, cols.target_weight, fallback)
+
+
+def weekly_weight_change_batch(cols: UserColumns, current: np.ndarray, target: np.ndarray) -> np.ndarray:
+    """Versi vektor dari calculate_weekly_weight_change"""
+    total_change = target - current
+    base_rate = np.where(cols.raw_fat_loss, -0.7, np.where(cols.raw_muscle_gain, 0.3, 0.0))
+    weight_factor = np.where(np.abs(total_change) > 10, 1.2, 1.0)
+    weekly = base_rate * cols.change_multiplier * weight_factor
+
+    # Arah perubahan mengikuti arah target
+    weekly = np.where((total_change > 0) & (weekly < 0), np.abs(weekly), weekly)
+    weekly = np.where((total_change < 0) & (weekly > 0), -np.abs(weekly), weekly)
+
+    weekly = np.where(cols.raw_fat_loss, np.maximum(weekly, -1.5), weekly)
+    weekly = np.where(cols.raw_muscle_gain, np.minimum(weekly, 0.8), weekly)
+    return np.where(total_change == 0, 0.0, weekly)
+
+
+def time_to_target_batch(cols: UserColumns, current: np.ndarray, target: np.ndarray,
+                         weekly: np.ndarray) -> List[Dict]:
+    """Versi vektor dari calculate_time_to_target"""
+    moving = weekly != 0
+    weeks_needed = np.abs(np.divide(target - current, weekly,
+                                    out=np.zeros_like(weekly), where=moving))
+    months_needed = weeks_needed / 4.33
+    unrealistic_loss = cols.raw_fat_loss & (weeks_needed > 52)
+    unrealistic_gain = ~cols.raw_fat_loss & cols.raw_muscle_gain & (weeks_needed > 78)
+
+    weeks_rounded = np.rint(weeks_needed).astype(np.int64).tolist()
+    months_rounded = round_half_even(months_needed, 1).tolist()
+    weekly_rounded = round_half_even(weekly, 1).tolist()
+
+    estimates = []
+    for i, is_moving in enumerate(moving.tolist()):
+        if not is_moving:
+            estimates.append({
+                "weeks_to_target": 0,
+                "months_to_target": 0,
+                "is_achievable": True,
+                "message": "You're already at your target weight!"
+            })
+            continue
+
+        if unrealistic_loss[i]:
+            is_realistic, message = False, "Consider setting a closer target weight for better motivation"
+        elif unrealistic_gain[i]:
+            is_realistic, message = False, "Muscle gain takes time. Consider a more gradual target"
+        else:
+            is_realistic, message = True, "This is a realistic goal!"
+
+        estimates.append({
+            "weeks_to_target": weeks_rounded[i],
+            "months_to_target": months_rounded[i],
+            "is_achievable": is_realistic,
+            "message": message,
+            "weekly_change_goal": weekly_rounded[i]
+        })
+    return estimates
+
+
+def predict_progress_batch(current: np.ndarray, target: np.ndarray, weekly: np.ndarray,
+                           horizons: np.ndarray) -> List[List[Dict]]:
+    """Kurva progress semua user sekaligus, hasilnya sama dengan predict_progress per user"""
+    trajectory = progress_trajectory(current, target, weekly, int(horizons.max(initial=0)))
+    return [trajectory_rows(trajectory, i, weeks) for i, weeks in enumerate(horizons.tolist())]
+
+
+def generate_plans_batch(users: Sequence[UserData], weeks_progress: int = None,
+                         details: bool = True) -> List[Dict]:
+    """Generate plan untuk banyak user sekaligus.
+
+    Angka-angka (BMR, TDEE, BMI, kalori, makro, target, kurva progress) dihitung
+    sebagai array NumPy untuk semua user; workout/diet/grocery tetap dirakit per
+    user lewat build_full_plan. Dengan details=False hanya bagian numerik yang
+    dikembalikan. User yang datanya tidak valid mendapat {"error": ...} di
+    posisi yang sama, tanpa menggagalkan batch.
+    """
+    users = list(users)
+    if not users:
+        return []
+
+    cols = UserColumns(users)
+    errors = validation_errors(cols)
+
+    # Baris yang tidak valid tetap ikut dihitung (hasilnya dibuang), jadi abaikan warning /0
+    with np.errstate(divide="ignore", invalid="ignore"):
+        calories = calculate_calories_batch(cols)
+        current = cols.weight_kg
+        target = progress_targets_batch(cols)
+        weekly = weekly_weight_change_batch(cols, current, target)
+        time_estimates = time_to_target_batch(cols, current, target, weekly)
+
+    if weeks_progress:
+        horizons = np.full(cols.n, int(weeks_progress))
+    else:
+        weeks_to_target = np.fromiter((t["weeks_to_target"] for t in time_estimates), np.int64, cols.n)
+        horizons = np.clip(weeks_to_target, 8, 16)  # 8-16 minggu seperti generate_full_plan
+    curves = predict_progress_batch(current, target, weekly, horizons)
+
+    plan_targets = plan_targets_batch(cols).tolist()
+    columns = {name: values.tolist() for name, values in calories.items()}
+
+    plans = []
+    for i, user in enumerate(users):
+        if errors[i] is not None:
+            plans.append({"error": errors[i]})
+            continue
+
+        cal_data = {
+            "calories": columns["calories"][i],
+            "macros": {
+                "protein": columns["protein"][i],
+                "fat": columns["fat"][i],
+                "carbs": columns["carbs"][i]
+            },
+            "bmr": columns["bmr"][i],
+            "tdee": columns["tdee"][i],
+            "bmi": columns["bmi"][i]
+        }
+        target_weight = user.target_weight if user.target_weight else plan_targets[i]
+
+        if details:
+            plans.append(build_full_plan(user, cal_data, curves[i], time_estimates[i], target_weight))
+        else:
+            plans.append({
+                "user_info": {
+                    "name": user.name,
+                    "goal": user.goal,
+                    "vegan": user.vegan,
+                    "active_level": user.active_level,
+                    "current_weight": user.weight_kg,
+                    "target_weight": target_weight
+                },
+                "nutrition": {
+                    "calories_target": cal_data["calories"],
+                    "macros_target": cal_data["macros"],
+                    "bmr": cal_data["bmr"],
+                    "tdee": cal_data["tdee"],
+                    "bmi": cal_data["bmi"]
+                },
+                "progress_prediction": curves[i],
+                "time_estimate": time_estimates[i]
+            })
+    return plans
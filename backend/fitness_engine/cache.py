@@ -0,0 +1,159 @@
+import functools
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Iterable, Optional
+
+# Semua field UserData yang mempengaruhi output engine
+PROFILE_FIELDS = ("name", "age", "gender", "height_cm", "weight_kg", "goal",
+                  "active_level", "vegan", "target_weight")
+
+NUTRITION_CACHE_SIZE = 1024
+NUTRITION_CACHE_TTL = 3600  # detik
+
+_MISSING = object()
+
+
+class LRUCache:
+    """Thread-safe LRU cache dengan TTL opsional dan statistik hit/miss"""
+
+    def __init__(self, maxsize: int = 1024, ttl: Optional[float] = None):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def get(self, key, default=None):
+        with self._lock:
+            entry = self._data.get(key, _MISSING)
+            if entry is _MISSING:
+                self.misses += 1
+                return default
+
+            value, expires_at = entry
+            if expires_at is not None and expires_at <= time.monotonic():
+                del self._data[key]
+                self.expirations += 1
+                self.misses += 1
+                return default
+
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key, value, ttl: Optional[float] = None):
+        """ttl per entry (detik) menggantikan ttl cache kalau diisi"""
+        ttl = ttl if ttl is not None else self.ttl
+        expires_at = time.monotonic() + ttl if ttl else None
+        with self._lock:
+            self._data[key] = (value, expires_at)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def delete(self, key) -> bool:
+        with self._lock:
+            return self._data.pop(key, _MISSING) is not _MISSING
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+    def stats(self) -> Dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._data),
+                "maxsize": self.maxsize,
+                "ttl": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+            }
+
+
+def _canonical(value):
+    if isinstance(value, float) and value.is_integer():
+        return int(value)
+    return value
+
+
+def profile_hash(user, fields: Iterable[str] = PROFILE_FIELDS) -> str:
+    """Hash kanonik dari field UserData yang relevan (urutan & tipe angka dinormalisasi)"""
+    payload = {f: _canonical(getattr(user, f, None)) for f in fields}
+    raw = json.dumps(payload, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.blake2b(raw.encode(), digest_size=16).hexdigest()
+
+
+def _copy(value):
+    # Hasil yang di-cache adalah dict kecil; kembalikan salinan supaya caller
+    # tidak bisa mengubah isi cache
+    if isinstance(value, dict):
+        return {k: _copy(v) for k, v in value.items()}
+    if isinstance(value, list):
+        return [_copy(v) for v in value]
+    return value
+
+
+class ProfileCacheRegistry:
+    def __init__(self):
+        self.caches: Dict[str, LRUCache] = {}
+
+    def register(self, name: str, maxsize: int, ttl: Optional[float]) -> LRUCache:
+        cache = LRUCache(maxsize=maxsize, ttl=ttl)
+        self.caches[name] = cache
+        return cache
+
+    def clear(self):
+        for cache in self.caches.values():
+            cache.clear()
+
+    def stats(self) -> Dict:
+        return {name: cache.stats() for name, cache in self.caches.items()}
+
+
+nutrition_caches = ProfileCacheRegistry()
+
+
+def profile_cached(name: str, fields: Iterable[str],
+                   maxsize: int = NUTRITION_CACHE_SIZE, ttl: Optional[float] = NUTRITION_CACHE_TTL):
+    """Memoize fungsi f(user) berdasarkan hash field profil yang dipakai fungsi tersebut"""
+    fields = tuple(fields)
+
+    def decorator(fn):
+        cache = nutrition_caches.register(name, maxsize, ttl)
+
+        @functools.wraps(fn)
+        def wrapper(user):
+            key = profile_hash(user, fields)
+            value = cache.get(key, _MISSING)
+            if value is _MISSING:
+                value = fn(user)
+                cache.set(key, value)
+            return _copy(value)
+
+        wrapper.cache = cache
+        wrapper.uncached = fn
+        return wrapper
+
+    return decorator
+
+
+def clear_nutrition_cache():
+    nutrition_caches.clear()
+
+
+def nutrition_cache_stats() -> Dict:
+    return nutrition_caches.stats()
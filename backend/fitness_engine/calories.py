@@ -1,3 +1,7 @@
+from .cache import profile_cached
+from .profiling import timed_stage
+
+
 def calculate_bmr(user) -> float:
     gender = user.gender.lower()
     if gender in ("male", "m"):
@@ -6,15 +10,17 @@ def calculate_bmr(user) -> float:
         return 10 * user.weight_kg + 6.25 * user.height_cm - 5 * user.age - 161
 
 
+ACTIVITY_FACTORS = {
+    "sedentary": 1.2,
+    "light": 1.375,
+    "moderate": 1.55,
+    "active": 1.725,
+    "very_active": 1.9
+}
+
+
 def activity_factor(active_level: str) -> float:
-    mapping = {
-        "sedentary": 1.2,
-        "light": 1.375,
-        "moderate": 1.55,
-        "active": 1.725,
-        "very_active": 1.9
-    }
-    return mapping.get(active_level.lower(), 1.2)
+    return ACTIVITY_FACTORS.get(active_level.lower(), 1.2)
 
 
 def adaptive_surplus_deficit(tdee: float, bmi: float, goal: str) -> float:
@@ -76,6 +82,8 @@ def calculate_macros(calories: float, user) -> dict:
     }
 
 
+@timed_stage()
+@profile_cached("calories", ("age", "gender", "height_cm", "weight_kg", "goal", "active_level"))
 def calculate_calories(user) -> dict:
     if user.age <= 0 or user.weight_kg <= 0 or user.height_cm <= 0:
         raise ValueError("Age, weight, and height must be positive")
@@ -0,0 +1,163 @@
+import hashlib
+import json
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+
+# Fallback untuk bahan yang tidak ada di katalog
+DEFAULT_PORTION_G = 100
+DEFAULT_COST_PER_100G = 3000
+DEFAULT_COOKING_STEPS = ("Masak sesuai preferensi (tumis/rebus/panggang).",)
+
+# Satu sumber data untuk semua bahan:
+# nama: (porsi dasar gram, harga per 100g, (protein, karbo, lemak) per 100g atau None)
+INGREDIENTS = {
+    # Proteins
+    "chicken_breast": (150, 6000, (31, 0, 3.6)),
+    "egg": (100, 2500, (13, 1, 11)),
+    "tofu": (150, 2500, (8, 2, 4)),
+    "tempeh": (150, 3000, (19, 12, 11)),
+    "tuna": (150, 8500, (29, 0, 0.8)),
+    "chickpea": (120, 7000, (19, 61, 6)),
+    "lentil": (120, 6000, (9, 20, 0.4)),
+
+    # Carbs
+    "rice": (150, 1500, (2.7, 28, 0.3)),
+    "oats": (50, 3000, (17, 66, 7)),
+    "pasta": (100, 3000, (13, 75, 1.5)),
+    "bread": (50, 2000, (8, 49, 4)),
+
+    # Buah / Sayur
+    "banana": (DEFAULT_PORTION_G, 2000, (1.1, 23, 0.3)),
+    "vegetable_mix": (100, 2000, (2, 8, 0.2)),
+    "spinach": (50, 4000, (2.9, 3.6, 0.4)),
+    "broccoli": (80, 8000, (2.8, 7, 0.4)),
+    "tomato": (DEFAULT_PORTION_G, 3000, None),
+    "chilies": (DEFAULT_PORTION_G, 5000, None),
+    "carrot": (DEFAULT_PORTION_G, 2500, None),
+
+    # Dairy & Alternatives
+    "soy_milk": (200, 2000, (3.3, 6, 1.8)),
+    "yogurt": (100, 8000, (3.5, 5, 3.5)),
+
+    # Seasonings
+    "sugar": (5, 1200, (0, 100, 0)),
+    "salt": (2, 500, (0, 0, 0)),
+    "pepper": (1, 8000, (0, 0, 0)),
+    "cooking_oil": (10, 12000, (0, 0, 100)),
+    "olive_oil": (10, 26000, (0, 0, 100)),
+    "soy_sauce": (10, 8000, (8, 4, 0)),
+    "sweet_soy_sauce": (10, 7000, (4, 45, 0)),
+    "chili_sauce": (10, 6000, (2, 25, 0)),
+    "tomato_sauce": (DEFAULT_PORTION_G, 6000, None),
+    "oyster_sauce": (DEFAULT_PORTION_G, 15000, None),
+    "curry_powder": (5, 10000, (14, 58, 14)),
+    "coconut_milk": (100, 5000, (2, 6, 24)),
+    "butter": (5, 18000, (1, 0, 81)),
+    "margarine": (5, 10000, (0, 0, 80)),
+    "peanut_butter": (20, 15000, (25, 20, 50)),
+
+    # Aromatics
+    "onion": (20, 3000, None),
+    "garlic": (10, 4000, None),
+    "shallot": (DEFAULT_PORTION_G, 3000, None),
+    "ginger": (DEFAULT_PORTION_G, 3000, None),
+    "lemongrass": (DEFAULT_PORTION_G, 2000, None),
+    "lime": (DEFAULT_PORTION_G, 3000, None),
+}
+
+# Nama lain yang dipakai di meal/recipe -> nama di katalog
+ALIASES = {
+    "vegetable mix": "vegetable_mix",
+    "vegetables": "vegetable_mix",
+    "milk": "soy_milk",
+}
+
+# Bumbu/minyak yang porsinya tidak ikut diskala berdasarkan goal
+GOAL_FIXED_PORTIONS = frozenset({"salt", "pepper", "sugar", "cooking_oil", "olive_oil"})
+
+COOKING_STEPS = {
+    "rice": ["Cuci beras, masak dengan rice cooker atau panci sampai matang."],
+    "chicken_breast": ["Bumbui ayam, panggang/pan-fry 7-10 menit tiap sisi."],
+    "tuna": ["Bumbui tuna, panggang/pan-fry 5-7 menit tiap sisi."],
+    "egg": ["Rebus atau orak-arik sesuai selera."],
+    "tofu": ["Potong tofu, goreng atau tumis dengan bumbu sederhana."],
+    "tempeh": ["Potong tempe, goreng atau tumis dengan kecap/tumis."],
+    "oats": ["Masak oats dengan air atau susu selama 3-5 menit."],
+    "vegetable_mix": ["Cuci dan tumis/rebus sayuran sampai matang."],
+    "pasta": ["Rebus pasta 7-10 menit hingga al dente."],
+    "soy_milk": ["Susu nabati bisa diminum langsung atau dicampur oats/smoothie."],
+    "coconut_milk": ["Gunakan untuk kuah/curry, masak sebentar."],
+    "peanut_butter": ["Oleskan pada roti atau campur dengan smoothie."],
+    "yogurt": ["Bisa dimakan langsung atau dicampur dengan buah dan granola."],
+    "bread": ["Panggang atau makan langsung."],
+    "banana": ["Kupas dan makan langsung, atau potong untuk campuran."],
+    "sugar": ["Gunakan sebagai pemanis secukupnya."],
+    "salt": ["Gunakan sebagai penambah rasa secukupnya."],
+    "pepper": ["Taburkan sebagai penambah rasa."],
+    "cooking_oil": ["Gunakan untuk menumis atau menggoreng."],
+    "soy_sauce": ["Gunakan sebagai penyedap rasa."],
+    "sweet_soy_sauce": ["Gunakan untuk memberi rasa manis dan warna."],
+    "chili_sauce": ["Gunakan untuk rasa pedas."],
+    "curry_powder": ["Tumis dengan bawang sebagai dasar kari."],
+}
+
+
+def _frozen(values, dtype) -> np.ndarray:
+    column = np.array(values, dtype=dtype)
+    column.setflags(write=False)
+    return column
+
+
+class IngredientCatalog:
+    """Katalog bahan read-only: tiap bahan punya ID integer dan data di kolom array.
+
+    Kolom NumPy (portion_g, cost_per_100g, macros, goal_scaled) dipakai untuk
+    perhitungan vektor; mirror tuple-nya dipakai untuk lookup satu bahan
+    (indeks tuple mengembalikan int Python biasa).
+    """
+
+    def __init__(self, ingredients: Dict[str, tuple], aliases: Dict[str, str],
+                 cooking_steps: Dict[str, list], goal_fixed: frozenset):
+        self.names: Tuple[str, ...] = tuple(ingredients)
+        ids = {name: i for i, name in enumerate(self.names)}
+        ids.update({alias: ids[name] for alias, name in aliases.items()})
+        self._ids = ids
+
+        rows = list(ingredients.values())
+        self.portion_g = _frozen([r[0] for r in rows], np.int32)
+        self.cost_per_100g = _frozen([r[1] for r in rows], np.int32)
+        self.macros = _frozen([r[2] or (np.nan, np.nan, np.nan) for r in rows], np.float64)
+        self.goal_scaled = _frozen([name not in goal_fixed for name in self.names], bool)
+
+        self.portions: Tuple[int, ...] = tuple(self.portion_g.tolist())
+        self.costs: Tuple[int, ...] = tuple(self.cost_per_100g.tolist())
+        self.scaled: Tuple[bool, ...] = tuple(self.goal_scaled.tolist())
+        self.cooking_steps: Tuple[Optional[tuple], ...] = tuple(
+            tuple(cooking_steps[name]) if name in cooking_steps else None for name in self.names
+        )
+
+        # Versi konten katalog, berubah kalau data bahan/alias/langkah masak berubah
+        payload = json.dumps([ingredients, aliases, cooking_steps, sorted(goal_fixed)],
+                             sort_keys=True, default=list)
+        self.version = hashlib.blake2b(payload.encode(), digest_size=8).hexdigest()
+
+    def __len__(self):
+        return len(self.names)
+
+    def lookup(self, name: str) -> Optional[int]:
+        """ID bahan (alias ikut di-resolve), None kalau tidak ada di katalog"""
+        return self._ids.get(name)
+
+    def cost(self, name: str) -> int:
+        ingredient_id = self._ids.get(name)
+        return DEFAULT_COST_PER_100G if ingredient_id is None else self.costs[ingredient_id]
+
+    def macros_per_100g(self, name: str) -> Optional[Dict[str, float]]:
+        ingredient_id = self._ids.get(name)
+        if ingredient_id is None or np.isnan(self.macros[ingredient_id, 0]):
+            return None
+        return dict(zip(("protein", "carbs", "fat"), self.macros[ingredient_id].tolist()))
+
+
+catalog = IngredientCatalog(INGREDIENTS, ALIASES, COOKING_STEPS, GOAL_FIXED_PORTIONS)
@@ -0,0 +1,145 @@
+import logging
+from typing import Dict, List, Optional, Tuple, Union
+
+from .diet import meal_to_ingredients
+from .meal_tables import build_meal_entry, get_meal_tables, table_goal
+from .profiling import timed_stage
+from .serialization import loads
+
+logger = logging.getLogger(__name__)
+
+# Versi format plan compact (disimpan di meal_refs["format"])
+COMPACT_FORMAT = 1
+
+# Key plan yang berisi hari-hari diet (full plan / meal plan only)
+DIET_PLAN_KEYS = ("diet_plan", "meal_plan")
+
+EXPAND_OPTIONS = ("recipes",)
+
+
+@timed_stage()
+def compact_diet_plan(diet_weekly: List[Dict], goal: str) -> Tuple[List[Dict], Dict]:
+    """Ubah output generate_diet jadi hari yang hanya berisi ID meal.
+
+    Return (days, meal_refs). meal_refs menyimpan nama tiap ID yang dipakai dan
+    goal porsinya, jadi plan tetap bisa di-expand walaupun tabel sudah di-rebuild.
+    Meal yang tidak ada di tabel ditulis dengan namanya langsung.
+    """
+    tables = get_meal_tables()
+    names = {}
+    days = []
+    for day in diet_weekly:
+        meals = {}
+        for meal_type, meal_name in day["meals"].items():
+            meal_id = tables.meal_ids.get(meal_name)
+            if meal_id is None:
+                meals[meal_type] = meal_name
+                continue
+            names[str(meal_id)] = meal_name
+            meals[meal_type] = meal_id
+        days.append({"day": day["day"], "meals": meals})
+
+    meal_refs = {
+        "format": COMPACT_FORMAT,
+        "version": tables.version,
+        "goal": table_goal(goal),
+        "names": names,
+    }
+    return days, meal_refs
+
+
+def _meal_name(ref: Union[int, str], names: Dict[str, str]) -> str:
+    if isinstance(ref, str):
+        return ref
+    name = names.get(str(ref))
+    if name is None:
+        raise ValueError(f"Unknown meal id {ref}")
+    return name
+
+
+def expand_diet_plan(days: List[Dict], meal_refs: Dict, raw: bool = False) -> List[Dict]:
+    """Kebalikan compact_diet_plan: hari lengkap dengan ingredients, portions, recipes & meal_details.
+
+    Dengan raw=True bagian dari tabel diisi RawJSON yang sudah di-encode (hanya
+    untuk di-serialize lewat serialization.dumps, bukan untuk dibaca sebagai dict).
+    """
+    tables = get_meal_tables()
+    names = meal_refs.get("names", {})
+    goal = meal_refs.get("goal", "maintain")
+
+    expanded = []
+    for day in days:
+        meals = {meal_type: _meal_name(ref, names) for meal_type, ref in day["meals"].items()}
+        full_day = {
+            "day": day["day"],
+            "meals": meals,
+            "ingredients": {meal_type: meal_to_ingredients.get(name, []) for meal_type, name in meals.items()},
+            "portions": {},
+            "recipes": {},
+            "meal_details": {},
+        }
+        for meal_type, meal_name in meals.items():
+            ingredients = full_day["ingredients"][meal_type]
+            entry = raw and tables.lookup_fragments(meal_name, ingredients, goal)
+            entry = entry or tables.lookup(meal_name, ingredients, goal) or build_meal_entry(meal_name, ingredients, goal)
+            full_day["portions"][meal_type] = entry.portions
+            full_day["recipes"][meal_type] = entry.recipes
+            full_day["meal_details"][meal_type] = entry.meal_details
+        expanded.append(full_day)
+    return expanded
+
+
+def expand_plan(plan: Dict, raw: bool = False) -> Dict:
+    """Plan dengan diet yang sudah di-expand; plan lama (sudah full) dikembalikan apa adanya"""
+    meal_refs = plan.get("meal_refs")
+    if not isinstance(meal_refs, dict):
+        return plan
+    expanded = {key: value for key, value in plan.items() if key != "meal_refs"}
+    for key in DIET_PLAN_KEYS:
+        if key in expanded:
+            expanded[key] = expand_diet_plan(expanded[key], meal_refs, raw)
+    return expanded
+
+
+def expand_plans(plans: List[Dict], raw: bool = False) -> List[Dict]:
+    return [expand_plan(plan, raw) for plan in plans]
+
+
+def meal_detail(meal_id: int, goal: str) -> Optional[Dict]:
+    """Data lengkap satu meal berdasarkan ID (untuk resolve lazy dari client)"""
+    tables = get_meal_tables()
+    if not 0 <= meal_id < len(tables.meal_names):
+        return None
+    meal_name = tables.meal_names[meal_id]
+    ingredients = meal_to_ingredients.get(meal_name, [])
+    entry = tables.lookup(meal_name, ingredients, goal) or build_meal_entry(meal_name, ingredients, goal)
+    return {
+        "id": meal_id,
+        "meal": meal_name,
+        "goal": table_goal(goal),
+        "ingredients": ingredients,
+        "portions": entry.portions,
+        "recipes": entry.recipes,
+        "meal_details": entry.meal_details,
+    }
+
+
+def expand_history_rows(rows: List[Dict]) -> List[Dict]:
+    """Expand plan_json (teks JSON, bytes) di baris history yang disimpan dalam format compact.
+
+    Baris compact mendapat plan_json berupa dict hasil expand (dengan fragment RawJSON);
+    baris lain tidak disentuh, tanpa decode. Baris yang gagal di-expand (body /save_history
+    dari client dengan meal_refs rusak) dikirim apa adanya, tanpa menggagalkan halaman.
+    """
+    expanded = []
+    for row in rows:
+        plan_json = row.get("plan_json")
+        if isinstance(plan_json, bytes) and b'"meal_refs"' in plan_json:
+            try:
+                plan = loads(plan_json)
+                if isinstance(plan, dict) and "meal_refs" in plan:
+                    row = {**row, "plan_json": expand_plan(plan, raw=True)}
+            except (ValueError, TypeError, KeyError, AttributeError) as exc:
+                logger.warning("History row %s not expanded: %r", row.get("id"), exc)
+        expanded.append(row)
+    return expanded
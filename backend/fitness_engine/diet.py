@@ -1,6 +1,7 @@
 import random
-from typing import List, Dict
+from typing import List, Dict, Optional
 from fitness_engine.portions import estimate_portions
+from fitness_engine.profiling import timed_stage
 from fitness_engine.recipes import generate_recipe
 from models.user_model import UserData
 
@@ -132,7 +133,11 @@ non_vegan_meals = {
     ]
 }
 
-def generate_diet(user: UserData, calories_target, macros_target) -> List[Dict]:
+@timed_stage()
+def generate_diet(user: UserData, calories_target, macros_target,
+                  rng: Optional[random.Random] = None) -> List[Dict]:
+    # rng=None memakai modul random global (tidak deterministik); isi untuk hasil yang bisa diulang
+    rng = rng or random
 
     meals_set = vegan_meals if user.vegan else non_vegan_meals
     plan = []
@@ -143,9 +148,9 @@ def generate_diet(user: UserData, calories_target, macros_target) -> List[Dict]:
         available_lunch = [m for m in meals_set["lunch"] if m not in used_meals["lunch"][-2:]]
         available_dinner = [m for m in meals_set["dinner"] if m not in used_meals["dinner"][-2:]]
         
-        breakfast = random.choice(available_breakfast or meals_set["breakfast"])
-        lunch = random.choice(available_lunch or meals_set["lunch"])
-        dinner = random.choice(available_dinner or meals_set["dinner"])
+        breakfast = rng.choice(available_breakfast or meals_set["breakfast"])
+        lunch = rng.choice(available_lunch or meals_set["lunch"])
+        dinner = rng.choice(available_dinner or meals_set["dinner"])
 
         plan.append({
             "day": day,
@@ -5,44 +5,80 @@ from .progress import predict_progress, calculate_time_to_target
 from .portions import estimate_portions
 from .recipes import generate_meal_recipe, generate_recipe
 from .grocery import generate_grocery_list
+from .meal_tables import get_meal_tables
+from .compact import compact_diet_plan
+from .cache import profile_cached
+from .plan_store import plan_store
+from .plan_cache import plan_cache, plan_rng, plan_seed
+from .profiling import timed_stage
+from .router import IntentRouter, KeywordIndex
+from .templates import ResponseTemplate, frozen_response, keyed_response
 from models.user_model import UserData
 from typing import List, Dict, Optional, Union
+import logging
 import random
 from datetime import datetime, timedelta
 
+logger = logging.getLogger(__name__)
+
 
 def generate_calories_for_user(user) -> dict:
     return calculate_calories(user)
 
-def generate_full_plan(user: UserData, weeks_progress: int = None) -> Dict:
+def generate_full_plan(user: UserData, weeks_progress: int = None, seed: Optional[int] = None,
+                       cache: bool = True) -> Dict:
+    """Full plan yang deterministik untuk (profil, seed); seed None = turunan dari profil.
+
+    Hasil di-cache per (profil, seed, weeks_progress, versi data) kecuali cache=False.
+    Plan dari cache dipakai bersama: jangan diubah in-place.
+    """
+    seed = plan_seed(user, seed)
+    if not cache:
+        return _generate_full_plan(user, weeks_progress, seed)
+    key = plan_cache.key("full", user, seed, weeks_progress)
+    return plan_cache.get_or_build(key, lambda: _generate_full_plan(user, weeks_progress, seed))
+
+def _generate_full_plan(user: UserData, weeks_progress: Optional[int], seed: int) -> Dict:
+    time_estimate = calculate_time_to_target(user)
     if not weeks_progress:
-        time_estimate = calculate_time_to_target(user)
         weeks_progress = min(time_estimate["weeks_to_target"], 16)  # Max 16 weeks display
         weeks_progress = max(weeks_progress, 8)
         
     # Calculate nutrition targets
     cal_data = calculate_calories(user)
+    
+    # Generate progress prediction
+    progress_prediction = predict_progress(user, weeks=weeks_progress)
+    
+    return build_full_plan(user, cal_data, progress_prediction, time_estimate, seed=seed)
+
+def build_full_plan(
+    user: UserData,
+    cal_data: Dict,
+    progress_prediction: List[Dict],
+    time_estimate: Dict,
+    target_weight: Optional[float] = None,
+    seed: Optional[int] = None
+) -> Dict:
+    """Rakit full plan dari target nutrisi & progress yang sudah dihitung
+    (dipakai generate_full_plan dan generate_plans_batch)"""
     calories_target = cal_data["calories"]
     macros_target = cal_data["macros"]
+    seed = plan_seed(user, seed)
     
     # Generate workout plan
-    workout_plan = generate_workouts(user)
+    workout_plan = generate_workouts(user, plan_rng(seed, "workouts"))
     
-    if workout_plan and len(workout_plan) > 0:
+    # Blok `if __debug__` dihapus compiler saat jalan dengan `python -O`
+    if __debug__ and workout_plan:
         first_day = workout_plan[0]
-        print(f"Day 1 type: {first_day.get('type')}")
-        print(f"Workout count: {len(first_day.get('workout', []))}")
+        logger.debug("Day 1 type: %s, workout count: %d",
+                     first_day.get('type'), len(first_day.get('workout', [])))
         if first_day.get('workout'):
-            first_exercise = first_day['workout'][0]
-            print(f"First exercise: {first_exercise}")
-            print(f"Exercise type: {type(first_exercise)}")
-            if isinstance(first_exercise, dict):
-                print(f"Has sets: {'sets' in first_exercise}")
-                print(f"Has reps: {'reps' in first_exercise}")
-                print(f"Has rest: {'rest' in first_exercise}")
+            logger.debug("First exercise: %r", first_day['workout'][0])
     
     # Generate basic diet plan structure
-    diet_weekly = generate_diet(user, calories_target, macros_target)
+    diet_weekly = generate_diet(user, calories_target, macros_target, plan_rng(seed, "diet"))
     
     # Add portions and recipes to diet plan
     diet_plan_with_recipes = add_recipes_and_portions_to_diet(
@@ -52,9 +88,11 @@ def generate_full_plan(user: UserData, weeks_progress: int = None) -> Dict:
     # Generate grocery list from enhanced diet plan
     grocery_list = generate_grocery_list(diet_plan_with_recipes)
     
-    # Generate progress prediction
-    progress_prediction = predict_progress(user, weeks=weeks_progress)
-    time_estimate = calculate_time_to_target(user)
+    # Response hanya berisi ID meal; detail recipe di-expand saat diminta (lihat compact.expand_plan)
+    diet_days, meal_refs = compact_diet_plan(diet_weekly, user.goal)
+    
+    if target_weight is None:
+        target_weight = user.target_weight if user.target_weight else calculate_target_weight(user)
     
     return {
         "user_info": {
@@ -63,60 +101,58 @@ def generate_full_plan(user: UserData, weeks_progress: int = None) -> Dict:
             "vegan": user.vegan,
             "active_level": user.active_level,
             "current_weight": user.weight_kg,
-            "target_weight": user.target_weight if user.target_weight else calculate_target_weight(user)
+            "target_weight": target_weight
         },
         "nutrition": {
             "calories_target": calories_target,
             "macros_target": macros_target
         },
         "workout_plan": workout_plan,
-        "diet_plan": diet_plan_with_recipes, 
+        "diet_plan": diet_days,
+        "meal_refs": meal_refs,
         "grocery_list": grocery_list,
         "progress_prediction": progress_prediction,
-        "time_estimate": time_estimate
+        "time_estimate": time_estimate,
+        "seed": seed
     }
 
+@timed_stage()
 def add_recipes_and_portions_to_diet(
     diet_weekly: List[Dict], 
     macros_target: Dict, 
     goal: str
 ) -> List[Dict]:
     enhanced_diet = []
+    tables = get_meal_tables()
     
     for day in diet_weekly:
-        print(f"=== PROCESSING DAY {day['day']} ===")
         enhanced_day = day.copy()
         enhanced_day["portions"] = {}
         enhanced_day["recipes"] = {}
         enhanced_day["meal_details"] = {}
         
         for meal_type, meal_name in day["meals"].items():
-            print(f"Processing {meal_type}")
-            print(f"Meal name: '{meal_name}'")
-            print(f"Meal name type: {type(meal_name)}")
-            
-            print(f"Day keys: {list(day.keys())}")
-            
             ingredients = day.get("ingredients", {}).get(meal_type, [])
-            print(f"Ingredients: {ingredients}")
-            print(f"Ingredients type: {type(ingredients)}")
             
             # Validasi CRITICAL
             if not ingredients:
-                print(f"CRITICAL: No ingredients for {meal_type}")
+                logger.warning("No ingredients for %s (day %s, meal '%s')",
+                               meal_type, day['day'], meal_name)
                 ingredients = []
             elif not isinstance(ingredients, list):
-                print(f"CRITICAL: Ingredients is not a list: {type(ingredients)}")
+                logger.warning("Ingredients is not a list: %s", type(ingredients))
                 ingredients = []
             elif ingredients and isinstance(ingredients[0], str) and len(ingredients[0]) == 1:
-                print(f"CRITICAL: Ingredients are single characters!")
+                logger.warning("Ingredients are single characters for '%s'", meal_name)
                 ingredients = []
             
-            # DEBUG sebelum panggil estimate_portions
-            print(f"Calling estimate_portions with:")
-            print(f"- ingredients: {ingredients}")
-            print(f"- ingredients count: {len(ingredients)}")
-            print(f"- first ingredient: {ingredients[0] if ingredients else 'None'}")
+            # Meal standar diambil dari tabel precompute (object dipakai bersama, read-only)
+            entry = tables.lookup(meal_name, ingredients, goal)
+            if entry is not None:
+                enhanced_day["portions"][meal_type] = entry.portions
+                enhanced_day["recipes"][meal_type] = entry.recipes
+                enhanced_day["meal_details"][meal_type] = entry.meal_details
+                continue
             
             # Estimate portions
             portions = estimate_portions(
@@ -125,11 +161,9 @@ def add_recipes_and_portions_to_diet(
                 goal=goal
             )
             
-            print(f"estimate_portions returned:")
-            print(f"- portions: {portions}")
-            print(f"- portions count: {len(portions)}")
-            if portions:
-                print(f"      - first portion: {portions[0]}")
+            if __debug__:
+                logger.debug("Day %s %s '%s': %d ingredients -> %d portions",
+                             day['day'], meal_type, meal_name, len(ingredients), len(portions))
             
             # Rest of recipe generation...
             try:
@@ -144,48 +178,62 @@ def add_recipes_and_portions_to_diet(
                 enhanced_day["recipes"][meal_type] = food_recipes
                 enhanced_day["meal_details"][meal_type] = meal_recipe
                 
-            except Exception as e:
-                print(f"Error in recipe generation: {e}")
+            except Exception:
+                logger.exception("Error in recipe generation for '%s'", meal_name)
                 enhanced_day["portions"][meal_type] = portions
                 enhanced_day["recipes"][meal_type] = []
         
         enhanced_diet.append(enhanced_day)
-        print(f"=== FINISHED DAY {day['day']} ===\n")
     
     return enhanced_diet
 
-def generate_meal_plan_only(user: UserData) -> Dict:
+def generate_meal_plan_only(user: UserData, seed: Optional[int] = None) -> Dict:
+    """Meal plan saja; untuk seed yang sama hari-harinya sama dengan diet_plan di full plan"""
+    seed = plan_seed(user, seed)
+    return plan_cache.get_or_build(plan_cache.key("meal", user, seed),
+                                   lambda: _generate_meal_plan_only(user, seed))
+
+def _generate_meal_plan_only(user: UserData, seed: int) -> Dict:
     cal_data = calculate_calories(user)
     calories_target = cal_data["calories"]
     macros_target = cal_data["macros"]
     
-    diet_weekly = generate_diet(user, calories_target, macros_target)
+    diet_weekly = generate_diet(user, calories_target, macros_target, plan_rng(seed, "diet"))
     diet_with_recipes = add_recipes_and_portions_to_diet(
         diet_weekly, macros_target, user.goal
     )
     
     grocery_list = generate_grocery_list(diet_with_recipes)
+    diet_days, meal_refs = compact_diet_plan(diet_weekly, user.goal)
     
     return {
         "nutrition": {
             "calories_target": calories_target,
             "macros_target": macros_target
         },
-        "meal_plan": diet_with_recipes,
-        "grocery_list": grocery_list
+        "meal_plan": diet_days,
+        "meal_refs": meal_refs,
+        "grocery_list": grocery_list,
+        "seed": seed
     }
 
-def generate_workout_plan_only(user: UserData) -> Dict:
+def generate_workout_plan_only(user: UserData, seed: Optional[int] = None) -> Dict:
     """
     Generate only workout plan
     Useful for chatbot responses about exercise only
     """
-    workouts = generate_workouts(user)
+    seed = plan_seed(user, seed)
+    return plan_cache.get_or_build(plan_cache.key("workout", user, seed),
+                                   lambda: _generate_workout_plan_only(user, seed))
+
+def _generate_workout_plan_only(user: UserData, seed: int) -> Dict:
+    workouts = generate_workouts(user, plan_rng(seed, "workouts"))
     progress = predict_progress(user, weeks=4)  
     
     return {
         "workout_plan": workouts,
-        "progress_prediction": progress
+        "progress_prediction": progress,
+        "seed": seed
     }
 
 def get_recipe_for_meal(meal_name: str, portions: List[Dict]) -> Dict:
@@ -214,60 +262,17 @@ def handle_chat_query(user: UserData, query: str, context: Optional[Dict] = None
     Handle berbagai jenis pertanyaan dari user setelah plan digenerate
     """
     query_lower = query.lower()
-    
-    # Cek kategori pertanyaan
-    if any(word in query_lower for word in ['workout', 'exercise', 'train', 'gym', 'cardio', 'strength']):
-        return handle_workout_queries(user, query_lower, context)
-    
-    elif any(word in query_lower for word in ['diet', 'meal', 'food', 'eat', 'nutrition', 'calorie', 'protein']):
-        return handle_diet_queries(user, query_lower, context)
-    
-    elif any(word in query_lower for word in ['progress', 'result', 'weight', 'lose', 'gain', 'fat']):
-        return handle_progress_queries(user, query_lower, context)
-    
-    elif any(word in query_lower for word in ['health', 'healthy', 'wellness', 'lifestyle', 'tip']):
-        return handle_health_queries(user, query_lower, context)
-    
-    elif any(word in query_lower for word in ['recipe', 'cook', 'ingredient', 'prepare', 'make']):
-        return handle_recipe_queries(user, query_lower, context)
-    
-    elif any(word in query_lower for word in ['grocery', 'shop', 'buy', 'shopping', 'list']):
-        return handle_grocery_queries(user, query_lower, context)
-    
-    else:
-        return handle_general_queries(user, query_lower)
+    intent = CHAT_ROUTER.classify(query_lower)
+    return intent.handler(user, query_lower, context)
 
 # ==================== WORKOUT-RELATED QUERIES ====================
 
 def handle_workout_queries(user: UserData, query: str, context: Optional[Dict]) -> Dict:
     """Handle pertanyaan tentang workout"""
     
-    if 'today' in query or 'now' in query or 'day' in query:
-        return get_todays_workout(user, context)
-    
-    elif 'schedule' in query or 'week' in query or 'plan' in query:
-        return get_workout_schedule(user, context)
-    
-    elif 'intensity' in query or 'hard' in query or 'easy' in query:
-        return get_workout_intensity_advice(user)
-    
-    elif 'rest' in query or 'recover' in query:
-        return get_recovery_tips()
-    
-    elif any(word in query for word in ['push', 'pull', 'leg', 'split']):
-        return explain_workout_split()
-    
-    elif 'cardio' in query:
-        return get_cardio_advice(user)
-    
-    elif any(word in query for word in ['form', 'technique', 'proper', 'correct']):
-        return get_exercise_form_tips(query)
-    
-    elif 'alternative' in query or 'replace' in query or 'instead' in query:
-        return get_exercise_alternatives(query)
-    
-    elif 'duration' in query or 'long' in query or 'time' in query:
-        return get_workout_duration_advice(user)
+    intent = WORKOUT_ROUTER.classify(query)
+    if intent.handler is not None:
+        return intent.handler(user, query, context)
     
     else:
         return {
@@ -283,7 +288,7 @@ def handle_workout_queries(user: UserData, query: str, context: Optional[Dict])
             ]
         }
 
-def get_todays_workout(user: UserData, context: Optional[Dict]) -> Dict:
+def get_todays_workout(user: UserData, query: str, context: Optional[Dict]) -> Dict:
     """Get workout untuk hari ini berdasarkan konteks"""
     if context and 'current_day' in context:
         day_number = context['current_day']
@@ -292,8 +297,8 @@ def get_todays_workout(user: UserData, context: Optional[Dict]) -> Dict:
                 if day['day'] == day_number:
                     return format_workout_day_response(day)
     
-    # Fallback: generate simple workout untuk hari ini
-    workouts = generate_workouts(user)
+    # Fallback: plan yang tersimpan untuk user ini, generate hanya jika belum ada
+    workouts = get_stored_workouts(user)
     if workouts and len(workouts) > 0:
         today_workout = workouts[0]
     else:
@@ -306,9 +311,9 @@ def get_todays_workout(user: UserData, context: Optional[Dict]) -> Dict:
         "workout_day": today_workout
     }
 
-def get_workout_schedule(user: UserData, context: Optional[Dict]) -> Dict:
+def get_workout_schedule(user: UserData, query: str, context: Optional[Dict]) -> Dict:
     """Get seluruh workout schedule"""
-    workouts = generate_workouts(user)
+    workouts = get_stored_workouts(user)
     
     schedule_text = "Here's your weekly workout schedule:\n\n"
     for day in workouts:
@@ -330,6 +335,24 @@ def get_workout_schedule(user: UserData, context: Optional[Dict]) -> Dict:
         "full_schedule": workouts
     }
 
+def get_stored_workouts(user: UserData) -> List[Dict]:
+    """Workout plan dari plan store; generate dan simpan kalau belum ada"""
+    workouts = plan_store.get(user, "workout_plan")
+    if not workouts:
+        workouts = generate_workouts(user, plan_rng(plan_seed(user), "workouts"))
+        plan_store.save(user, workout_plan=workouts)
+    return workouts
+
+def get_stored_grocery_list(user: UserData) -> List[Dict]:
+    """Grocery list dari plan store; generate meal plan sekali kalau belum ada"""
+    grocery_list = plan_store.get(user, "grocery_list")
+    if not grocery_list:
+        meal_plan_data = generate_meal_plan_only(user)
+        grocery_list = meal_plan_data.get("grocery_list", [])
+        plan_store.save(user, diet_plan=meal_plan_data["meal_plan"], grocery_list=grocery_list)
+    return grocery_list
+
+@keyed_response(("goal", "active_level"))
 def get_general_workout_tips(user: UserData) -> str:
     """Get general workout tips berdasarkan goal user"""
     tips = {
@@ -596,26 +619,9 @@ def get_time_to_results(user: UserData) -> Dict:
 def handle_health_queries(user: UserData, query: str, context: Optional[Dict]) -> Dict:
     """Handle pertanyaan tentang kesehatan dan wellness"""
     
-    if any(word in query for word in ['sleep', 'rest', 'recover']):
-        return get_sleep_advice()
-    
-    elif any(word in query for word in ['stress', 'anxiety', 'mental']):
-        return get_stress_management_tips()
-    
-    elif any(word in query for word in ['energy', 'tired', 'fatigue']):
-        return get_energy_boost_tips(user)
-    
-    elif 'immune' in query or 'sick' in query or 'health' in query:
-        return get_immune_boost_tips()
-    
-    elif any(word in query for word in ['age', 'older', 'senior']):
-        return get_age_specific_advice(user)
-    
-    elif any(word in query for word in ['women', 'female', 'menstrual']):
-        return get_womens_health_tips()
-    
-    elif any(word in query for word in ['men', 'male', 'testosterone']):
-        return get_mens_health_tips()
+    intent = HEALTH_ROUTER.classify(query)
+    if intent.handler is not None:
+        return intent.handler(user, query, context)
     
     else:
         return {
@@ -716,7 +722,8 @@ def format_progress_prediction(progress: List[Dict]) -> str:
 
 def generate_full_plan_with_chat(user: UserData, weeks_progress: int = None) -> Dict:
     """Generate full plan dengan chat capabilities"""
-    full_plan = generate_full_plan(user, weeks_progress)
+    # Salinan dangkal: plan dari plan cache tidak boleh diubah in-place
+    full_plan = dict(generate_full_plan(user, weeks_progress))
     
     # Add chatbot context
     full_plan["chat_context"] = {
@@ -772,6 +779,7 @@ def process_chat_message(user: UserData, message: str, context: Optional[Dict] =
 
 # ==================== IMPLEMENTASI FUNGSI YANG BELUM LENGKAP ====================
 
+@keyed_response(("active_level", "goal"))
 def get_workout_intensity_advice(user: UserData) -> Dict:
     """Memberikan saran intensitas workout berdasarkan level user"""
     intensity_advice = {
@@ -816,6 +824,7 @@ def get_workout_intensity_advice(user: UserData) -> Dict:
         "advice": advice
     }
 
+@frozen_response
 def get_recovery_tips() -> Dict:
     """Memberikan tips recovery dan pemulihan"""
     tips = [
@@ -837,6 +846,7 @@ def get_recovery_tips() -> Dict:
         "tips": tips
     }
 
+@frozen_response
 def explain_workout_split() -> Dict:
     """Menjelaskan berbagai jenis workout split"""
     splits = {
@@ -882,6 +892,7 @@ def explain_workout_split() -> Dict:
         "splits": splits
     }
 
+@keyed_response(("goal",))
 def get_cardio_advice(user: UserData) -> Dict:
     """Memberikan saran cardio berdasarkan goal user"""
     
@@ -920,7 +931,7 @@ def get_cardio_advice(user: UserData) -> Dict:
         "recommendations": goal_cardio
     }
 
-def get_exercise_form_tips(query: str) -> Dict:
+def get_exercise_form_tips(user: UserData, query: str, context: Optional[Dict]) -> Dict:
     """Memberikan tips form untuk exercise tertentu"""
     
     # Extract exercise name from query
@@ -1000,7 +1011,7 @@ def get_exercise_form_tips(query: str) -> Dict:
         "tips": tips
     }
 
-def get_exercise_alternatives(query: str) -> Dict:
+def get_exercise_alternatives(user: UserData, query: str, context: Optional[Dict]) -> Dict:
     """Menyediakan alternatif exercise"""
     
     alternatives = {
@@ -1056,6 +1067,7 @@ def get_exercise_alternatives(query: str) -> Dict:
         "alternatives": alternatives[target_exercise]
     }
 
+@keyed_response(("active_level", "goal"))
 def get_workout_duration_advice(user: UserData) -> Dict:
     """Memberikan saran durasi workout optimal"""
     
@@ -1102,111 +1114,114 @@ def get_workout_duration_advice(user: UserData) -> Dict:
         "guidelines": guidelines
     }
 
+PROTEIN_INFO_TEMPLATE = ResponseTemplate(
+    "**Protein Requirements for Your Goals:**\n\n"
+    "• **Current Target:** {protein}g daily\n"
+    "• **Per kg body weight:** {per_kg:.1f}g/kg\n\n"
+    "**General Protein Guidelines:**\n"
+    "• Sedentary: 0.8g/kg\n"
+    "• Recreational athlete: 1.2-1.4g/kg\n"
+    "• Endurance athlete: 1.4-1.6g/kg\n"
+    "• Strength athlete: 1.6-2.2g/kg\n"
+    "• Muscle building: 1.6-2.2g/kg\n"
+    "• Fat loss: 2.2-2.6g/kg (preserve muscle)\n\n"
+    "**Timing & Distribution:**\n"
+    "• Spread over 3-5 meals (20-40g per meal)\n"
+    "• Post-workout: 20-40g within 2 hours\n"
+    "• Before bed: 20-40g casein protein\n\n"
+    "**High-Quality Protein Sources:**\n"
+    "{sources}"
+)
+
+PROTEIN_SOURCES = {
+    True: "• Tofu/Tempeh: 15-20g per 100g\n• Lentils: 9g per 100g cooked\n• Chickpeas: 9g per 100g cooked\n• Quinoa: 8g per cup\n• Seitan: 25g per 100g\n• Protein powder (pea, rice, hemp)\n",
+    False: "• Chicken breast: 31g per 100g\n• Salmon: 25g per 100g\n• Eggs: 6g per large egg\n• Greek yogurt: 10g per 100g\n• Cottage cheese: 11g per 100g\n• Lean beef: 26g per 100g\n",
+}
+
 def get_protein_info(user: UserData, cal_data: Dict) -> Dict:
     """Memberikan informasi detail tentang protein"""
     protein = cal_data['macros'].get('protein', cal_data['macros'].get('protein_g', 0))
-    weight_kg = user.weight_kg
-    
-    response = f"**Protein Requirements for Your Goals:**\n\n"
-    response += f"• **Current Target:** {protein}g daily\n"
-    response += f"• **Per kg body weight:** {protein/weight_kg:.1f}g/kg\n\n"
-    
-    response += "**General Protein Guidelines:**\n"
-    response += "• Sedentary: 0.8g/kg\n"
-    response += "• Recreational athlete: 1.2-1.4g/kg\n"
-    response += "• Endurance athlete: 1.4-1.6g/kg\n"
-    response += "• Strength athlete: 1.6-2.2g/kg\n"
-    response += "• Muscle building: 1.6-2.2g/kg\n"
-    response += "• Fat loss: 2.2-2.6g/kg (preserve muscle)\n\n"
-    
-    response += "**Timing & Distribution:**\n"
-    response += "• Spread over 3-5 meals (20-40g per meal)\n"
-    response += "• Post-workout: 20-40g within 2 hours\n"
-    response += "• Before bed: 20-40g casein protein\n\n"
-    
-    response += "**High-Quality Protein Sources:**\n"
-    if user.vegan:
-        response += "• Tofu/Tempeh: 15-20g per 100g\n• Lentils: 9g per 100g cooked\n• Chickpeas: 9g per 100g cooked\n• Quinoa: 8g per cup\n• Seitan: 25g per 100g\n• Protein powder (pea, rice, hemp)\n"
-    else:
-        response += "• Chicken breast: 31g per 100g\n• Salmon: 25g per 100g\n• Eggs: 6g per large egg\n• Greek yogurt: 10g per 100g\n• Cottage cheese: 11g per 100g\n• Lean beef: 26g per 100g\n"
+    per_kg = protein / user.weight_kg
     
     return {
         "type": "protein_info",
-        "response": response,
+        "response": PROTEIN_INFO_TEMPLATE.render(
+            protein=protein, per_kg=per_kg, sources=PROTEIN_SOURCES[bool(user.vegan)]
+        ),
         "daily_target": protein,
-        "per_kg": protein/weight_kg
+        "per_kg": per_kg
     }
 
+CARB_INFO_TEMPLATE = ResponseTemplate(
+    "**Carbohydrate Requirements for Your Goals:**\n\n"
+    "• **Current Target:** {carbs}g daily\n\n"
+    "**Carbohydrate Functions:**\n"
+    "• Primary energy source for exercise\n• Spares protein for muscle building\n• Fuels brain and nervous system\n• Supports recovery\n\n"
+    "**Timing Strategies:**\n"
+    "• **Pre-workout:** 20-40g complex carbs 1-2 hours before\n"
+    "• **Intra-workout:** 15-30g simple carbs during long sessions (>90 min)\n"
+    "• **Post-workout:** 30-60g simple + complex within 2 hours\n"
+    "• **Non-training days:** Reduce by 20-30%\n\n"
+    "**Quality Carbohydrate Sources:**\n"
+    "• **Complex:** Sweet potatoes, oats, brown rice, quinoa, whole grains\n"
+    "• **Fiber-rich:** Vegetables, fruits, legumes, whole grains\n"
+    "• **Simple (timed):** Bananas, dates, honey, white rice (post-workout)\n\n"
+    "**Activity Level Adjustments:**\n"
+    "For {active_level} activity: {multiplier}-{multiplier_max}g/kg body weight\n"
+)
+
+CARB_ACTIVITY_MULTIPLIERS = {
+    "sedentary": 2,
+    "light": 3,
+    "moderate": 4,
+    "active": 5,
+    "very_active": 6
+}
+
 def get_carb_info(user: UserData, cal_data: Dict) -> Dict:
     """Memberikan informasi detail tentang karbohidrat"""
     carbs = cal_data['macros'].get('carbs', cal_data['macros'].get('carbs_g', 0))
-    
-    response = f"**Carbohydrate Requirements for Your Goals:**\n\n"
-    response += f"• **Current Target:** {carbs}g daily\n\n"
-    
-    response += "**Carbohydrate Functions:**\n"
-    response += "• Primary energy source for exercise\n• Spares protein for muscle building\n• Fuels brain and nervous system\n• Supports recovery\n\n"
-    
-    response += "**Timing Strategies:**\n"
-    response += "• **Pre-workout:** 20-40g complex carbs 1-2 hours before\n"
-    response += "• **Intra-workout:** 15-30g simple carbs during long sessions (>90 min)\n"
-    response += "• **Post-workout:** 30-60g simple + complex within 2 hours\n"
-    response += "• **Non-training days:** Reduce by 20-30%\n\n"
-    
-    response += "**Quality Carbohydrate Sources:**\n"
-    response += "• **Complex:** Sweet potatoes, oats, brown rice, quinoa, whole grains\n"
-    response += "• **Fiber-rich:** Vegetables, fruits, legumes, whole grains\n"
-    response += "• **Simple (timed):** Bananas, dates, honey, white rice (post-workout)\n\n"
-    
-    response += "**Activity Level Adjustments:**\n"
-    activity_multipliers = {
-        "sedentary": 2,
-        "light": 3,
-        "moderate": 4,
-        "active": 5,
-        "very_active": 6
-    }
-    
-    multiplier = activity_multipliers.get(user.active_level, 4)
-    response += f"For {user.active_level} activity: {multiplier}-{multiplier+1}g/kg body weight\n"
+    multiplier = CARB_ACTIVITY_MULTIPLIERS.get(user.active_level, 4)
     
     return {
         "type": "carb_info",
-        "response": response,
+        "response": CARB_INFO_TEMPLATE.render(
+            carbs=carbs, active_level=user.active_level,
+            multiplier=multiplier, multiplier_max=multiplier + 1
+        ),
         "daily_target": carbs
     }
 
+FAT_INFO_TEMPLATE = ResponseTemplate(
+    "**Fat Requirements for Your Goals:**\n\n"
+    "• **Current Target:** {fat}g daily\n"
+    "• **Minimum for health:** 0.5-0.7g/kg body weight\n\n"
+    "**Fat Functions:**\n"
+    "• Hormone production (testosterone, estrogen)\n• Vitamin absorption (A, D, E, K)\n• Cell membrane structure\n• Brain health and cognitive function\n• Satiety and meal satisfaction\n\n"
+    "**Types of Dietary Fat:**\n"
+    "• **Monounsaturated (best):** Olive oil, avocados, nuts\n"
+    "• **Polyunsaturated (essential):** Fish oil, flaxseeds, walnuts\n"
+    "• **Saturated (moderate):** Coconut oil, butter, red meat\n"
+    "• **Trans (avoid):** Processed foods, fried foods\n\n"
+    "**Essential Fatty Acids:**\n"
+    "• Omega-3: Anti-inflammatory, brain health (fish, chia, flax)\n"
+    "• Omega-6: Pro-inflammatory in excess (vegetable oils, nuts)\n"
+    "• Target ratio: 1:1 to 1:4 (Omega-3:Omega-6)\n\n"
+    "**Practical Tips:**\n"
+    "• Include healthy fats with each meal\n• Cook with stable fats (olive oil, coconut oil)\n• Add nuts/seeds to meals\n• Eat fatty fish 2-3x per week\n• Limit processed vegetable oils"
+)
+
 def get_fat_info(user: UserData, cal_data: Dict) -> Dict:
     """Memberikan informasi detail tentang lemak"""
     fat = cal_data['macros'].get('fat', cal_data['macros'].get('fat_g', 0))
     
-    response = f"**Fat Requirements for Your Goals:**\n\n"
-    response += f"• **Current Target:** {fat}g daily\n"
-    response += f"• **Minimum for health:** 0.5-0.7g/kg body weight\n\n"
-    
-    response += "**Fat Functions:**\n"
-    response += "• Hormone production (testosterone, estrogen)\n• Vitamin absorption (A, D, E, K)\n• Cell membrane structure\n• Brain health and cognitive function\n• Satiety and meal satisfaction\n\n"
-    
-    response += "**Types of Dietary Fat:**\n"
-    response += "• **Monounsaturated (best):** Olive oil, avocados, nuts\n"
-    response += "• **Polyunsaturated (essential):** Fish oil, flaxseeds, walnuts\n"
-    response += "• **Saturated (moderate):** Coconut oil, butter, red meat\n"
-    response += "• **Trans (avoid):** Processed foods, fried foods\n\n"
-    
-    response += "**Essential Fatty Acids:**\n"
-    response += "• Omega-3: Anti-inflammatory, brain health (fish, chia, flax)\n"
-    response += "• Omega-6: Pro-inflammatory in excess (vegetable oils, nuts)\n"
-    response += "• Target ratio: 1:1 to 1:4 (Omega-3:Omega-6)\n\n"
-    
-    response += "**Practical Tips:**\n"
-    response += "• Include healthy fats with each meal\n• Cook with stable fats (olive oil, coconut oil)\n• Add nuts/seeds to meals\n• Eat fatty fish 2-3x per week\n• Limit processed vegetable oils"
-    
     return {
         "type": "fat_info",
-        "response": response,
+        "response": FAT_INFO_TEMPLATE.render(fat=fat),
         "daily_target": fat
     }
 
+@keyed_response(("goal",))
 def get_supplement_advice(user: UserData) -> Dict:
     """Memberikan saran supplement berdasarkan goal dan kebutuhan"""
     
@@ -1255,6 +1270,48 @@ def get_supplement_advice(user: UserData) -> Dict:
         "tiers": {"tier_1": tier_1, "tier_2": tier_2, "tier_3": tier_3}
     }
 
+HYDRATION_TEMPLATE = ResponseTemplate(
+    "**Hydration Guidelines for Your Profile:**\n\n"
+    "• **Body weight:** {weight_kg}kg → Baseline: {baseline_liters:.1f}L\n"
+    "• **Activity level:** {active_level} → Add: {extra_liters:.1f}L\n"
+    "• **Total Daily Target:** {total_liters:.1f}-{total_liters_max:.1f}L\n\n"
+    "**Timing Strategies:**\n"
+    "• Upon waking: 500ml water\n"
+    "• Pre-workout: 250-500ml 2-3 hours before\n"
+    "• During workout: 200-300ml every 15-20 minutes\n"
+    "• Post-workout: 500ml per pound lost during exercise\n"
+    "• With meals: 250ml per meal\n"
+    "• Before bed: 250ml\n\n"
+    "**Electrolyte Considerations:**\n"
+    "• Add electrolytes for sessions >60 minutes\n"
+    "• Key electrolytes: Sodium, potassium, magnesium\n"
+    "• Natural sources: Coconut water, banana, salty foods\n"
+    "• Consider electrolyte tabs for intense/hot workouts\n\n"
+    "**Hydration Indicators:**\n"
+    "• Urine color: Pale yellow (goal), clear (overhydrated), dark (dehydrated)\n"
+    "• Thirst: Drink before feeling thirsty\n"
+    "• Performance: Dehydration reduces strength by 2%, power by 3%\n"
+    "• Cognition: 1-2% dehydration impairs focus and mood\n\n"
+    "**Special Considerations:**\n"
+    "{goal_notes}"
+)
+
+HYDRATION_GOAL_NOTES = {
+    "fat_loss": "• Water before meals can reduce calorie intake\n"
+                "• Cold water increases calorie burn slightly\n",
+    "muscle_gain": "• Proper hydration supports protein synthesis\n"
+                   "• Muscle is 75% water - stay hydrated for fullness",
+}
+
+# Tambahan liter per hari berdasarkan activity level
+HYDRATION_ACTIVITY_ADJUSTMENT = {
+    "sedentary": 0,
+    "light": 0.5,
+    "moderate": 1.0,
+    "active": 1.5,
+    "very_active": 2.0
+}
+
 def get_hydration_advice(user: UserData) -> Dict:
     """Memberikan saran hidrasi"""
     weight_kg = user.weight_kg
@@ -1263,50 +1320,18 @@ def get_hydration_advice(user: UserData) -> Dict:
     baseline_ml = weight_kg * 30  # 30ml per kg
     baseline_liters = baseline_ml / 1000
     
-    # Adjust for activity
-    activity_adjustment = {
-        "sedentary": 0,
-        "light": 0.5,
-        "moderate": 1.0,
-        "active": 1.5,
-        "very_active": 2.0
-    }
-    
-    extra_liters = activity_adjustment.get(user.active_level, 1.0)
+    extra_liters = HYDRATION_ACTIVITY_ADJUSTMENT.get(user.active_level, 1.0)
     total_liters = baseline_liters + extra_liters
     
-    response = f"**Hydration Guidelines for Your Profile:**\n\n"
-    response += f"• **Body weight:** {weight_kg}kg → Baseline: {baseline_liters:.1f}L\n"
-    response += f"• **Activity level:** {user.active_level} → Add: {extra_liters:.1f}L\n"
-    response += f"• **Total Daily Target:** {total_liters:.1f}-{total_liters+0.5:.1f}L\n\n"
-    
-    response += "**Timing Strategies:**\n"
-    response += "• Upon waking: 500ml water\n"
-    response += "• Pre-workout: 250-500ml 2-3 hours before\n"
-    response += "• During workout: 200-300ml every 15-20 minutes\n"
-    response += "• Post-workout: 500ml per pound lost during exercise\n"
-    response += "• With meals: 250ml per meal\n"
-    response += "• Before bed: 250ml\n\n"
-    
-    response += "**Electrolyte Considerations:**\n"
-    response += "• Add electrolytes for sessions >60 minutes\n"
-    response += "• Key electrolytes: Sodium, potassium, magnesium\n"
-    response += "• Natural sources: Coconut water, banana, salty foods\n"
-    response += "• Consider electrolyte tabs for intense/hot workouts\n\n"
-    
-    response += "**Hydration Indicators:**\n"
-    response += "• Urine color: Pale yellow (goal), clear (overhydrated), dark (dehydrated)\n"
-    response += "• Thirst: Drink before feeling thirsty\n"
-    response += "• Performance: Dehydration reduces strength by 2%, power by 3%\n"
-    response += "• Cognition: 1-2% dehydration impairs focus and mood\n\n"
-    
-    response += "**Special Considerations:**\n"
-    if user.goal == "fat_loss":
-        response += "• Water before meals can reduce calorie intake\n"
-        response += "• Cold water increases calorie burn slightly\n"
-    elif user.goal == "muscle_gain":
-        response += "• Proper hydration supports protein synthesis\n"
-        response += "• Muscle is 75% water - stay hydrated for fullness"
+    response = HYDRATION_TEMPLATE.render(
+        weight_kg=weight_kg,
+        baseline_liters=baseline_liters,
+        active_level=user.active_level,
+        extra_liters=extra_liters,
+        total_liters=total_liters,
+        total_liters_max=total_liters + 0.5,
+        goal_notes=HYDRATION_GOAL_NOTES.get(user.goal, ""),
+    )
     
     return {
         "type": "hydration_advice",
@@ -1316,6 +1341,7 @@ def get_hydration_advice(user: UserData) -> Dict:
         "activity_adjustment": extra_liters
     }
 
+@keyed_response(("goal",))
 def get_cheat_meal_advice(user: UserData) -> Dict:
     """Memberikan saran tentang cheat meals dan flexibility diet"""
     
@@ -1363,6 +1389,7 @@ def get_cheat_meal_advice(user: UserData) -> Dict:
         "frequency": "1-2 per week" if user.goal == "fat_loss" else "2-3 per week"
     }
 
+@frozen_response
 def get_vegan_nutrition_tips() -> Dict:
     """Memberikan tips nutrisi khusus untuk vegan"""
     response = "**Complete Vegan Nutrition Guide:**\n\n"
@@ -1403,6 +1430,7 @@ def get_vegan_nutrition_tips() -> Dict:
         "key_nutrients": ["B12", "Iron", "Calcium", "Omega-3", "Vitamin D", "Zinc", "Iodine"]
     }
 
+@keyed_response()
 def get_meal_timing_advice(user: UserData) -> Dict:
     """Memberikan saran timing makan berdasarkan goal"""
     
@@ -1453,6 +1481,7 @@ def get_meal_timing_advice(user: UserData) -> Dict:
         "recommended_frequency": "3-5 meals daily"
     }
 
+@keyed_response(("goal",))
 def get_expected_results(user: UserData) -> Dict:
     """Memberikan ekspektasi hasil yang realistis"""
     
@@ -1524,6 +1553,7 @@ def get_expected_results(user: UserData) -> Dict:
         "timeframes": ["weekly", "monthly", "3_months"]
     }
 
+@keyed_response(("goal",))
 def get_progress_tracking_tips(user: UserData) -> Dict:
     """Memberikan tips melacak progress"""
     
@@ -1574,6 +1604,7 @@ def get_progress_tracking_tips(user: UserData) -> Dict:
         "metrics": ["weight", "measurements", "photos", "strength", "performance", "subjective"]
     }
 
+@keyed_response(("goal",))
 def handle_plateau_advice(user: UserData) -> Dict:
     """Memberikan saran untuk mengatasi plateau"""
     
@@ -1638,6 +1669,7 @@ def handle_plateau_advice(user: UserData) -> Dict:
         "strategies": ["nutrition_adjustment", "training_change", "recovery_focus", "deload"]
     }
 
+@keyed_response(("goal",))
 def get_motivation_tips(user: UserData) -> Dict:
     """Memberikan tips motivasi dan konsistensi"""
     
@@ -1693,6 +1725,7 @@ def get_motivation_tips(user: UserData) -> Dict:
         "strategies": ["mindset", "practical", "low_motivation", "habit_building"]
     }
 
+@frozen_response
 def get_sleep_advice() -> Dict:
     """Memberikan saran optimasi tidur"""
     
@@ -1747,6 +1780,7 @@ def get_sleep_advice() -> Dict:
         "key_points": ["7-9 hours", "consistency", "sleep hygiene", "pre-bed routine"]
     }
 
+@frozen_response
 def get_stress_management_tips() -> Dict:
     """Memberikan tips manajemen stress"""
     
@@ -1807,6 +1841,7 @@ def get_stress_management_tips() -> Dict:
         "techniques": ["physical", "mental", "lifestyle", "nutritional"]
     }
 
+@keyed_response(("goal",))
 def get_energy_boost_tips(user: UserData) -> Dict:
     """Memberikan tips meningkatkan energi"""
     
@@ -1863,6 +1898,7 @@ def get_energy_boost_tips(user: UserData) -> Dict:
         "strategies": ["nutrition", "lifestyle", "training_specific", "investigation"]
     }
 
+@frozen_response
 def get_immune_boost_tips() -> Dict:
     """Memberikan tips meningkatkan sistem imun"""
     
@@ -1917,6 +1953,7 @@ def get_immune_boost_tips() -> Dict:
         "key_nutrients": ["Vitamin C", "Vitamin D", "Zinc", "Probiotics", "Protein"]
     }
 
+@keyed_response()
 def get_age_specific_advice(user: UserData) -> Dict:
     """Memberikan saran berdasarkan usia"""
     
@@ -1977,6 +2014,7 @@ def get_age_specific_advice(user: UserData) -> Dict:
         "age_groups": {"teens_20s": "16-29", "30s_40s": "30-49", "50s_plus": "50+"}
     }
 
+@frozen_response
 def get_womens_health_tips() -> Dict:
     """Memberikan tips kesehatan khusus wanita"""
     
@@ -2030,6 +2068,7 @@ def get_womens_health_tips() -> Dict:
         "key_topics": ["menstrual_cycle", "nutrition", "strength_training", "life_stages"]
     }
 
+@frozen_response
 def get_mens_health_tips() -> Dict:
     """Memberikan tips kesehatan khusus pria"""
     
@@ -2090,6 +2129,7 @@ def get_mens_health_tips() -> Dict:
         "key_topics": ["hormone_health", "common_issues", "training", "nutrition", "life_stages"]
     }
 
+@keyed_response(("goal",))
 def get_general_health_tips(user: UserData) -> str:
     """Memberikan tips kesehatan umum"""
     
@@ -2150,6 +2190,7 @@ def format_workout_day_response(day: Dict) -> Dict:
         "workout_day": day
     }
 
+@profile_cached("plan_target_weight", ("target_weight", "weight_kg", "goal"))
 def calculate_target_weight(user: UserData) -> float:
     """Calculate reasonable target weight based on current weight and goal"""
     if user.target_weight:
@@ -2169,9 +2210,8 @@ def handle_grocery_queries(user: UserData, query: str, context: Optional[Dict])
     """Handle pertanyaan tentang grocery list"""
     
     if 'list' in query or 'grocery' in query:
-        # Generate meal plan to get grocery list
-        meal_plan_data = generate_meal_plan_only(user)
-        grocery_list = meal_plan_data.get("grocery_list", [])
+        # Ambil grocery list dari plan user (lookup, bukan generate ulang)
+        grocery_list = get_stored_grocery_list(user)
         
         response = "**Your Smart Grocery List:**\n\n"
         
@@ -2373,7 +2413,7 @@ def handle_recipe_queries(user: UserData, query: str, context: Optional[Dict]) -
             ]
         }
 
-def handle_general_queries(user: UserData, query: str) -> Dict:
+def handle_general_queries(user: UserData, query: str, context: Optional[Dict]) -> Dict:
     """Handle pertanyaan umum yang tidak masuk kategori spesifik"""
     
     greetings = ['hello', 'hi', 'hey', 'greetings']
@@ -2455,4 +2495,48 @@ def handle_general_queries(user: UserData, query: str) -> Dict:
                 "Nutrition tips",
                 "How to stay motivated"
             ]
-        }
\ No newline at end of file
+        }
+
+
+# ==================== INTENT ROUTING ====================
+
+# Router dikompilasi sekali saat import, setelah semua handler didefinisikan. Intent dengan
+# skor keyword tertinggi menang (seri: rule yang lebih awal) dan semua handler dipanggil
+# sebagai handler(user, query, context). Ketiga router berbagi satu KeywordIndex, jadi
+# pesan yang diteruskan ke sub-router workout/health tidak di-scan ulang.
+CHAT_KEYWORDS = KeywordIndex()
+
+CHAT_ROUTER = IntentRouter(
+    [
+        ("workout", ['workout', 'exercise', 'train', 'gym', 'cardio', 'strength'], handle_workout_queries),
+        ("diet", ['diet', 'meal', 'food', 'eat', 'nutrition', 'calorie', 'protein'], handle_diet_queries),
+        ("progress", ['progress', 'result', 'weight', 'lose', 'gain', 'fat'], handle_progress_queries),
+        ("health", ['health', 'healthy', 'wellness', 'lifestyle', 'tip'], handle_health_queries),
+        ("recipe", ['recipe', 'cook', 'ingredient', 'prepare', 'make'], handle_recipe_queries),
+        ("grocery", ['grocery', 'shop', 'buy', 'shopping', 'list'], handle_grocery_queries),
+    ],
+    default=("general", handle_general_queries),
+    index=CHAT_KEYWORDS,
+)
+
+WORKOUT_ROUTER = IntentRouter([
+    ("todays_workout", ['today', 'now', 'day'], get_todays_workout),
+    ("workout_schedule", ['schedule', 'week', 'plan'], get_workout_schedule),
+    ("workout_intensity", ['intensity', 'hard', 'easy'], get_workout_intensity_advice),
+    ("recovery_tips", ['rest', 'recover'], get_recovery_tips),
+    ("workout_split", ['push', 'pull', 'leg', 'split'], explain_workout_split),
+    ("cardio_advice", ['cardio'], get_cardio_advice),
+    ("exercise_form", ['form', 'technique', 'proper', 'correct'], get_exercise_form_tips),
+    ("exercise_alternatives", ['alternative', 'replace', 'instead'], get_exercise_alternatives),
+    ("workout_duration", ['duration', 'long', 'time'], get_workout_duration_advice),
+], index=CHAT_KEYWORDS)
+
+HEALTH_ROUTER = IntentRouter([
+    ("sleep_advice", ['sleep', 'rest', 'recover'], get_sleep_advice),
+    ("stress_management", ['stress', 'anxiety', 'mental'], get_stress_management_tips),
+    ("energy_boost", ['energy', 'tired', 'fatigue'], get_energy_boost_tips),
+    ("immune_support", ['immune', 'sick', 'health'], get_immune_boost_tips),
+    ("age_specific_advice", ['age', 'older', 'senior'], get_age_specific_advice),
+    ("womens_health", ['women', 'female', 'menstrual'], get_womens_health_tips),
+    ("mens_health", ['men', 'male', 'testosterone'], get_mens_health_tips),
+], index=CHAT_KEYWORDS)
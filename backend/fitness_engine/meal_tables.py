@@ -0,0 +1,145 @@
+import hashlib
+import json
+import logging
+import threading
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+from .catalog import catalog
+from .diet import meal_to_ingredients, vegan_meals, non_vegan_meals
+from .portions import GOAL_PORTION_MULTIPLIER, estimate_portions
+from .recipes import RECIPE_DB, generate_meal_recipe, generate_recipe
+from .serialization import RawJSON, encode_fragment
+
+logger = logging.getLogger(__name__)
+
+# Goal di luar GOAL_PORTION_MULTIPLIER diperlakukan seperti maintain (multiplier 1.0)
+DEFAULT_TABLE_GOAL = "maintain"
+
+
+class MealEntry(NamedTuple):
+    """Hasil portions + recipe untuk satu (meal, goal).
+
+    Object di dalamnya dipakai bersama oleh semua plan: jangan diubah in-place,
+    copy dulu kalau perlu memodifikasi (copy-on-write).
+    """
+    ingredients: Tuple[str, ...]
+    portions: List[Dict]
+    recipes: List[Dict]
+    meal_details: Dict
+
+
+class MealFragments(NamedTuple):
+    """MealEntry yang sudah di-encode ke JSON, disisipkan langsung oleh serialization.dumps"""
+    portions: RawJSON
+    recipes: RawJSON
+    meal_details: RawJSON
+
+
+def _all_meal_names() -> List[str]:
+    names = dict.fromkeys(meal_to_ingredients)
+    for meals_set in (vegan_meals, non_vegan_meals):
+        for meals in meals_set.values():
+            names.update(dict.fromkeys(meals))
+    return list(names)
+
+
+def _sources_signature() -> tuple:
+    """Penanda murah untuk mendeteksi katalog/tabel meal/multiplier diganti atau bertambah"""
+    return (catalog.version, id(meal_to_ingredients), len(meal_to_ingredients),
+            id(RECIPE_DB), len(RECIPE_DB),
+            id(vegan_meals), *map(len, vegan_meals.values()),
+            id(non_vegan_meals), *map(len, non_vegan_meals.values()),
+            id(GOAL_PORTION_MULTIPLIER), *GOAL_PORTION_MULTIPLIER.items())
+
+
+def _sources_version() -> str:
+    payload = json.dumps([
+        catalog.version,
+        meal_to_ingredients,
+        vegan_meals,
+        non_vegan_meals,
+        {name: recipe.get("ingredients", {}) for name, recipe in RECIPE_DB.items()},
+        sorted(GOAL_PORTION_MULTIPLIER.items()),
+    ], sort_keys=True)
+    return hashlib.blake2b(payload.encode(), digest_size=8).hexdigest()
+
+
+def table_goal(goal: str) -> str:
+    return goal if goal in GOAL_PORTION_MULTIPLIER else DEFAULT_TABLE_GOAL
+
+
+def build_meal_entry(meal_name: str, ingredients: List[str], goal: str) -> MealEntry:
+    portions = estimate_portions(ingredients=ingredients, macros_target={}, goal=goal)
+    meal_recipe = generate_meal_recipe(meal_name, portions)
+    food_recipes = [generate_recipe(p["food"], p["grams"]) for p in portions]
+    return MealEntry(tuple(ingredients), portions, food_recipes, meal_recipe)
+
+
+class MealTables:
+    """Tabel (meal, goal) -> MealEntry yang dihitung sekali di startup"""
+
+    def __init__(self):
+        self.signature = _sources_signature()
+        self.version = _sources_version()
+        # ID meal = posisi di meal_names (urutan meal_to_ingredients lalu daftar meal per set)
+        self.meal_names: Tuple[str, ...] = tuple(_all_meal_names())
+        self.meal_ids: Dict[str, int] = {name: i for i, name in enumerate(self.meal_names)}
+        self.entries: Dict[Tuple[str, str], MealEntry] = {
+            (meal_name, goal): build_meal_entry(meal_name, meal_to_ingredients.get(meal_name, []), goal)
+            for meal_name in self.meal_names
+            for goal in GOAL_PORTION_MULTIPLIER
+        }
+        self.fragments: Dict[Tuple[str, str], MealFragments] = {
+            key: MealFragments(encode_fragment(entry.portions), encode_fragment(entry.recipes),
+                               encode_fragment(entry.meal_details))
+            for key, entry in self.entries.items()
+        }
+
+    def __len__(self):
+        return len(self.entries)
+
+    def lookup(self, meal_name: str, ingredients: List[str], goal: str) -> Optional[MealEntry]:
+        """Entry yang sudah jadi, atau None kalau meal/ingredients tidak cocok dengan tabel"""
+        entry = self.entries.get((meal_name, table_goal(goal)))
+        if entry is None or tuple(ingredients) != entry.ingredients:
+            return None
+        return entry
+
+    def lookup_fragments(self, meal_name: str, ingredients: List[str], goal: str) -> Optional[MealFragments]:
+        """Seperti lookup, tapi mengembalikan versi JSON yang sudah di-encode"""
+        if self.lookup(meal_name, ingredients, goal) is None:
+            return None
+        return self.fragments[(meal_name, table_goal(goal))]
+
+
+_tables: Optional[MealTables] = None
+_tables_lock = threading.Lock()
+
+
+def get_meal_tables() -> MealTables:
+    """Tabel aktif; dibangun ulang otomatis kalau katalog/meal database berubah"""
+    global _tables
+    tables = _tables
+    if tables is not None and tables.signature == _sources_signature():
+        return tables
+    with _tables_lock:
+        if _tables is None or _tables.signature != _sources_signature():
+            _tables = MealTables()
+            logger.info("Meal tables built: %d entries (version %s)", len(_tables), _tables.version)
+        return _tables
+
+
+def rebuild_meal_tables() -> MealTables:
+    """Paksa rebuild, misalnya setelah RECIPE_DB/meal_to_ingredients diubah in-place"""
+    global _tables
+    with _tables_lock:
+        _tables = MealTables()
+        logger.info("Meal tables rebuilt: %d entries (version %s)", len(_tables), _tables.version)
+        return _tables
+
+
+def meal_tables_stats() -> Dict:
+    tables = _tables
+    if tables is None:
+        return {"built": False}
+    return {"built": True, "entries": len(tables), "version": tables.version}
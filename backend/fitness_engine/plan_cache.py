@@ -0,0 +1,69 @@
+import random
+from typing import Callable, Dict, Optional
+
+from .cache import LRUCache, profile_hash
+from .meal_tables import get_meal_tables
+
+PLAN_CACHE_SIZE = 1024
+
+_MISSING = object()
+
+
+def plan_seed(user, seed: Optional[int] = None, profile: Optional[str] = None) -> int:
+    """Seed plan: yang diminta client, atau diturunkan dari hash profil.
+
+    Dengan seed turunan, profil yang sama selalu mendapat plan yang sama
+    (bisa di-cache); client yang mau variasi lain cukup mengirim seed berbeda.
+    profile = profile_hash(user) kalau caller sudah menghitungnya.
+    """
+    if seed is not None:
+        return seed
+    return int((profile or profile_hash(user))[:15], 16)
+
+
+def plan_rng(seed: int, stream: str) -> random.Random:
+    """RNG terpisah per bagian plan ("workouts", "diet"), supaya workout tidak menggeser pilihan meal.
+
+    Seed berupa string di-hash dengan SHA-512 oleh random.Random, jadi hasilnya sama
+    di semua proses (tidak tergantung PYTHONHASHSEED).
+    """
+    return random.Random(f"{seed}:{stream}")
+
+
+class PlanCache:
+    """Cache plan yang sudah jadi, key = (jenis plan, hash profil, seed, parameter, versi data).
+
+    Versi data adalah versi tabel meal (sudah mencakup versi katalog bahan), jadi
+    mengganti katalog/resep otomatis membuat key baru. Plan yang dikembalikan dipakai
+    bersama oleh semua request: jangan diubah in-place (copy-on-write).
+    """
+
+    def __init__(self, maxsize: int = PLAN_CACHE_SIZE):
+        self.cache = LRUCache(maxsize=maxsize)
+
+    def key(self, kind: str, user, seed: int, *params) -> tuple:
+        return (kind, profile_hash(user), seed, params, get_meal_tables().version)
+
+    def get_or_build(self, key: tuple, build: Callable[[], Dict]) -> Dict:
+        plan = self.cache.get(key, _MISSING)
+        if plan is _MISSING:
+            plan = build()
+            self.cache.set(key, plan)
+        return plan
+
+    def clear(self):
+        self.cache.clear()
+
+    def stats(self) -> Dict:
+        return self.cache.stats()
+
+
+plan_cache = PlanCache()
+
+
+def clear_plan_cache():
+    plan_cache.clear()
+
+
+def plan_cache_stats() -> Dict:
+    return plan_cache.stats()
@@ -0,0 +1,182 @@
+import json
+import sqlite3
+import threading
+from typing import Dict, Iterable, Optional, Tuple
+
+from database import ProcessConnection
+
+from .cache import LRUCache, profile_hash
+from .meal_tables import get_meal_tables
+
+PLAN_STORE_SIZE = 2048
+PLAN_STORE_TTL = 24 * 3600  # detik
+
+# Hapus baris kedaluwarsa / versi lama dari tabel SQLite setiap N penulisan
+PLAN_STORE_PURGE_EVERY = 500
+
+# Key versi tabel meal di dalam record; record dari versi lain (katalog atau resep berubah) dibuang
+VERSION_KEY = "_version"
+# Key asal record (route + seed + versi, diisi caller); lihat has_source
+SOURCE_KEY = "_source"
+
+
+class PlanStore:
+    """Plan terakhir per user (key = hash profil), di memori dengan backing SQLite opsional.
+
+    Setiap record berisi bagian plan yang sudah pernah digenerate, misalnya
+    "workout_plan", "diet_plan" dan "grocery_list", supaya chat cukup lookup.
+    TTL berlaku juga untuk baris SQLite (dari updated_at), dan record yang dibuat
+    dengan versi tabel meal lain tidak dipakai lagi.
+    """
+
+    def __init__(self, maxsize: int = PLAN_STORE_SIZE, ttl: Optional[float] = PLAN_STORE_TTL,
+                 db_path: Optional[str] = None):
+        self.memory = LRUCache(maxsize=maxsize, ttl=ttl)
+        self.ttl = ttl
+        self._db_lock = threading.Lock()
+        self._writes = 0
+        self.db_path = None
+        self._db: Optional[ProcessConnection] = None
+        if db_path is not None:
+            self.attach_sqlite(db_path)
+
+    def attach_sqlite(self, db_path: str):
+        with self._db_lock:
+            self.db_path = db_path
+            self._db = ProcessConnection(db_path, self._create_table)
+            self._db.get()
+
+    @staticmethod
+    def _create_table(conn: sqlite3.Connection):
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS plan_store(
+                user_key TEXT PRIMARY KEY,
+                plan_json TEXT,
+                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        """)
+
+    def _connection(self) -> Optional[sqlite3.Connection]:
+        return self._db.get() if self._db is not None else None
+
+    def _db_get(self, key: str, version: str) -> Tuple[Optional[Dict], Optional[float]]:
+        """(record, sisa TTL dalam detik) dari SQLite; (None, None) kalau tidak ada/kedaluwarsa"""
+        if self.db_path is None:
+            return None, None
+        with self._db_lock:
+            row = self._connection().execute(
+                "SELECT plan_json, (julianday('now') - julianday(updated_at)) * 86400 "
+                "FROM plan_store WHERE user_key = ?", (key,)
+            ).fetchone()
+        if row is None:
+            return None, None
+        remaining = None if not self.ttl else self.ttl - row[1]
+        if remaining is not None and remaining <= 0:
+            return None, None
+        record = json.loads(row[0])
+        if record.get(VERSION_KEY) != version:
+            return None, None
+        return record, remaining
+
+    def _write_rows(self, conn: sqlite3.Connection, rows, version: str):
+        conn.executemany(
+            "INSERT OR REPLACE INTO plan_store(user_key, plan_json, updated_at) "
+            "VALUES (?, ?, CURRENT_TIMESTAMP)",
+            rows,
+        )
+        self._writes += 1
+        if self._writes % PLAN_STORE_PURGE_EVERY == 0:
+            self._purge(conn, version)
+        conn.commit()
+
+    def _purge(self, conn: sqlite3.Connection, version: str):
+        # Baris lama tidak pernah terbaca lagi, jadi dibuang supaya tabel tidak tumbuh terus
+        if self.ttl:
+            conn.execute(
+                "DELETE FROM plan_store WHERE updated_at <= datetime('now', ?) "
+                "OR json_extract(plan_json, '$.' || ?) IS NOT ?",
+                (f"-{int(self.ttl)} seconds", VERSION_KEY, version),
+            )
+        else:
+            conn.execute("DELETE FROM plan_store WHERE json_extract(plan_json, '$.' || ?) IS NOT ?",
+                         (VERSION_KEY, version))
+
+    def _db_put(self, key: str, record: Dict, version: str):
+        if self.db_path is None:
+            return
+        with self._db_lock:
+            self._write_rows(self._connection(), [(key, json.dumps(record))], version)
+
+    def load(self, user) -> Dict:
+        key = profile_hash(user)
+        version = get_meal_tables().version
+        record = self.memory.get(key)
+        if record is not None and record.get(VERSION_KEY) != version:
+            self.memory.delete(key)
+            record = None
+        if record is None:
+            record, remaining = self._db_get(key, version)
+            if record is not None:
+                # Umur dihitung dari updated_at, bukan dari saat dibaca ulang
+                self.memory.set(key, record, ttl=remaining)
+        return record or {}
+
+    def get(self, user, part: str):
+        return self.load(user).get(part)
+
+    def has_source(self, user_key: str, source: str) -> bool:
+        """True kalau record user_key (= profile_hash(user)) di memori worker ini terakhir
+        disimpan dari source tersebut.
+
+        Tanpa I/O: dipakai saat response plan diambil dari response cache (build tidak
+        jalan) untuk memutuskan apakah plan perlu disimpan ulang di worker ini.
+        """
+        record = self.memory.get(user_key)
+        return record is not None and record.get(SOURCE_KEY) == source
+
+    def save(self, user, source: Optional[str] = None, **parts) -> Dict:
+        """Gabungkan bagian plan baru ke record user (bagian lain tetap dipakai)"""
+        key = profile_hash(user)
+        record = self._merge(user, parts)
+        if source is not None:
+            record[SOURCE_KEY] = source
+        self.memory.set(key, record)
+        self._db_put(key, record, record[VERSION_KEY])
+        return record
+
+    def _merge(self, user, parts: Dict) -> Dict:
+        record = dict(self.load(user))
+        record.update({k: v for k, v in parts.items() if v is not None})
+        record[VERSION_KEY] = get_meal_tables().version
+        return record
+
+    def save_many(self, entries: Iterable[Tuple[object, Dict]]) -> int:
+        """save() untuk banyak user sekaligus; tulis ke SQLite dalam satu transaksi"""
+        rows = []
+        for user, parts in entries:
+            key = profile_hash(user)
+            record = self._merge(user, parts)
+            self.memory.set(key, record)
+            rows.append((key, json.dumps(record)))
+
+        if self.db_path is not None and rows:
+            with self._db_lock:
+                self._write_rows(self._connection(), rows, get_meal_tables().version)
+        return len(rows)
+
+    def forget(self, user):
+        key = profile_hash(user)
+        self.memory.delete(key)
+        if self.db_path is not None:
+            with self._db_lock:
+                conn = self._connection()
+                conn.execute("DELETE FROM plan_store WHERE user_key = ?", (key,))
+                conn.commit()
+
+    def stats(self) -> Dict:
+        stats = self.memory.stats()
+        stats["sqlite_backing"] = self.db_path is not None
+        return stats
+
+
+plan_store = PlanStore()
@@ -182,9 +182,19 @@
 
 from typing import List, Dict
 
+from .catalog import catalog, DEFAULT_PORTION_G
+
+# Adjust based on goal
+GOAL_PORTION_MULTIPLIER = {
+    "muscle_gain": 1.2,
+    "fat_loss": 0.8,
+    "maintain": 1.0
+}
+
 def estimate_portions(ingredients: List[str], macros_target: Dict, goal: str = "maintain") -> List[Dict]:
     """
     ENHANCED SIMPLE VERSION - Dengan adjustment berdasarkan goal
+    Porsi dasar diambil dari katalog bahan (fitness_engine.catalog)
     """
     if not ingredients or not isinstance(ingredients, list):
         return []
@@ -198,47 +208,26 @@ def estimate_portions(ingredients: List[str], macros_target: Dict, goal: str = "
     if not valid_ingredients:
         return []
     
-    # Base portion sizes
-    portion_sizes = {
-        # Proteins
-        "chicken_breast": 150, "egg": 100, "tofu": 150, "tempeh": 150, 
-        "tuna": 150, "chickpea": 120, "lentil": 120,
-        # Carbs
-        "rice": 150, "oats": 50, "pasta": 100, "bread": 50,
-        # Vegetables
-        "vegetable_mix": 100, "vegetable mix": 100, "spinach": 50, "broccoli": 80,
-        # Dairy & Alternatives
-        "soy_milk": 200, "yogurt": 100, "milk": 200,
-        # Seasonings
-        "sugar": 5, "salt": 2, "pepper": 1, "cooking_oil": 10, 
-        "olive_oil": 10, "soy_sauce": 10, "sweet_soy_sauce": 10,
-        "chili_sauce": 10, "curry_powder": 5, "coconut_milk": 100,
-        "butter": 5, "margarine": 5, "peanut_butter": 20,
-        # Aromatics
-        "onion": 20, "garlic": 10
-    }
-    
-    # Adjust based on goal
-    goal_multiplier = {
-        "muscle_gain": 1.2,
-        "fat_loss": 0.8, 
-        "maintain": 1.0
-    }.get(goal, 1.0)
+    goal_multiplier = GOAL_PORTION_MULTIPLIER.get(goal, 1.0)
+    portions, scaled = catalog.portions, catalog.scaled
     
     result = []
     for ingredient in valid_ingredients:
-        lookup_key = ingredient.replace(" ", "_")
-        base_grams = portion_sizes.get(lookup_key, portion_sizes.get(ingredient, 100))
+        ingredient_id = catalog.lookup(ingredient.replace(" ", "_"))
+        if ingredient_id is None:
+            ingredient_id = catalog.lookup(ingredient)
         
         # Apply goal adjustment (except for seasonings)
-        if ingredient not in ["salt", "pepper", "sugar", "cooking_oil", "olive_oil"]:
-            adjusted_grams = base_grams * goal_multiplier
+        if ingredient_id is None:
+            adjusted_grams = DEFAULT_PORTION_G * goal_multiplier
+        elif scaled[ingredient_id]:
+            adjusted_grams = portions[ingredient_id] * goal_multiplier
         else:
-            adjusted_grams = base_grams
+            adjusted_grams = portions[ingredient_id]
             
         result.append({
             "food": ingredient,
             "grams": round(adjusted_grams)
         })
     
-    return result
\ No newline at end of file
+    return result
@@ -0,0 +1,67 @@
+import functools
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Callable, Dict, Optional, Tuple
+
+# Collector aktif untuk pemanggilan saat ini: nama stage -> total detik.
+# None (default) = tidak ada yang mengukur; stage timer hanya membaca ContextVar lalu lanjut.
+_stages: ContextVar[Optional[Dict[str, float]]] = ContextVar("fitness_stages", default=None)
+
+
+@contextmanager
+def stage(name: str):
+    """Ukur satu blok sebagai stage `name` (dijumlahkan kalau terpanggil berkali-kali)"""
+    stages = _stages.get()
+    if stages is None:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        stages[name] = stages.get(name, 0.0) + time.perf_counter() - start
+
+
+def timed_stage(name: Optional[str] = None):
+    """Decorator stage timer untuk fungsi fitness_engine.
+
+    Tanpa collector aktif overhead-nya satu ContextVar.get per panggilan.
+    Stage bisa bersarang (misalnya predict_progress di dalam generate_full_plan);
+    waktunya tercatat di masing-masing stage.
+    """
+    def decorator(fn):
+        stage_name = name or fn.__name__
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            stages = _stages.get()
+            if stages is None:
+                return fn(*args, **kwargs)
+            start = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                stages[stage_name] = stages.get(stage_name, 0.0) + time.perf_counter() - start
+
+        return wrapper
+
+    return decorator
+
+
+def run_profiled(fn: Callable, *args, **kwargs) -> Tuple[object, Dict[str, float]]:
+    """Jalankan fn dengan collector aktif; return (hasil, {stage: detik}).
+
+    Fungsi level modul supaya bisa dikirim lewat run_engine (thread maupun process):
+    collector hidup di worker yang menjalankan fn, waktunya ikut dikembalikan.
+    Durasi total fn dicatat dengan nama fungsinya.
+    """
+    stages: Dict[str, float] = {}
+    token = _stages.set(stages)
+    start = time.perf_counter()
+    try:
+        result = fn(*args, **kwargs)
+    finally:
+        _stages.reset(token)
+    stages[fn.__name__] = time.perf_counter() - start
+    return result, stages
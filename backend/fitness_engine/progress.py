@@ -1,10 +1,22 @@
 import numpy as np
 from models.user_model import UserData
 from typing import List, Dict
+from .cache import profile_cached
+from .rounding import round_half_even
+from .profiling import timed_stage
 
-def predict_progress(user: UserData, weeks: int = 12) -> List[Dict]:
+WEEKLY_CHANGE_ACTIVITY_MULTIPLIERS = {
+    "low": 0.7,
+    "moderate": 1.0,
+    "high": 1.3
+}
+
+@timed_stage()
+def predict_progress(user: UserData, weeks: int = 12, columnar: bool = False):
     """
-    Predict weight progress based on current weight, target weight, and user profile
+    Predict weight progress based on current weight, target weight, and user profile.
+    columnar=True mengembalikan kolom (list per field) untuk client chart,
+    bukan list dict per minggu.
     """
     current_weight = user.weight_kg
     target_weight = user.target_weight if user.target_weight else calculate_target_weight(user)
@@ -12,37 +24,82 @@ def predict_progress(user: UserData, weeks: int = 12) -> List[Dict]:
     # Calculate realistic weekly weight change based on goal and activity level
     weekly_change = calculate_weekly_weight_change(user, current_weight, target_weight)
     
-    progress = []
-    
-    for week in range(weeks + 1):
-        predicted_weight = current_weight + (weekly_change * week)
-        
-        # Stop when target weight is reached
-        if (weekly_change > 0 and predicted_weight >= target_weight) or \
-           (weekly_change < 0 and predicted_weight <= target_weight):
-            predicted_weight = target_weight
-        
-        progress.append({
-            "week": week,
-            "predicted_weight": round(predicted_weight, 1),
-            "weight_change": round(predicted_weight - current_weight, 1),
-            "weekly_goal": round(weekly_change, 1)
-        })
-        
-        # Stop adding weeks if target reached
-        if predicted_weight == target_weight and week < weeks:
-            # Fill remaining weeks with target weight
-            for remaining_week in range(week + 1, weeks + 1):
-                progress.append({
-                    "week": remaining_week,
-                    "predicted_weight": target_weight,
-                    "weight_change": round(target_weight - current_weight, 1),
-                    "weekly_goal": 0
-                })
-            break
-    
-    return progress
+    trajectory = progress_trajectory(current_weight, target_weight, weekly_change, weeks)
+    if columnar:
+        return trajectory_columns(trajectory, weeks=weeks)
+    return trajectory_rows(trajectory, weeks=weeks)
+
+def progress_trajectory(current, target, weekly, weeks: int) -> Dict[str, np.ndarray]:
+    """
+    Kurva progress closed-form: berat = current + weekly * minggu, di-clip ke target.
+    current/target/weekly boleh skalar atau array (satu elemen per user); hasilnya
+    array 2D (user x minggu) dengan pembulatan yang sama seperti versi loop.
+    Setelah target tercapai, minggu berikutnya berisi target dan weekly_goal 0.
+    """
+    # Kolom (n, 1) supaya broadcast dengan minggu (1, weeks + 1)
+    current = np.asarray(current, dtype=float).reshape(-1, 1)
+    target = np.asarray(target, dtype=float).reshape(-1, 1)
+    weekly = np.asarray(weekly, dtype=float).reshape(-1, 1)
+    week = np.arange(max(int(weeks), 0) + 1)
+    
+    predicted = current + weekly * week
+    predicted = np.where(weekly > 0, np.minimum(predicted, target),
+                         np.where(weekly < 0, np.maximum(predicted, target), predicted))
+    
+    reached = predicted == target
+    reached_week = np.where(reached.any(axis=1), reached.argmax(axis=1), len(week))
+    after = week > reached_week[:, None]
+    
+    # Setelah target tercapai predicted sudah di-clip ke target, jadi weight_change
+    # otomatis sama dengan perubahan total; hanya predicted_weight & weekly_goal yang diganti.
+    # predicted dan weight_change dibulatkan dalam satu panggilan
+    rounded = round_half_even(np.stack((predicted, predicted - current)), 1)
+    return {
+        "week": week,
+        "predicted_weight": np.where(after, target, rounded[0]),
+        "weight_change": rounded[1],
+        "weekly_goal": np.where(after, 0.0, round_half_even(weekly, 1)),
+        "reached_week": reached_week,
+        "at_target": (current == target)[:, 0],
+        "target_weight": target[:, 0],
+    }
+
+def trajectory_rows(trajectory: Dict[str, np.ndarray], index: int = 0, weeks: int = None) -> List[Dict]:
+    """Ubah satu baris trajectory menjadi list dict per minggu (format response lama)"""
+    if weeks is None:
+        weeks = len(trajectory["week"]) - 1
+    count = max(weeks + 1, 0)
+    predicted = trajectory["predicted_weight"][index, :count].tolist()
+    change = trajectory["weight_change"][index, :count].tolist()
+    
+    # weekly_goal: 0 (int) untuk minggu setelah target tercapai, dan untuk semua minggu
+    # kalau user sudah di target (calculate_weekly_weight_change mengembalikan int 0)
+    moving_weeks = min(int(trajectory["reached_week"][index]) + 1, count)
+    goal = 0 if trajectory["at_target"][index] else trajectory["weekly_goal"][index, 0].item()
+    goals = [goal] * moving_weeks + [0] * (count - moving_weeks)
+    
+    return [
+        {"week": week, "predicted_weight": p, "weight_change": c, "weekly_goal": g}
+        for week, p, c, g in zip(range(count), predicted, change, goals)
+    ]
+
+def trajectory_columns(trajectory: Dict[str, np.ndarray], index: int = 0, weeks: int = None) -> Dict:
+    """Satu baris trajectory dalam format kolom (siap dipakai chart)"""
+    if weeks is None:
+        weeks = len(trajectory["week"]) - 1
+    count = max(weeks + 1, 0)
+    reached_week = int(trajectory["reached_week"][index])
+    
+    return {
+        "week": trajectory["week"][:count].tolist(),
+        "predicted_weight": trajectory["predicted_weight"][index, :count].tolist(),
+        "weight_change": trajectory["weight_change"][index, :count].tolist(),
+        "weekly_goal": trajectory["weekly_goal"][index, :count].tolist(),
+        "target_weight": trajectory["target_weight"][index].item(),
+        "reached_week": reached_week if reached_week < count else None
+    }
 
+@profile_cached("target_weight", ("height_cm", "weight_kg", "goal"))
 def calculate_target_weight(user: UserData) -> float:
     """
     Calculate realistic target weight based on BMI if not provided
@@ -80,11 +137,7 @@ def calculate_weekly_weight_change(user: UserData, current_weight: float, target
         base_rate = 0
     
     # Adjust based on activity level
-    activity_multiplier = {
-        "low": 0.7,
-        "moderate": 1.0,
-        "high": 1.3
-    }.get(user.active_level, 1.0)
+    activity_multiplier = WEEKLY_CHANGE_ACTIVITY_MULTIPLIERS.get(user.active_level, 1.0)
     
     # Adjust based on current weight (heavier people can lose/gain faster initially)
     weight_factor = 1.0
@@ -107,6 +160,7 @@ def calculate_weekly_weight_change(user: UserData, current_weight: float, target
     
     return weekly_change
 
+@profile_cached("time_to_target", ("height_cm", "weight_kg", "target_weight", "goal", "active_level"))
 def calculate_time_to_target(user: UserData) -> Dict:
     """
     Calculate estimated time to reach target weight
@@ -1,68 +1,6 @@
-from typing import List, Dict
-import math
+from typing import List, Dict, Hashable, Tuple
 
-# ----- dasar cost per 100g (dipakai untuk estimasi cost) -----
-COST_PER_100G = {
-    # Karbo
-    "rice": 1500,           
-    "oats": 3000,           
-    "pasta": 3000,         
-    "bread": 2000,         
-
-    # Protein
-    "tofu": 2500,            
-    "tempeh": 3000,          
-    "chicken_breast": 6000,  
-    "egg": 2500,            
-    "tuna": 8500,  
-    "soy_milk": 2000,  
-    "chickpea": 7000,       
-    "lentil": 6000,   
-    
-    # Buah / Sayur
-    "banana": 2000,         
-    "vegetable mix": 2000,     
-    "tomato": 3000,              
-    "garlic": 3000,        
-    "chilies": 5000,
-    "carrot": 2500,      
-    "broccoli": 8000,
-    "spinach": 4000,     
-
-    # Bumbu
-    "salt": 500,          
-    "sugar": 1200,           
-    "pepper": 8000,           
-    "soy_sauce": 8000,        
-    "sweet_soy_sauce": 7000, 
-    "chili_sauce": 6000,     
-    "tomato_sauce": 6000,  
-    "oyster_sauce": 15000,    
-    "cooking_oil": 12000,     
-    "olive_oil": 26000,     
-    "butter": 18000,
-    "margarine": 10000,
-    "garlic": 4000,           
-    "onion": 3000,            
-    "shallot": 3000,           
-    "ginger": 3000,         
-    "lemongrass": 2000,       
-    "lime": 3000,       
-    
-    # Tambahan
-    "peanut_butter": 15000,
-    "yogurt": 8000,
-    "milk": 7000, 
-    "curry_powder": 10000,
-    "coconut_milk": 5000,          
-}
-
-# ----- alias ingredient supaya konsisten -----
-INGREDIENT_ALIAS = {
-    "vegetables": "vegetable mix",
-    "milk": "soy_milk",
-    "coconut_milk": "coconut_milk",  # tetap sama
-}
+from .catalog import catalog, DEFAULT_COOKING_STEPS, DEFAULT_COST_PER_100G
 
 # ----- default recipe fallback -----
 DEFAULT_RECIPE = {
@@ -447,14 +385,25 @@ RECIPE_DB = {
 
 RECIPE_DB["default"] = DEFAULT_RECIPE
 
+def _ingredient_key(food: str) -> Hashable:
+    """ID katalog untuk bahan; nama mentah kalau bahan tidak ada di katalog"""
+    ingredient_id = catalog.lookup(food)
+    return food if ingredient_id is None else ingredient_id
+
+# Bahan tiap template sudah di-resolve sekali: (nama, gram dasar, key katalog, harga per 100g)
+RECIPE_INGREDIENTS: Dict[str, Tuple[tuple, ...]] = {
+    meal: tuple((ing, base_g, _ingredient_key(ing), catalog.cost(ing))
+                for ing, base_g in recipe.get("ingredients", {}).items())
+    for meal, recipe in RECIPE_DB.items()
+}
+
 def get_cost_per_100g(item: str) -> int:
-    item = INGREDIENT_ALIAS.get(item, item)
-    return COST_PER_100G.get(item, 3000)
+    return catalog.cost(item)
 
 # ----- fungsi utama: generate_meal_recipe -----
 def generate_meal_recipe(meal_name: str, portions: List[Dict]) -> Dict:
     template = RECIPE_DB.get(meal_name, DEFAULT_RECIPE)
-    base_ings = template.get("ingredients", {})
+    base_ings = RECIPE_INGREDIENTS.get(meal_name, ())
     steps = template.get("steps", [])
     notes = template.get("notes", "")
     
@@ -464,34 +413,32 @@ def generate_meal_recipe(meal_name: str, portions: List[Dict]) -> Dict:
                     raise ValueError("Invalid portion structure")
 
     # Buat map dari portions untuk akses cepat
-    portion_map = {INGREDIENT_ALIAS.get(p["food"], p["food"]): p["grams"] for p in portions}
+    portion_map = {_ingredient_key(p["food"]): p["grams"] for p in portions}
+    avg = sum(portion_map.values()) / len(portion_map) if portion_map else None
 
     # Kita akan skala setiap ingredient template berdasarkan porsi yang ada.
     ingredients_scaled = {}
     total_cost = 0.0
     cost_breakdown = []
 
-    for ing, base_g in base_ings.items():
-        ing_key = INGREDIENT_ALIAS.get(ing, ing)
+    for ing, base_g, ing_key, cost_per_100g in base_ings:
         target_g = portion_map.get(ing_key)
         
         if target_g is not None:
             scaled_g = target_g
+        elif avg is not None:
+            scaled_g = round(base_g * (avg / 100))
         else:
-            if portion_map:
-                avg = sum(portion_map.values()) / len(portion_map)
-                scaled_g = round(base_g * (avg / 100))
-            else:
-                scaled_g = base_g
+            scaled_g = base_g
 
         ingredients_scaled[ing] = int(scaled_g)
-        ingredient_cost = (scaled_g / 100.0) * get_cost_per_100g(ing)
+        ingredient_cost = (scaled_g / 100.0) * cost_per_100g
         total_cost += ingredient_cost
         
         cost_breakdown.append({
             "ingredient": ing,
             "grams": int(scaled_g),
-            "cost_per_100g": get_cost_per_100g(ing),
+            "cost_per_100g": cost_per_100g,
             "ingredient_cost": round(ingredient_cost)
         })
 
@@ -506,44 +453,21 @@ def generate_meal_recipe(meal_name: str, portions: List[Dict]) -> Dict:
     }
 
 def generate_recipe(food: str, grams: int) -> Dict:
-    food_key = INGREDIENT_ALIAS.get(food, food)
-    
-    steps_map = {
-        "rice": ["Cuci beras, masak dengan rice cooker atau panci sampai matang."],
-        "chicken_breast": ["Bumbui ayam, panggang/pan-fry 7-10 menit tiap sisi."],
-        "tuna": ["Bumbui tuna, panggang/pan-fry 5-7 menit tiap sisi."],
-        "egg": ["Rebus atau orak-arik sesuai selera."],
-        "tofu": ["Potong tofu, goreng atau tumis dengan bumbu sederhana."],
-        "tempeh": ["Potong tempe, goreng atau tumis dengan kecap/tumis."],
-        "oats": ["Masak oats dengan air atau susu selama 3-5 menit."],
-        "vegetable mix": ["Cuci dan tumis/rebus sayuran sampai matang."],
-        "pasta": ["Rebus pasta 7-10 menit hingga al dente."],
-        "soy_milk": ["Susu nabati bisa diminum langsung atau dicampur oats/smoothie."],
-        "coconut_milk": ["Gunakan untuk kuah/curry, masak sebentar."],
-        "peanut_butter": ["Oleskan pada roti atau campur dengan smoothie."],
-        "yogurt": ["Bisa dimakan langsung atau dicampur dengan buah dan granola."],
-        "milk": ["Bisa diminum langsung atau digunakan untuk masak/membuat smoothie."],
-        "bread": ["Panggang atau makan langsung."],
-        "banana": ["Kupas dan makan langsung, atau potong untuk campuran."],
-        "sugar": ["Gunakan sebagai pemanis secukupnya."],
-        "salt": ["Gunakan sebagai penambah rasa secukupnya."],
-        "pepper": ["Taburkan sebagai penambah rasa."],
-        "cooking_oil": ["Gunakan untuk menumis atau menggoreng."],
-        "soy_sauce": ["Gunakan sebagai penyedap rasa."],
-        "sweet_soy_sauce": ["Gunakan untuk memberi rasa manis dan warna."],
-        "chili_sauce": ["Gunakan untuk rasa pedas."],
-        "curry_powder": ["Tumis dengan bawang sebagai dasar kari."],
-    }
-
-    steps = steps_map.get(food_key, ["Masak sesuai preferensi (tumis/rebus/panggang)."])
-    est_cost = int(round((grams / 100.0) * get_cost_per_100g(food_key)))
+    ingredient_id = catalog.lookup(food)
+    if ingredient_id is None:
+        steps = list(DEFAULT_COOKING_STEPS)
+        cost_per_100g = DEFAULT_COST_PER_100G
+    else:
+        steps = list(catalog.cooking_steps[ingredient_id] or DEFAULT_COOKING_STEPS)
+        cost_per_100g = catalog.costs[ingredient_id]
+    est_cost = int(round((grams / 100.0) * cost_per_100g))
 
     return {
         "food": food,
         "grams": int(grams),
         "cooking_method": steps,
         "estimated_cost": est_cost,
-        "cost_per_100g": get_cost_per_100g(food_key)
+        "cost_per_100g": cost_per_100g
     }
     
 def get_total_cost(meal_name: str, portions: List[Dict] = []) -> int:
@@ -0,0 +1,23 @@
+import numpy as np
+
+
+def round_half_even(values: np.ndarray, ndigits: int = 0) -> np.ndarray:
+    """np.round yang hasilnya sama persis dengan round() bawaan Python.
+
+    np.round mengalikan dengan 10**ndigits dulu, sehingga nilai yang tepat di
+    sekitar .5 (mis. 0.35) bisa dibulatkan ke arah berbeda; hanya elemen itu
+    yang dihitung ulang dengan round() Python.
+    """
+    if ndigits == 0:
+        return np.rint(values)
+
+    # Sama dengan implementasi np.round: kali 10**ndigits, rint, lalu bagi
+    factor = 10.0 ** ndigits
+    scaled = values * factor
+    rounded = np.rint(scaled) / factor
+
+    suspect = np.abs(scaled - np.floor(scaled) - 0.5) < 1e-6
+    if suspect.any():
+        index = np.flatnonzero(suspect)
+        rounded.flat[index] = [round(v, ndigits) for v in values.flat[index].tolist()]
+    return rounded
@@ -0,0 +1,146 @@
+import re
+from typing import Callable, Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+# Batas jumlah token di memo; memo dikosongkan kalau penuh
+TOKEN_MEMO_SIZE = 50_000
+
+# Skor per intent dikemas dalam satu int, SCORE_BITS bit per intent, jadi skor seluruh pesan
+# = sum() skor per token. 32 bit cukup untuk jumlah keyword di pesan sepanjang apa pun.
+SCORE_BITS = 32
+SCORE_MASK = (1 << SCORE_BITS) - 1
+
+
+class Intent(NamedTuple):
+    name: str
+    score: int
+    handler: Optional[Callable]
+
+
+class KeywordIndex(dict):
+    """Memo token -> skor terkemas untuk satu atau beberapa IntentRouter sekaligus.
+
+    Setiap router mendapat blok field sendiri di dalam int yang sama, jadi router yang
+    berbagi index (chat lalu sub-router workout/health) cukup men-scan pesan sekali:
+    skor pesan terakhir disimpan dan dipakai lagi kalau object string yang sama
+    diklasifikasi router lain.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self._matchers: List[Tuple[re.Pattern, Dict[str, Tuple[int, ...]]]] = []
+        self._fields = 0
+        self._last: Tuple[Optional[str], int] = (None, 0)
+
+    def register(self, keywords: Dict[str, Tuple[int, ...]], fields: int) -> int:
+        """Tambah keyword satu router (keyword -> index rule); return posisi field pertama"""
+        offset = self._fields
+        owners = {keyword: tuple(offset + index for index in indexes) for keyword, indexes in keywords.items()}
+        self._matchers.append((re.compile(_trie_pattern(owners)), owners))
+        self._fields += fields
+        self.clear()
+        self._last = (None, 0)
+        return offset
+
+    def __missing__(self, token: str) -> int:
+        if len(self) >= TOKEN_MEMO_SIZE:
+            self.clear()
+        # Regex per router: match terpanjang dihitung per router, bukan lintas router
+        packed = self[token] = sum(1 << (field * SCORE_BITS)
+                                   for pattern, owners in self._matchers
+                                   for keyword in pattern.findall(token)
+                                   for field in owners[keyword])
+        return packed
+
+    def packed(self, text: str) -> int:
+        last = self._last
+        if last[0] is text:
+            return last[1]
+        packed = sum(map(self.__getitem__, text.split()))
+        # Satu tuple, jadi thread lain melihat pasangan (text, skor) yang konsisten
+        self._last = (text, packed)
+        return packed
+
+
+class IntentRouter:
+    """Router intent dengan skor: tiap keyword yang cocok di pesan menambah skor intent pemiliknya.
+
+    Rules diberikan berurutan sebagai (nama_intent, keywords, handler); semua handler
+    dipanggil sebagai handler(user, query, context). Intent dengan skor tertinggi menang,
+    skor seri dimenangkan rule yang lebih awal (urutan if/elif lama). Keyword dicocokkan
+    sebagai substring lewat regex trie yang dikompilasi sekali, match terpanjang
+    diutamakan ("women" tidak ikut dihitung sebagai "men").
+
+    Keyword tidak mengandung spasi, jadi match tidak pernah melewati batas token dan skor
+    pesan = jumlah skor per token. Pesan di-split sekali; skor per token (hasil regex, dikemas
+    dalam satu int) disimpan di KeywordIndex, jadi token yang sudah pernah dilihat cukup
+    satu lookup dict dan penjumlahannya berjalan di C (sum).
+    """
+
+    def __init__(self, rules: Sequence[Tuple[str, Sequence[str], Callable]],
+                 default: Optional[Tuple[str, Callable]] = None,
+                 index: Optional[KeywordIndex] = None):
+        self.rules = list(rules)
+        self.default = Intent(default[0], 0, default[1]) if default else Intent("unknown", 0, None)
+
+        owners: Dict[str, Tuple[int, ...]] = {}
+        for rule_index, (name, keywords, _) in enumerate(self.rules):
+            for keyword in keywords:
+                if keyword.split() != [keyword]:
+                    raise ValueError(f"Keywords for intent '{name}' must be single words")
+                if rule_index not in owners.get(keyword, ()):
+                    owners[keyword] = owners.get(keyword, ()) + (rule_index,)
+
+        self._index = index if index is not None else KeywordIndex()
+        self._shift = self._index.register(owners, len(self.rules)) * SCORE_BITS
+        self._mask = (1 << (len(self.rules) * SCORE_BITS)) - 1
+        # Intent per (rule, skor), dibuat sekali per kombinasi yang pernah muncul
+        self._scored: List[Dict[int, Intent]] = [{} for _ in self.rules]
+
+    def _packed(self, text: str) -> int:
+        return (self._index.packed(text) >> self._shift) & self._mask
+
+    def scores(self, text: str) -> List[int]:
+        packed = self._packed(text)
+        return [(packed >> (index * SCORE_BITS)) & SCORE_MASK for index in range(len(self.rules))]
+
+    def classify(self, text: str) -> Intent:
+        packed = self._packed(text)
+        if not packed:
+            return self.default
+
+        # Rule terendah & tertinggi yang punya skor; sama = hanya satu intent (kasus paling umum)
+        best = ((packed & -packed).bit_length() - 1) // SCORE_BITS
+        last = (packed.bit_length() - 1) // SCORE_BITS
+        best_score = (packed >> (best * SCORE_BITS)) & SCORE_MASK
+        for index in range(best + 1, last + 1):
+            score = (packed >> (index * SCORE_BITS)) & SCORE_MASK
+            if score > best_score:
+                best, best_score = index, score
+
+        intent = self._scored[best].get(best_score)
+        if intent is None:
+            name, _, handler = self.rules[best]
+            intent = self._scored[best][best_score] = Intent(name, best_score, handler)
+        return intent
+
+
+def _trie_pattern(keywords) -> str:
+    """Regex berbentuk trie dari daftar keyword: prefix yang sama hanya dicek sekali,
+    dan alternatif yang lebih panjang dicoba lebih dulu (leftmost-longest)."""
+    trie = {}
+    for keyword in keywords:
+        node = trie
+        for ch in keyword:
+            node = node.setdefault(ch, {})
+        node[""] = {}
+
+    def build(node) -> str:
+        branches = [re.escape(ch) + build(child) for ch, child in sorted(node.items()) if ch]
+        if not branches:
+            return ""
+        if len(branches) == 1 and "" not in node:
+            return branches[0]
+        body = "(?:" + "|".join(branches) + ")"
+        return body + "?" if "" in node else body
+
+    return build(trie)
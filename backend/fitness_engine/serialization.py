@@ -0,0 +1,89 @@
+import json
+import os
+import re
+from typing import Any, List
+
+import numpy as np
+
+# orjson opsional: kalau tidak terpasang, pakai json stdlib dengan output yang setara
+try:
+    import orjson
+except ImportError:  # pragma: no cover - tergantung environment
+    orjson = None
+
+JSON_BACKEND = "orjson" if orjson is not None else "json"
+
+# Placeholder fragment: token acak per proses, jadi string dari user tidak bisa memalsukannya
+_TOKEN_NONCE = os.urandom(6).hex()
+_TOKEN_PREFIX = f"\x01frag:{_TOKEN_NONCE}:"
+_TOKEN_PATTERN = re.compile(rb'"\\u0001frag:' + _TOKEN_NONCE.encode() + rb':(\d+)"')
+
+
+class RawJSON:
+    """Potongan JSON yang sudah di-encode; disisipkan apa adanya oleh dumps()"""
+    __slots__ = ("data",)
+
+    def __init__(self, data: bytes):
+        self.data = data
+
+    def __reduce__(self):
+        return RawJSON, (self.data,)
+
+    def __repr__(self):
+        return f"RawJSON({len(self.data)} bytes)"
+
+
+def _default(obj):
+    if isinstance(obj, np.generic):
+        return obj.item()
+    if isinstance(obj, np.ndarray):
+        return obj.tolist()
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+if orjson is not None:
+    _ORJSON_OPTIONS = orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+
+    def _dumps(obj, default=_default) -> bytes:
+        return orjson.dumps(obj, default=default, option=_ORJSON_OPTIONS)
+
+    loads = orjson.loads
+    # orjson sudah strict: hanya UTF-8, NaN/Infinity ditolak
+    loads_strict = orjson.loads
+else:
+    def _dumps(obj, default=_default) -> bytes:
+        return json.dumps(obj, default=default, ensure_ascii=False, allow_nan=False,
+                          separators=(",", ":")).encode("utf-8")
+
+    loads = json.loads
+
+    def _reject_constant(name: str):
+        raise ValueError(f"Invalid JSON constant {name}")
+
+    def loads_strict(data):
+        """Seperti loads, tapi hanya menerima JSON yang bisa disimpan/dikirim ulang apa adanya:
+        bytes harus UTF-8 (json stdlib juga menerima UTF-16/32) dan NaN/Infinity ditolak"""
+        if isinstance(data, (bytes, bytearray, memoryview)):
+            data = bytes(data).decode("utf-8")
+        return json.loads(data, parse_constant=_reject_constant)
+
+
+def encode_fragment(obj: Any) -> RawJSON:
+    """Encode sekali untuk data immutable yang dipakai berulang (misalnya recipe steps)"""
+    return RawJSON(dumps(obj))
+
+
+def dumps(obj: Any) -> bytes:
+    """Serialize ke UTF-8 JSON dalam satu pass; RawJSON di dalam obj disisipkan tanpa encode ulang"""
+    fragments: List[bytes] = []
+
+    def default(value):
+        if type(value) is RawJSON:
+            fragments.append(value.data)
+            return _TOKEN_PREFIX + str(len(fragments) - 1)
+        return _default(value)
+
+    data = _dumps(obj, default)
+    if not fragments:
+        return data
+    return _TOKEN_PATTERN.sub(lambda match: fragments[int(match.group(1))], data)
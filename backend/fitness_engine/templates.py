@@ -0,0 +1,140 @@
+import functools
+import string
+import threading
+from typing import Dict, Iterable
+
+from .cache import LRUCache
+
+RESPONSE_CACHE_SIZE = 512
+
+_MISSING = object()
+
+
+def _freeze(value):
+    # List di dalam response konstan dijadikan tuple supaya tidak bisa diubah caller
+    # (hasil JSON-nya tetap array)
+    if isinstance(value, dict):
+        return {k: _freeze(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return tuple(_freeze(v) for v in value)
+    return value
+
+
+def _share(value):
+    # Dict teratas disalin dangkal: caller boleh menambah key tanpa mengubah cache
+    return dict(value) if isinstance(value, dict) else value
+
+
+class ResponseTemplate:
+    """Teks markdown dengan placeholder gaya str.format, di-parse sekali saat import.
+
+    Dipakai untuk jawaban yang hanya berbeda di beberapa angka/bagian. Template
+    dipecah menjadi potongan literal dan field, sehingga render cukup memformat
+    nilai field lalu satu kali join (str.format mem-parse ulang seluruh teks
+    setiap dipanggil, dan itu lambat untuk teks panjang non-ASCII).
+    """
+
+    def __init__(self, text: str):
+        self.text = text
+        parts = []
+        for literal, name, spec, conversion in string.Formatter().parse(text):
+            if literal:
+                parts.append(literal)
+            if name is not None:
+                if not name.isidentifier() or conversion:
+                    raise ValueError(f"Unsupported template field: {{{name}}}")
+                parts.append((name, spec or ""))
+        self.parts = tuple(parts)
+        self.fields = frozenset(p[0] for p in parts if isinstance(p, tuple))
+
+    def render(self, **values) -> str:
+        return "".join([
+            part if part.__class__ is str else format(values[part[0]], part[1])
+            for part in self.parts
+        ])
+
+    def __repr__(self):
+        return f"ResponseTemplate(fields={sorted(self.fields)})"
+
+
+class ResponseRegistry:
+    """Kumpulan cache response chat (konstan dan per kombinasi field profil)"""
+
+    def __init__(self):
+        self.frozen: Dict[str, object] = {}
+        self.keyed: Dict[str, LRUCache] = {}
+        self._lock = threading.Lock()
+
+    def clear(self):
+        with self._lock:
+            self.frozen.clear()
+        for cache in self.keyed.values():
+            cache.clear()
+
+    def stats(self) -> Dict:
+        return {
+            "frozen": sorted(self.frozen),
+            "keyed": {name: cache.stats() for name, cache in self.keyed.items()},
+        }
+
+
+response_cache = ResponseRegistry()
+
+
+def frozen_response(fn):
+    """Response tanpa parameter: dibangun sekali pada panggilan pertama, lalu cukup lookup.
+
+    Wrapper menerima (user, query, context) seperti handler router lain dan mengabaikannya.
+    """
+    name = fn.__name__
+
+    @functools.wraps(fn)
+    def wrapper(user=None, query=None, context=None):
+        value = response_cache.frozen.get(name, _MISSING)
+        if value is _MISSING:
+            with response_cache._lock:
+                value = response_cache.frozen.get(name, _MISSING)
+                if value is _MISSING:
+                    value = _freeze(fn())
+                    response_cache.frozen[name] = value
+        return _share(value)
+
+    wrapper.uncached = fn
+    return wrapper
+
+
+def keyed_response(fields: Iterable[str] = (), maxsize: int = RESPONSE_CACHE_SIZE):
+    """Response f(user) yang hanya bergantung pada field diskrit (goal, active_level, ...).
+
+    Key cache = tuple nilai field tersebut, jadi jumlah variasinya kecil dan
+    semua user dengan kombinasi yang sama berbagi satu response. Wrapper juga menerima
+    (query, context) dari router intent; keduanya tidak ikut key dan tidak diteruskan.
+    """
+    fields = tuple(fields)
+
+    def decorator(fn):
+        cache = LRUCache(maxsize=maxsize)
+        response_cache.keyed[fn.__name__] = cache
+
+        @functools.wraps(fn)
+        def wrapper(user, query=None, context=None):
+            key = tuple(getattr(user, f, None) for f in fields)
+            value = cache.get(key, _MISSING)
+            if value is _MISSING:
+                value = _freeze(fn(user))
+                cache.set(key, value)
+            return _share(value)
+
+        wrapper.cache = cache
+        wrapper.uncached = fn
+        return wrapper
+
+    return decorator
+
+
+def clear_response_cache():
+    response_cache.clear()
+
+
+def response_cache_stats() -> Dict:
+    return response_cache.stats()
@@ -1,8 +1,13 @@
 from models.user_model import UserData
-from typing import List, Dict
+from typing import List, Dict, Optional
 import random
 
-def generate_workouts(user) -> List[Dict]:
+from fitness_engine.profiling import timed_stage
+
+@timed_stage()
+def generate_workouts(user, rng: Optional[random.Random] = None) -> List[Dict]:
+    # rng=None memakai modul random global (tidak deterministik); isi untuk hasil yang bisa diulang
+    rng = rng or random
     # Exercise database dengan sets dan reps yang sesuai
     exercises = {
         "push": [
@@ -89,7 +94,7 @@ def generate_workouts(user) -> List[Dict]:
 
     g = user.goal.lower()
     activity_level = user.active_level.lower()
-    cardio_choice = random.choice(cardio_exercises.get(g, cardio_exercises["maintain"]))
+    cardio_choice = rng.choice(cardio_exercises.get(g, cardio_exercises["maintain"]))
 
     plan = []
     weekly_split = ["push", "pull", "leg", "push", "pull", "leg", "rest"]
@@ -108,12 +113,12 @@ def generate_workouts(user) -> List[Dict]:
         # Pilih 4-5 exercises untuk setiap workout day
         if day_type == "leg":
             # Untuk leg day, ambil 4 leg exercises + 2 core exercises
-            selected_exercises = random.sample(exercises["leg"], 4)
-            core_exercises = random.sample(exercises["core"], 2)
+            selected_exercises = rng.sample(exercises["leg"], 4)
+            core_exercises = rng.sample(exercises["core"], 2)
             daily_exercises = selected_exercises + core_exercises
         else:
             # Untuk push/pull day, ambil 5 exercises
-            daily_exercises = random.sample(exercises[day_type], 5)
+            daily_exercises = rng.sample(exercises[day_type], 5)
 
         cardio_with_type = cardio_choice.copy()
         cardio_with_type["type"] = "cardio"
@@ -132,9 +137,9 @@ def generate_workouts(user) -> List[Dict]:
 
     return plan
 
-def generate_simple_workouts(user) -> List[Dict]:
+def generate_simple_workouts(user, rng: Optional[random.Random] = None) -> List[Dict]:
     """Versi sederhana tanpa sets/reps detail untuk kompatibilitas"""
-    workouts = generate_workouts(user)
+    workouts = generate_workouts(user, rng)
     
     simplified_plan = []
     for day in workouts:
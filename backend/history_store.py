@@ -0,0 +1,252 @@
+import json
+import logging
+import os
+import sqlite3
+import zlib
+from typing import Dict, List, Optional, Tuple, Union
+
+# zstd opsional (pip install zstandard); format per baris disimpan, jadi codec bisa diganti kapan saja
+try:
+    import zstandard
+except ImportError:  # pragma: no cover - tergantung environment
+    zstandard = None
+
+logger = logging.getLogger(__name__)
+
+# Versi skema history (PRAGMA user_version); 0/1 = tabel lama history(plan_json TEXT)
+HISTORY_SCHEMA_VERSION = 2
+
+# Format blob plan di kolom history.format
+FORMAT_JSON = 0   # teks JSON UTF-8 tanpa kompresi
+FORMAT_ZLIB = 1
+FORMAT_ZSTD = 2
+
+# zlib (default) | zstd | none
+HISTORY_COMPRESSION = os.getenv("FITNESS_HISTORY_COMPRESSION", "zlib").lower()
+ZLIB_LEVEL = int(os.getenv("FITNESS_HISTORY_ZLIB_LEVEL", "6"))
+ZSTD_LEVEL = 3
+
+# Pagination /history
+HISTORY_PAGE_DEFAULT = 20
+HISTORY_PAGE_MAX = 100
+
+# Jumlah baris per query saat /history di-stream
+HISTORY_STREAM_BATCH = int(os.getenv("FITNESS_HISTORY_STREAM_BATCH", "50"))
+
+# Jumlah baris per batch saat migrasi tabel lama
+MIGRATION_BATCH = 500
+
+HISTORY_TABLE_SQL = """
+    CREATE TABLE IF NOT EXISTS {name}(
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        user_id INTEGER NOT NULL,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        format INTEGER NOT NULL DEFAULT 0,
+        plan_blob BLOB,
+        summary_json TEXT
+    )
+"""
+HISTORY_INDEX_SQL = "CREATE INDEX IF NOT EXISTS idx_history_user_created ON history(user_id, created_at)"
+
+
+# ----- codec -----
+
+def _write_format() -> int:
+    if HISTORY_COMPRESSION == "none":
+        return FORMAT_JSON
+    if HISTORY_COMPRESSION == "zstd":
+        if zstandard is None:
+            raise RuntimeError("FITNESS_HISTORY_COMPRESSION=zstd requires the 'zstandard' package")
+        return FORMAT_ZSTD
+    if HISTORY_COMPRESSION == "zlib":
+        return FORMAT_ZLIB
+    raise ValueError(f"FITNESS_HISTORY_COMPRESSION must be zlib, zstd or none, got '{HISTORY_COMPRESSION}'")
+
+
+def encode_plan(plan_json: Union[bytes, str], fmt: Optional[int] = None) -> Tuple[int, bytes]:
+    """Teks JSON plan -> (format, blob)"""
+    data = plan_json.encode("utf-8") if isinstance(plan_json, str) else plan_json
+    fmt = _write_format() if fmt is None else fmt
+    if fmt == FORMAT_ZLIB:
+        return fmt, zlib.compress(data, ZLIB_LEVEL)
+    if fmt == FORMAT_ZSTD:
+        return fmt, zstandard.ZstdCompressor(level=ZSTD_LEVEL).compress(data)
+    return FORMAT_JSON, data
+
+
+def decode_plan(fmt: int, blob: Optional[bytes]) -> Optional[bytes]:
+    """(format, blob) -> teks JSON plan (bytes UTF-8)"""
+    if blob is None:
+        return None
+    if fmt == FORMAT_ZLIB:
+        return zlib.decompress(blob)
+    if fmt == FORMAT_ZSTD:
+        if zstandard is None:
+            raise RuntimeError("History row is zstd-compressed but 'zstandard' is not installed")
+        return zstandard.ZstdDecompressor().decompress(blob)
+    return bytes(blob) if not isinstance(blob, str) else blob.encode("utf-8")
+
+
+def plan_summary(plan: Dict) -> Dict:
+    """Ringkasan kecil untuk listing history (tanpa membuka blob plan)"""
+    def section(key, kind):
+        value = plan.get(key)
+        return value if isinstance(value, kind) else kind()
+
+    info = section("user_info", dict)
+    nutrition = section("nutrition", dict)
+    diet = plan.get("diet_plan") or plan.get("meal_plan") or []
+    grocery = section("grocery_list", list)
+    weekly_cost = None
+    if grocery and isinstance(grocery[-1], dict) and grocery[-1].get("item") == "TOTAL WEEKLY COST":
+        weekly_cost = grocery[-1].get("total_cost")
+
+    return {
+        "name": info.get("name"),
+        "goal": info.get("goal"),
+        "current_weight": info.get("current_weight"),
+        "target_weight": info.get("target_weight"),
+        "calories_target": nutrition.get("calories_target"),
+        "diet_days": len(diet) if isinstance(diet, list) else 0,
+        "workout_days": len(section("workout_plan", list)),
+        "weekly_cost": weekly_cost,
+    }
+
+
+# ----- skema & migrasi -----
+
+def _columns(conn, table: str) -> List[str]:
+    return [row[1] for row in conn.execute(f"PRAGMA table_info({table})")]
+
+
+def _migrate_legacy_rows(conn):
+    """Salin history(plan_json TEXT) ke history_v2 dengan blob terkompresi + summary"""
+    last_id = 0
+    copied = 0
+    while True:
+        rows = conn.execute(
+            "SELECT id, user_id, plan_json, created_at FROM history WHERE id > ? ORDER BY id LIMIT ?",
+            (last_id, MIGRATION_BATCH),
+        ).fetchall()
+        if not rows:
+            break
+        batch = []
+        for row_id, user_id, plan_json, created_at in rows:
+            summary = None
+            if plan_json is not None:
+                try:
+                    plan = json.loads(plan_json)
+                    if isinstance(plan, dict):
+                        summary = json.dumps(plan_summary(plan))
+                except ValueError:
+                    # Dulu dikirim sebagai string; simpan sebagai JSON string supaya /history tetap valid
+                    logger.warning("History row %s has invalid JSON, stored as a JSON string", row_id)
+                    plan_json = json.dumps(plan_json)
+                fmt, blob = encode_plan(plan_json)
+            else:
+                fmt, blob = FORMAT_JSON, None
+            batch.append((row_id, user_id, created_at, fmt, blob, summary))
+        conn.executemany(
+            "INSERT INTO history_v2(id, user_id, created_at, format, plan_blob, summary_json) "
+            "VALUES (?, ?, ?, ?, ?, ?)", batch)
+        copied += len(batch)
+        last_id = rows[-1][0]
+    return copied
+
+
+def init_history(conn: sqlite3.Connection):
+    """Buat tabel history versi baru, atau migrasi tabel lama (sekali, di dalam satu transaksi).
+
+    BEGIN IMMEDIATE memastikan hanya satu worker yang menjalankan migrasi; worker
+    lain menunggu lock lalu melihat user_version yang sudah naik.
+    """
+    if conn.execute("PRAGMA user_version").fetchone()[0] >= HISTORY_SCHEMA_VERSION:
+        return
+
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        if conn.execute("PRAGMA user_version").fetchone()[0] >= HISTORY_SCHEMA_VERSION:
+            conn.rollback()
+            return
+
+        columns = _columns(conn, "history")
+        if not columns:
+            conn.execute(HISTORY_TABLE_SQL.format(name="history"))
+        elif "plan_json" in columns:
+            conn.execute("DROP TABLE IF EXISTS history_v2")
+            conn.execute(HISTORY_TABLE_SQL.format(name="history_v2"))
+            copied = _migrate_legacy_rows(conn)
+            conn.execute("DROP TABLE history")
+            conn.execute("ALTER TABLE history_v2 RENAME TO history")
+            logger.info("Migrated %d history rows to schema v%d", copied, HISTORY_SCHEMA_VERSION)
+
+        conn.execute(HISTORY_INDEX_SQL)
+        conn.execute(f"PRAGMA user_version = {HISTORY_SCHEMA_VERSION}")
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+
+
+# ----- query helpers (sync, dipanggil lewat run_db) -----
+
+def insert_history(conn, user_id: int, plan_json: Union[bytes, str], summary: Optional[Dict] = None):
+    fmt, blob = encode_plan(plan_json)
+    conn.execute(
+        "INSERT INTO history(user_id, format, plan_blob, summary_json) VALUES (?, ?, ?, ?)",
+        (user_id, fmt, blob, json.dumps(summary) if summary is not None else None),
+    )
+    conn.commit()
+
+
+def insert_history_many(conn, rows: List[Tuple[int, Union[bytes, str], Optional[Dict]]]) -> int:
+    """Banyak baris (user_id, plan_json, summary) dalam satu transaksi dan satu commit.
+
+    Kompresi dikerjakan sebelum transaksi dibuka, jadi write lock hanya dipegang
+    selama INSERT.
+    """
+    params = []
+    for user_id, plan_json, summary in rows:
+        fmt, blob = encode_plan(plan_json)
+        params.append((user_id, fmt, blob, json.dumps(summary) if summary is not None else None))
+    conn.executemany(
+        "INSERT INTO history(user_id, format, plan_blob, summary_json) VALUES (?, ?, ?, ?)",
+        params,
+    )
+    conn.commit()
+    return len(params)
+
+
+def fetch_history_page(conn, user_id: int, before: Optional[int] = None,
+                       limit: int = HISTORY_PAGE_DEFAULT,
+                       summary_only: bool = False) -> Tuple[List[Dict], Optional[int]]:
+    """Satu halaman history terbaru dulu, keyset pada (created_at, id).
+
+    before = id baris terakhir dari halaman sebelumnya. Return (rows, next_before);
+    next_before None kalau sudah habis. plan_json berupa teks JSON (bytes),
+    summary berupa teks JSON (str) di mode summary_only.
+    """
+    payload = "summary_json" if summary_only else "format, plan_blob"
+    sql = f"SELECT id, user_id, created_at, {payload} FROM history WHERE user_id = ?"
+    params: list = [user_id]
+    if before is not None:
+        sql += " AND (created_at, id) < (SELECT created_at, id FROM history WHERE id = ? AND user_id = ?)"
+        params += [before, user_id]
+    sql += " ORDER BY created_at DESC, id DESC LIMIT ?"
+    params.append(limit + 1)
+
+    rows = conn.execute(sql, params).fetchall()
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+
+    page = []
+    for row in rows:
+        item = {"id": row["id"], "user_id": row["user_id"], "created_at": row["created_at"]}
+        if summary_only:
+            item["summary"] = row["summary_json"]
+        else:
+            item["plan_json"] = decode_plan(row["format"], row["plan_blob"])
+        page.append(item)
+
+    next_before = page[-1]["id"] if has_more and page else None
+    return page, next_before
@@ -0,0 +1,245 @@
+import asyncio
+import logging
+import os
+from collections import deque
+from typing import Deque, Dict, Optional, Tuple
+
+import database
+import history_store
+from executors import ExecutorBusy, run_db
+
+logger = logging.getLogger(__name__)
+
+# sync         = INSERT + commit per request (seperti dulu)
+# batched      = insert dari banyak request digabung dalam satu transaksi; request menunggu
+#                sampai batch-nya di-commit (durability sama dengan sync, commit jauh lebih sedikit)
+# write_behind = response dikirim begitu baris masuk antrean; baris yang belum di-flush
+#                hilang kalau proses mati mendadak (shutdown normal tetap flush)
+HISTORY_WRITE_MODE = os.getenv("FITNESS_HISTORY_WRITE_MODE", "batched").lower()
+WRITE_MODES = ("sync", "batched", "write_behind")
+
+# Batch ditulis saat terisi N baris atau FLUSH_MS setelah baris pertama masuk
+# (saat traffic sepi baris langsung ditulis, tanpa menunggu FLUSH_MS)
+HISTORY_BATCH_SIZE = int(os.getenv("FITNESS_HISTORY_BATCH_SIZE", "128"))
+HISTORY_FLUSH_MS = float(os.getenv("FITNESS_HISTORY_FLUSH_MS", "2"))
+
+# Maksimum baris yang antre + sedang ditulis per worker; kalau penuh request menunggu
+# paling lama QUEUE_TIMEOUT detik lalu ditolak dengan 503
+HISTORY_QUEUE_MAX = int(os.getenv("FITNESS_HISTORY_QUEUE_MAX", "2048"))
+HISTORY_QUEUE_TIMEOUT = float(os.getenv("FITNESS_HISTORY_QUEUE_TIMEOUT", "2"))
+
+Row = Tuple[int, bytes, Optional[Dict]]
+
+
+class HistoryWriter:
+    """Antrean insert history per worker, ditulis sebagai transaksi batch.
+
+    Satu task flusher di event loop mengambil sampai batch_size baris, menunggu paling
+    lama flush_interval setelah baris pertama supaya batch terisi (hanya saat ada traffic
+    bersamaan), lalu menulis semuanya dengan satu commit lewat run_db. Selama batch ditulis,
+    baris baru terkumpul untuk batch berikutnya. Semua state hanya disentuh dari event loop,
+    jadi tanpa lock.
+    """
+
+    def __init__(self, mode: str = HISTORY_WRITE_MODE, batch_size: int = HISTORY_BATCH_SIZE,
+                 flush_interval: float = HISTORY_FLUSH_MS / 1000, max_queue: int = HISTORY_QUEUE_MAX,
+                 queue_timeout: float = HISTORY_QUEUE_TIMEOUT):
+        if mode not in WRITE_MODES:
+            raise ValueError(f"FITNESS_HISTORY_WRITE_MODE must be one of {', '.join(WRITE_MODES)}, got '{mode}'")
+        self.mode = mode
+        self.batch_size = max(1, batch_size)
+        self.flush_interval = flush_interval
+        self.max_queue = max(1, max_queue)
+        self.queue_timeout = queue_timeout
+
+        self._pending: Deque[Tuple[Row, Optional[asyncio.Future]]] = deque()
+        self._task: Optional[asyncio.Task] = None
+        self._closing = False
+        self._wakeup: Optional[asyncio.Event] = None
+        self._batch_ready: Optional[asyncio.Event] = None
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._flushed: Optional[asyncio.Condition] = None
+        self._enqueued = 0
+        self._written = 0
+        self._flush_target = 0
+        self._last_batch = 0
+
+        self.rows = 0          # baris yang ditulis lewat batch
+        self.sync_rows = 0     # baris yang ditulis langsung per request (_write_now)
+        self.batches = 0
+        self.max_batch = 0
+        self.failed = 0
+        self.queue_waits = 0
+        self.rejected = 0
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    async def start(self):
+        """Jalankan flusher di event loop aktif (lifespan startup)"""
+        if self.mode == "sync" or self.running:
+            return
+        self._closing = False
+        self._wakeup = asyncio.Event()
+        self._batch_ready = asyncio.Event()
+        self._slots = asyncio.Semaphore(self.max_queue)
+        self._flushed = asyncio.Condition()
+        self._task = asyncio.create_task(self._run(), name="history-writer")
+
+    async def stop(self):
+        """Tulis semua baris yang masih antre lalu hentikan flusher (lifespan shutdown)"""
+        if self._task is None:
+            return
+        self._closing = True
+        self._wakeup.set()
+        self._batch_ready.set()
+        await self._task
+        self._task = None
+        logger.info("History writer stopped: %d rows in %d batches, %d written directly, %d failed",
+                    self.rows, self.batches, self.sync_rows, self.failed)
+
+    async def add(self, user_id: int, plan_json: bytes, summary: Optional[Dict] = None):
+        row = (user_id, plan_json, summary)
+        if not self.running or self._closing:
+            # Mode sync, app dijalankan tanpa lifespan (flusher tidak pernah start), atau shutdown
+            await self._write_now(row)
+            return
+
+        if self._slots.locked():
+            # Backpressure: antrean penuh, tunggu batch yang sedang ditulis selesai
+            self.queue_waits += 1
+            try:
+                await asyncio.wait_for(self._slots.acquire(), self.queue_timeout)
+            except asyncio.TimeoutError:
+                self.rejected += 1
+                raise ExecutorBusy(f"History write queue is full ({self.max_queue} rows pending)")
+        else:
+            await self._slots.acquire()
+        if self._closing:
+            # stop() mulai saat request ini menunggu slot; flusher mungkin sudah selesai
+            self._slots.release()
+            await self._write_now(row)
+            return
+
+        future = asyncio.get_running_loop().create_future() if self.mode == "batched" else None
+        self._pending.append((row, future))
+        self._enqueued += 1
+        self._wakeup.set()
+        if len(self._pending) >= self.batch_size:
+            self._batch_ready.set()
+        if future is not None:
+            await future
+
+    async def _write_now(self, row: Row):
+        await run_db(database.with_connection, history_store.insert_history, *row)
+        self.sync_rows += 1
+
+    async def flush(self):
+        """Tunggu sampai semua baris yang sudah antre saat ini selesai ditulis"""
+        if not self.running:
+            return
+        target = self._flush_target = self._enqueued
+        self._batch_ready.set()
+        async with self._flushed:
+            # Flusher yang berhenti (stop/cancel/crash) tidak akan menulis target lagi
+            await self._flushed.wait_for(lambda: self._written >= target or not self.running)
+
+    async def _run(self):
+        try:
+            while True:
+                if not self._pending:
+                    if self._closing:
+                        return
+                    self._wakeup.clear()
+                    await self._wakeup.wait()
+                    continue
+
+                # Tunggu batch terisi hanya kalau ada traffic bersamaan (batch terakhir > 1 baris)
+                # dan tidak ada flush() yang menunggu baris yang masih antre; request tunggal
+                # langsung ditulis tanpa tambahan latency
+                collected = self._enqueued - len(self._pending)
+                if (len(self._pending) < self.batch_size and self.flush_interval > 0
+                        and self._last_batch > 1 and not self._closing
+                        and collected >= self._flush_target):
+                    try:
+                        await asyncio.wait_for(self._batch_ready.wait(), self.flush_interval)
+                    except asyncio.TimeoutError:
+                        pass
+
+                batch = [self._pending.popleft() for _ in range(min(self.batch_size, len(self._pending)))]
+                # Di-clear setelah batch diambil: sinyal yang datang selama batch ini ditulis
+                # (antrean penuh lagi, flush) tetap berlaku untuk batch berikutnya
+                self._batch_ready.clear()
+                self._last_batch = len(batch)
+                await self._write(batch)
+        finally:
+            self._abandon_pending()
+            async with self._flushed:
+                self._flushed.notify_all()
+
+    def _abandon_pending(self):
+        """Flusher berhenti tidak normal (cancel/crash): jangan biarkan request menunggu selamanya"""
+        if not self._pending:
+            return
+        logger.error("History writer stopped with %d rows still queued", len(self._pending))
+        while self._pending:
+            _, future = self._pending.popleft()
+            self.failed += 1
+            self._written += 1
+            self._slots.release()
+            if future is not None and not future.done():
+                future.set_exception(RuntimeError("History writer stopped"))
+
+    async def _write(self, batch):
+        rows = [row for row, _ in batch]
+        try:
+            await run_db(database.with_connection, history_store.insert_history_many, rows)
+        except Exception as exc:
+            # Mode batched: error diteruskan ke setiap request di batch ini (500);
+            # mode write_behind: response sudah terkirim, jadi hanya bisa dicatat
+            self.failed += len(rows)
+            logger.exception("History batch insert failed (%d rows)", len(rows))
+            for _, future in batch:
+                if future is not None and not future.done():
+                    future.set_exception(exc)
+        else:
+            self.rows += len(rows)
+            self.batches += 1
+            self.max_batch = max(self.max_batch, len(rows))
+            for _, future in batch:
+                # Request bisa sudah dibatalkan (client disconnect); barisnya tetap tersimpan
+                if future is not None and not future.done():
+                    future.set_result(None)
+        finally:
+            for _, future in batch:
+                # Hanya tersisa kalau flusher di-cancel saat batch ini ditulis
+                if future is not None and not future.done():
+                    future.set_exception(RuntimeError("History writer stopped"))
+                self._slots.release()
+            self._written += len(batch)
+            async with self._flushed:
+                self._flushed.notify_all()
+
+    def stats(self) -> Dict:
+        return {
+            "mode": self.mode,
+            "running": self.running,
+            "batch_size": self.batch_size,
+            "flush_ms": self.flush_interval * 1000,
+            "max_queue": self.max_queue,
+            "queued": len(self._pending),
+            "in_flight": self._enqueued - self._written,
+            "rows_written": self.rows + self.sync_rows,
+            "batched_rows": self.rows,
+            "sync_rows": self.sync_rows,
+            "batches": self.batches,
+            "avg_batch": round(self.rows / self.batches, 1) if self.batches else 0.0,
+            "max_batch": self.max_batch,
+            "failed": self.failed,
+            "queue_waits": self.queue_waits,
+            "rejected": self.rejected,
+        }
+
+
+history_writer = HistoryWriter()
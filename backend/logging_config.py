@@ -0,0 +1,44 @@
+import atexit
+import logging
+import logging.handlers
+import os
+import queue
+import sys
+
+# DEBUG / INFO / WARNING ... ; debug path juga bisa dihapus total dengan `python -O`
+LOG_LEVEL = os.getenv("FITNESS_LOG_LEVEL", "INFO").upper()
+LOG_FORMAT = "%(asctime)s %(levelname)s [%(process)d] %(name)s: %(message)s"
+
+_listener = None
+
+
+def setup_logging(level: str = None, stream=None) -> logging.handlers.QueueListener:
+    """Pasang QueueHandler di root logger; output ditulis oleh thread listener terpisah
+    sehingga request tidak pernah menunggu I/O stdout/stderr."""
+    global _listener
+    if _listener is not None:
+        return _listener
+
+    log_queue = queue.SimpleQueue()
+
+    output = logging.StreamHandler(stream or sys.stderr)
+    output.setFormatter(logging.Formatter(LOG_FORMAT))
+
+    root = logging.getLogger()
+    root.setLevel(level or LOG_LEVEL)
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    root.addHandler(logging.handlers.QueueHandler(log_queue))
+
+    _listener = logging.handlers.QueueListener(log_queue, output, respect_handler_level=True)
+    _listener.start()
+    atexit.register(shutdown_logging)
+    return _listener
+
+
+def shutdown_logging():
+    """Flush sisa log di queue lalu hentikan thread listener"""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
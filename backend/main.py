@@ -1,15 +1,75 @@
-from fastapi import FastAPI, HTTPException, Header
+import logging
+import math
+import os
+from contextlib import asynccontextmanager
+from typing import Dict, List, Optional, Tuple
+from fastapi import FastAPI, HTTPException, Depends, Request
 from fastapi.middleware.cors import CORSMiddleware
-from database import get_db, init_db
+from fastapi.responses import JSONResponse, Response, StreamingResponse
+from database import get_async_db, init_db, pool, pool_stats, PooledSession, PoolTimeout
+import database
+import history_store
+from history_writer import history_writer
+from executors import ExecutorBusy, run_db, run_engine, run_kdf, shutdown_executors
+from passwords import hash_password, verify_password
+from rate_limit import client_ip, create_login_guard
+from responses import STREAM_MEDIA_TYPES, FastJSONResponse, json_stream, raw_history_rows
+from response_cache import RESPONSE_CACHE_SQLITE, etag_matches, plan_responses
+from metrics import METRICS_ENABLED, PROMETHEUS_CONTENT_TYPE, record_stages, render_metrics, server_timing
+from logging_config import setup_logging
 from models.user_auth import UserRegister, UserLogin
-from auth import create_token, decode_token
-import json
+from auth import create_token, require_user, token_cache_stats
 from models.user_model import UserData
+from fitness_engine.cache import nutrition_cache_stats, profile_hash
+from fitness_engine.plan_store import plan_store
+from fitness_engine.plan_cache import plan_cache_stats, plan_seed
+from fitness_engine.profiling import run_profiled
+from fitness_engine.templates import response_cache_stats
+from fitness_engine.meal_tables import get_meal_tables, meal_tables_stats
+from fitness_engine.serialization import dumps, loads, loads_strict
+from fitness_engine.compact import EXPAND_OPTIONS, expand_history_rows, expand_plan, expand_plans, meal_detail
+from fitness_engine.batch import generate_plans_batch
+from fitness_engine.progress import predict_progress
 from fitness_engine.engine import generate_full_plan, generate_meal_plan_only, generate_workout_plan_only, process_chat_message
 
+setup_logging()
+logger = logging.getLogger("fitness_api")
+
 init_db()
 
-app = FastAPI()
+# Jumlah user maksimum per request /plan/batch
+PLAN_BATCH_MAX = int(os.getenv("FITNESS_PLAN_BATCH_MAX", "1000"))
+
+# Horizon maksimum kurva /progress (minggu)
+PROGRESS_MAX_WEEKS = 104
+
+if os.getenv("FITNESS_PLAN_STORE_SQLITE", "0") == "1":
+    plan_store.attach_sqlite(database.DB_PATH)
+
+if RESPONSE_CACHE_SQLITE:
+    plan_responses.attach_sqlite(database.DB_PATH)
+
+# Rate limit + negative lookup cache untuk /login (FITNESS_RATE_LIMIT_STORE=sqlite untuk multi-worker)
+login_guard = create_login_guard(database.DB_PATH)
+
+async def run_guard(fn, *args):
+    # Store SQLite melakukan I/O, jadi dijalankan di executor DB; store memory langsung
+    if login_guard.store.blocking:
+        return await run_db(fn, *args)
+    return fn(*args)
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Precompute tabel meal sebelum request pertama (worker process hasil fork ikut mewarisi)
+    get_meal_tables()
+    await history_writer.start()
+    yield
+    # Flush insert history yang masih antre sebelum executor DB dimatikan
+    await history_writer.stop()
+    shutdown_executors()
+    pool.close()
+
+app = FastAPI(lifespan=lifespan)
 
 app.add_middleware(
     CORSMiddleware,
@@ -17,83 +77,251 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    # Header response yang boleh dibaca frontend cross-origin: ETag untuk If-None-Match / 304,
+    # X-Next-Before = cursor halaman berikutnya /history
+    expose_headers=["ETag", "X-Next-Before"],
 )
 
+def check_expand(expand: Optional[str]) -> bool:
+    """?expand=recipes -> plan dikirim lengkap (portions, recipes, meal_details per hari)"""
+    if expand is None:
+        return False
+    if expand not in EXPAND_OPTIONS:
+        raise HTTPException(400, f"expand must be one of: {', '.join(EXPAND_OPTIONS)}")
+    return True
+
+def profile_stages(request: Request) -> Optional[Dict[str, float]]:
+    """Header X-Profile: 1 -> kumpulkan waktu per stage, dikirim balik di header Server-Timing"""
+    return {} if request.headers.get("x-profile") == "1" else None
+
+async def run_engine_timed(stages: Optional[Dict[str, float]], fn, *args, **kwargs):
+    """run_engine dengan stage timer aktif (untuk histogram /metrics dan X-Profile)"""
+    if stages is None and not METRICS_ENABLED:
+        return await run_engine(fn, *args, **kwargs)
+    result, timings = await run_engine(run_profiled, fn, *args, **kwargs)
+    record_stages(timings)
+    if stages is not None:
+        for name, seconds in timings.items():
+            stages[name] = stages.get(name, 0.0) + seconds
+    return result
+
+def timing_headers(stages: Optional[Dict[str, float]], **extra) -> Dict[str, str]:
+    if stages is None:
+        return {}
+    value = server_timing(stages)
+    for name, desc in extra.items():
+        value += f'{", " if value else ""}{name};desc="{desc}"'
+    return {"Server-Timing": value}
+
+def plan_keys(route: str, user: UserData, seed: Optional[int]) -> Tuple[str, str]:
+    """(hash profil, key plan). Plan deterministik untuk (profil kanonik, seed, versi data);
+    key plan + flag expand = key response cache, key plan saja = asal record plan_store"""
+    profile = profile_hash(user)
+    return profile, f"{route}:{profile}:{plan_seed(user, seed, profile)}:{get_meal_tables().version}"
+
+async def cached_plan_response(request: Request, key: str, build,
+                               stages: Optional[Dict[str, float]] = None) -> Response:
+    """Body plan dari response cache (memori, lalu spill SQLite); build() hanya dipanggil saat miss.
+
+    Client yang mengirim If-None-Match dengan ETag yang sama mendapat 304 tanpa body.
+    """
+    cache_status = "hit"
+    entry = plan_responses.get(key)
+    if entry is None and plan_responses.spill_enabled:
+        entry = await run_db(plan_responses.load_spilled, key)
+        cache_status = "spill"
+    if entry is None:
+        cache_status = "miss"
+        plan = await build()
+        entry, evicted = plan_responses.put(key, dumps(plan))
+        if plan_responses.spill_enabled and (evicted or plan_responses.write_through):
+            await run_db(plan_responses.persist, key, entry, evicted)
+
+    headers = {"ETag": entry.etag, **timing_headers(stages, response_cache=cache_status)}
+    if etag_matches(request.headers.get("if-none-match"), entry.etag):
+        plan_responses.record_not_modified()
+        return Response(status_code=304, headers=headers)
+    return Response(entry.body, media_type="application/json", headers=headers)
+
+@app.exception_handler(PoolTimeout)
+def pool_timeout_handler(request, exc: PoolTimeout):
+    return JSONResponse(status_code=503, content={"detail": str(exc)})
+
+@app.exception_handler(ExecutorBusy)
+def executor_busy_handler(request, exc: ExecutorBusy):
+    return JSONResponse(status_code=503, content={"detail": str(exc)}, headers={"Retry-After": "1"})
+
 @app.post("/register")
-def register(user: UserRegister):
-    conn = get_db()
-    c = conn.cursor()
+async def register(user: UserRegister, db: PooledSession = Depends(get_async_db)):
+    # Koneksi DB baru dipinjam setelah hash selesai, bukan ditahan selama KDF berjalan
+    password_hash = await run_kdf(hash_password, user.password)
+    created = await run_db(db.call, database.create_user, user.name, user.email, password_hash)
 
-    try:
-        c.execute("INSERT INTO users(name, email, password) VALUES (?, ?, ?)",
-                  (user.name, user.email, user.password))
-        conn.commit()
-        return {"message": "Register successful"}
-    except:
+    if not created:
         raise HTTPException(400, "Email already used")
+
+    await run_guard(login_guard.forget_unknown_email, user.email)
+
+    return {"message": "Register successful"}
     
 @app.post("/login")
-def login(user: UserLogin):
-    conn = get_db()
-    c = conn.cursor()
+async def login(user: UserLogin, request: Request):
+    ip = client_ip(request.client.host if request.client else None, request.headers.get("x-forwarded-for"))
+    retry_after = await run_guard(login_guard.check, user.email, ip)
+    if retry_after is not None:
+        raise HTTPException(429, "Too many login attempts",
+                            headers={"Retry-After": str(max(1, math.ceil(retry_after)))})
 
-    c.execute("SELECT * FROM users WHERE email = ? AND password = ?", 
-              (user.email, user.password))
-    row = c.fetchone()
+    # Email yang baru saja terbukti tidak terdaftar tidak perlu query SQLite lagi
+    row = None
+    if not await run_guard(login_guard.is_unknown_email, user.email):
+        row = await run_db(database.with_connection, database.find_user, user.email)
+        if row is None:
+            await run_guard(login_guard.remember_unknown_email, user.email)
 
-    if not row:
+    # Email tidak terdaftar tetap menjalankan KDF (waktu respons sama)
+    ok, new_hash = await run_kdf(verify_password, user.password, row["password"] if row else None)
+    if not ok:
         raise HTTPException(401, "Invalid credentials")
 
+    if new_hash is not None:
+        # Plaintext lama / parameter KDF lama -> upgrade saat login berhasil
+        await run_db(database.with_connection, database.update_password_hash, row["id"], new_hash)
+
     token = create_token(row["id"])
     return {"token": token, "name": row["name"], "user_id": row["id"]}
 
 @app.post("/plan")
-def generate_plan(user: UserData):
+async def generate_plan(user: UserData, request: Request, expand: Optional[str] = None,
+                        seed: Optional[int] = None):
     if user.age <= 0 or user.weight_kg <= 0 or user.height_cm <= 0:
         raise HTTPException(400, "Invalid user data")
+    expand_recipes = check_expand(expand)
+    stages = profile_stages(request)
+    profile, source = plan_keys("plan", user, seed)
+
+    async def generate():
+        plan = await run_engine_timed(stages, generate_full_plan, user, seed=seed)
+        await run_db(plan_store.save, user, source=source,
+                     workout_plan=plan["workout_plan"],
+                     diet_plan=plan["diet_plan"],
+                     grocery_list=plan["grocery_list"])
+        return plan
     
-    try:
-        plan = generate_full_plan(user)
+    async def build():
+        plan = await generate()
         
-        # DEBUG: Print untuk troubleshooting
-        print("=== GENERATED PLAN STRUCTURE ===")
-        print(f"Diet plan days: {len(plan['diet_plan'])}")
-        if plan['diet_plan']:
-            day1 = plan['diet_plan'][0]
-            print(f"Day 1 meals: {day1['meals']}")
-            print(f"Day 1 portions: {day1.get('portions', {})}")
-            print(f"Day 1 recipes: {day1.get('recipes', {})}")
-            print(f"Grocery items: {len(plan.get('grocery_list', []))}")
+        if __debug__:
+            logger.debug("Generated plan: %d diet days, %d grocery items",
+                         len(plan['diet_plan']), len(plan.get('grocery_list', [])))
         
+        if expand_recipes:
+            plan = await run_engine_timed(stages, expand_plan, plan, raw=True)
         return plan
+    
+    try:
+        response = await cached_plan_response(request, f"{source}:{int(expand_recipes)}", build, stages)
+        # Hit response cache (termasuk spill dari worker lain) tidak menjalankan build():
+        # plan tetap disimpan di plan_store worker ini supaya chat berikutnya menemukannya
+        if not plan_store.has_source(profile, source):
+            await generate()
+        return response
         
     except Exception as e:
-        print(f"Error generating plan: {e}")
+        logger.exception("Error generating plan")
         raise HTTPException(500, f"Plan generation failed: {str(e)}")
 
+@app.post("/plan/batch")
+async def generate_plan_batch(users: List[UserData], request: Request, details: bool = True,
+                              expand: Optional[str] = None):
+    if not users:
+        raise HTTPException(400, "Empty batch")
+    if len(users) > PLAN_BATCH_MAX:
+        raise HTTPException(413, f"Batch too large (max {PLAN_BATCH_MAX} users)")
+    expand_recipes = check_expand(expand)
+    stages = profile_stages(request)
+    
+    try:
+        plans = await run_engine_timed(stages, generate_plans_batch, users, details=details)
+        if details:
+            await run_db(plan_store.save_many, [
+                (user, {
+                    "workout_plan": plan["workout_plan"],
+                    "diet_plan": plan["diet_plan"],
+                    "grocery_list": plan["grocery_list"],
+                })
+                for user, plan in zip(users, plans) if "error" not in plan
+            ])
+        
+        failed = sum(1 for plan in plans if "error" in plan)
+        if details and expand_recipes:
+            plans = await run_engine_timed(stages, expand_plans, plans, raw=True)
+        return FastJSONResponse({"count": len(plans), "failed": failed, "plans": plans},
+                                headers=timing_headers(stages))
+        
+    except Exception as e:
+        logger.exception("Error generating plan batch")
+        raise HTTPException(500, f"Batch plan generation failed: {str(e)}")
+
+# Kurva progress saja (untuk chart); format=columns mengembalikan list per field
+@app.post("/progress")
+async def progress_curve(user: UserData, weeks: int = 12, format: str = "rows"):
+    if weeks < 0 or weeks > PROGRESS_MAX_WEEKS:
+        raise HTTPException(400, f"weeks must be between 0 and {PROGRESS_MAX_WEEKS}")
+    if format not in ("rows", "columns"):
+        raise HTTPException(400, "format must be 'rows' or 'columns'")
+    
+    progress = await run_engine(predict_progress, user, weeks, format == "columns")
+    return {"weeks": weeks, "progress_prediction": progress}
+
 # Endpoint untuk meal plan only
 @app.post("/meal_plan")
-def generate_meal_plan(user: UserData):
-    try:
-        plan = generate_meal_plan_only(user)
+async def generate_meal_plan(user: UserData, request: Request, expand: Optional[str] = None,
+                             seed: Optional[int] = None):
+    expand_recipes = check_expand(expand)
+    stages = profile_stages(request)
+    profile, source = plan_keys("meal_plan", user, seed)
+
+    async def generate():
+        plan = await run_engine_timed(stages, generate_meal_plan_only, user, seed)
+        await run_db(plan_store.save, user, source=source,
+                     diet_plan=plan["meal_plan"],
+                     grocery_list=plan["grocery_list"])
         return plan
+
+    async def build():
+        plan = await generate()
+        if expand_recipes:
+            plan = await run_engine_timed(stages, expand_plan, plan, raw=True)
+        return plan
+
+    try:
+        response = await cached_plan_response(request, f"{source}:{int(expand_recipes)}", build, stages)
+        if not plan_store.has_source(profile, source):
+            await generate()
+        return response
     except Exception as e:
         raise HTTPException(500, f"Meal plan generation failed: {str(e)}")
 
 # Endpoint untuk workout plan only  
 @app.post("/workout_plan")
-def generate_workout_plan(user: UserData):
+async def generate_workout_plan(user: UserData, request: Request, response: Response,
+                                seed: Optional[int] = None):
+    stages = profile_stages(request)
     try:
-        plan = generate_workout_plan_only(user)
+        plan = await run_engine_timed(stages, generate_workout_plan_only, user, seed)
+        await run_db(plan_store.save, user, workout_plan=plan["workout_plan"])
+        response.headers.update(timing_headers(stages))
         return plan
     except Exception as e:
         raise HTTPException(500, f"Workout plan generation failed: {str(e)}")
     
 @app.post("/chat")
-def chat_with_coach(data: dict):
+async def chat_with_coach(data: dict):
 
     try:
-        print("Received chat request:", data)  # Debug
+        if __debug__:
+            logger.debug("Received chat request: %s", data)
         
         # Extract user data dari request
         user_data = data.get("user", {})
@@ -118,50 +346,117 @@ def chat_with_coach(data: dict):
             raise HTTPException(400, "Message is required")
         
         # Process chat message menggunakan fungsi dari engine.py
-        response = process_chat_message(user, message, context)
+        response = await run_engine(process_chat_message, user, message, context)
         
-        print("Chat response generated:", response.get("type", "unknown"))  # Debug
+        if __debug__:
+            logger.debug("Chat response generated: %s", response.get("type", "unknown"))
         
         return response
         
     except HTTPException:
         raise
     except Exception as e:
-        print(f"Error in chat endpoint: {e}")
-        import traceback
-        traceback.print_exc()
+        logger.exception("Error in chat endpoint")
         raise HTTPException(500, f"Chat processing failed: {str(e)}")
 
 @app.post("/save_history")
-def save_history(plan: dict, Authorization: str = Header(None)):
-    user_id = decode_token(Authorization.replace("Bearer ", ""))
-
-    if not user_id:
-        raise HTTPException(401, "Invalid token")
+async def save_history(request: Request, user_id: int = Depends(require_user)):
+    # Body divalidasi strict (JSON UTF-8 tanpa NaN/Infinity) lalu disimpan tanpa encode ulang
+    body = await request.body()
+    try:
+        plan = loads_strict(body)
+    except ValueError:
+        # Parser fallback (json stdlib) lebih longgar, misalnya body UTF-16: yang disimpan
+        # hasil encode ulang, bukan bytes aslinya. NaN/Infinity gagal di dumps -> 422
+        try:
+            plan = loads(body)
+            body = dumps(plan)
+        except ValueError:
+            raise HTTPException(422, "Plan must be valid JSON")
+    if not isinstance(plan, dict):
+        raise HTTPException(422, "Plan must be a JSON object")
 
-    conn = get_db()
-    c = conn.cursor()
-    c.execute("INSERT INTO history(user_id, plan_json) VALUES (?, ?)",
-              (user_id, json.dumps(plan)))
-    conn.commit()
+    # Lewat antrean history_writer (FITNESS_HISTORY_WRITE_MODE): digabung jadi insert batch
+    await history_writer.add(user_id, body, history_store.plan_summary(plan))
 
     return {"message": "Saved"}
 
+async def history_batches(user_id: int, before: Optional[int], summary: bool, expand_recipes: bool):
+    """Semua history user (mulai dari before) per batch; tiap batch query baru (keyset),
+    jadi koneksi tidak ditahan selama client membaca stream"""
+    while True:
+        rows, before = await run_db(database.with_connection, history_store.fetch_history_page,
+                                    user_id, before, history_store.HISTORY_STREAM_BATCH, summary)
+        if expand_recipes and not summary:
+            rows = await run_engine(expand_history_rows, rows)
+        yield raw_history_rows(rows)
+        if before is None:
+            break
+
 @app.get("/history")
-def get_history(Authorization: str = Header(None)):
-    user_id = decode_token(Authorization.replace("Bearer ", ""))
+async def get_history(expand: Optional[str] = None, before: Optional[int] = None,
+                      limit: int = history_store.HISTORY_PAGE_DEFAULT, summary: bool = False,
+                      stream: Optional[str] = None, user_id: int = Depends(require_user),
+                      db: PooledSession = Depends(get_async_db)):
+    expand_recipes = check_expand(expand)
+    if not 1 <= limit <= history_store.HISTORY_PAGE_MAX:
+        raise HTTPException(400, f"limit must be between 1 and {history_store.HISTORY_PAGE_MAX}")
+
+    # Mode write_behind: /save_history sudah dijawab sebelum baris ditulis, jadi flush dulu
+    # supaya history yang baru disimpan (di worker ini) ikut terbaca
+    if history_writer.mode == "write_behind":
+        await history_writer.flush()
+
+    # ?stream=ndjson|array: export seluruh history tanpa pagination (limit diabaikan)
+    if stream is not None:
+        if stream not in STREAM_MEDIA_TYPES:
+            raise HTTPException(400, f"stream must be one of: {', '.join(STREAM_MEDIA_TYPES)}")
+        batches = history_batches(user_id, before, summary, expand_recipes)
+        return StreamingResponse(json_stream(batches, stream), media_type=STREAM_MEDIA_TYPES[stream])
+
+    # Terbaru dulu; halaman berikutnya: ?before=<X-Next-Before>
+    rows, next_before = await run_db(db.call, history_store.fetch_history_page,
+                                     user_id, before, limit, summary)
+    if expand_recipes and not summary:
+        # Koneksi tidak perlu ditahan selama expand (CPU) berjalan
+        await run_db(db.close)
+        rows = await run_engine(expand_history_rows, rows)
+
+    headers = {"X-Next-Before": str(next_before)} if next_before is not None else None
+    return FastJSONResponse(raw_history_rows(rows), headers=headers)
 
-    if not user_id:
-        raise HTTPException(401, "Invalid token")
+# Detail satu meal dari ID di plan compact (portions, recipes, meal_details)
+@app.get("/meals/{meal_id}")
+async def get_meal(meal_id: int, goal: str = "maintain"):
+    meal = meal_detail(meal_id, goal)
+    if meal is None:
+        raise HTTPException(404, "Meal not found")
+    return meal
 
-    conn = get_db()
-    c = conn.cursor()
+@app.get("/db_stats")
+async def db_stats():
+    return {**pool_stats(), "history_writer": history_writer.stats()}
 
-    c.execute("SELECT * FROM history WHERE user_id = ?", (user_id,))
-    rows = c.fetchall()
+@app.get("/metrics")
+async def metrics():
+    # Prometheus text format; histogram per worker process
+    return Response(render_metrics(), media_type=PROMETHEUS_CONTENT_TYPE)
 
-    return [dict(r) for r in rows]
+@app.get("/cache_stats")
+async def cache_stats():
+    # Cache memori per worker: pid menunjukkan worker mana yang menjawab
+    return {
+        "worker_pid": os.getpid(),
+        "nutrition": nutrition_cache_stats(),
+        "plan_store": plan_store.stats(),
+        "plans": plan_cache_stats(),
+        "plan_responses": plan_responses.stats(),
+        "responses": response_cache_stats(),
+        "meal_tables": meal_tables_stats(),
+        "tokens": token_cache_stats(),
+        "login_guard": await run_guard(login_guard.stats),
+    }
 
 @app.get("/")
-def root():
+async def root():
     return {"message": "AI Fitness API is running!"}
\ No newline at end of file
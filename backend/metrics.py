@@ -0,0 +1,87 @@
+import bisect
+import os
+import threading
+from typing import Dict, Iterable, List, Tuple
+
+# 0 = histogram stage tidak direkam (X-Profile per request tetap bisa dipakai)
+METRICS_ENABLED = os.getenv("FITNESS_METRICS", "1") == "1"
+
+# Batas bucket (detik): dari 50us (stage kecil) sampai 2.5s (plan dengan executor penuh)
+STAGE_BUCKETS = (0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005,
+                 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+class Histogram:
+    """Histogram kumulatif gaya Prometheus dengan satu label"""
+
+    def __init__(self, name: str, help_text: str, label: str, buckets: Iterable[float]):
+        self.name = name
+        self.help_text = help_text
+        self.label = label
+        self.buckets = tuple(sorted(buckets))
+        # nilai label -> [count per bucket (+Inf di akhir), sum]
+        self._series: Dict[str, Tuple[List[int], List[float]]] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, label_value: str, seconds: float):
+        index = bisect.bisect_left(self.buckets, seconds)
+        with self._lock:
+            series = self._series.get(label_value)
+            if series is None:
+                series = self._series[label_value] = ([0] * (len(self.buckets) + 1), [0.0])
+            series[0][index] += 1
+            series[1][0] += seconds
+
+    def observe_many(self, values: Dict[str, float]):
+        for label_value, seconds in values.items():
+            self.observe(label_value, seconds)
+
+    def snapshot(self) -> Dict[str, Dict]:
+        with self._lock:
+            return {value: {"counts": list(counts), "sum": total[0]}
+                    for value, (counts, total) in self._series.items()}
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        bounds = [format(b, "g") for b in self.buckets] + ["+Inf"]
+        for value, data in sorted(self.snapshot().items()):
+            label = f'{self.label}="{_escape(value)}"'
+            cumulative = 0
+            for bound, count in zip(bounds, data["counts"]):
+                cumulative += count
+                lines.append(f'{self.name}_bucket{{{label},le="{bound}"}} {cumulative}')
+            lines.append(f"{self.name}_sum{{{label}}} {data['sum']:.9g}")
+            lines.append(f"{self.name}_count{{{label}}} {cumulative}")
+        return lines
+
+    def clear(self):
+        with self._lock:
+            self._series.clear()
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+stage_seconds = Histogram(
+    "fitness_stage_seconds",
+    "Time spent in fitness_engine plan stages (per worker process).",
+    "stage",
+    STAGE_BUCKETS,
+)
+
+
+def record_stages(stages: Dict[str, float]):
+    if METRICS_ENABLED:
+        stage_seconds.observe_many(stages)
+
+
+def server_timing(stages: Dict[str, float]) -> str:
+    """Header Server-Timing (durasi dalam ms), tampil di tab Network devtools browser"""
+    return ", ".join(f"{name};dur={seconds * 1000:.3f}" for name, seconds in stages.items())
+
+
+def render_metrics() -> str:
+    return "\n".join(stage_seconds.render()) + "\n"
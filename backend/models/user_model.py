@@ -1,3 +1,4 @@
+from typing import Optional
 from pydantic import BaseModel
 
 class UserData(BaseModel):
@@ -9,4 +10,4 @@ class UserData(BaseModel):
     goal: str
     active_level: str    
     vegan: bool = False
-    target_weight: float = None
+    target_weight: Optional[float] = None
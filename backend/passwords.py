@@ -0,0 +1,116 @@
+import base64
+import hashlib
+import hmac
+import os
+from typing import Optional, Tuple
+
+# scrypt (default) | pbkdf2 - algoritma untuk hash baru; hash lama tetap bisa diverifikasi
+PASSWORD_KDF = os.getenv("FITNESS_PASSWORD_KDF", "scrypt").lower()
+
+# Biaya scrypt: memori ~ 128 * N * r byte per hash (N=2^14, r=8 -> 16 MiB)
+SCRYPT_N = int(os.getenv("FITNESS_SCRYPT_N", str(2 ** 14)))
+SCRYPT_R = int(os.getenv("FITNESS_SCRYPT_R", "8"))
+SCRYPT_P = int(os.getenv("FITNESS_SCRYPT_P", "1"))
+
+# Iterasi PBKDF2-HMAC-SHA256 (rekomendasi OWASP 2023: 600k)
+PBKDF2_ITERATIONS = int(os.getenv("FITNESS_PBKDF2_ITERATIONS", "600000"))
+
+SALT_BYTES = 16
+HASH_BYTES = 32
+
+SCRYPT_PREFIX = "scrypt"
+PBKDF2_PREFIX = "pbkdf2_sha256"
+
+
+def _b64encode(data: bytes) -> str:
+    return base64.b64encode(data).decode("ascii").rstrip("=")
+
+
+def _b64decode(text: str) -> bytes:
+    return base64.b64decode(text + "=" * (-len(text) % 4))
+
+
+def _scrypt(password: str, salt: bytes, n: int, r: int, p: int) -> bytes:
+    # maxmem default OpenSSL 32 MiB; beri ruang untuk N/r yang dinaikkan lewat env
+    return hashlib.scrypt(password.encode("utf-8"), salt=salt, n=n, r=r, p=p,
+                          maxmem=256 * n * r + 1024 * 1024, dklen=HASH_BYTES)
+
+
+def _pbkdf2(password: str, salt: bytes, iterations: int) -> bytes:
+    return hashlib.pbkdf2_hmac("sha256", password.encode("utf-8"), salt, iterations, dklen=HASH_BYTES)
+
+
+def hash_password(password: str) -> str:
+    """Password -> string tersandi "algoritma$parameter...$salt$hash" untuk kolom users.password.
+
+    CPU-heavy (puluhan ms): panggil lewat executors.run_kdf, jangan di event loop.
+    """
+    salt = os.urandom(SALT_BYTES)
+    if PASSWORD_KDF == "scrypt":
+        digest = _scrypt(password, salt, SCRYPT_N, SCRYPT_R, SCRYPT_P)
+        return f"{SCRYPT_PREFIX}${SCRYPT_N}${SCRYPT_R}${SCRYPT_P}${_b64encode(salt)}${_b64encode(digest)}"
+    if PASSWORD_KDF == "pbkdf2":
+        digest = _pbkdf2(password, salt, PBKDF2_ITERATIONS)
+        return f"{PBKDF2_PREFIX}${PBKDF2_ITERATIONS}${_b64encode(salt)}${_b64encode(digest)}"
+    raise ValueError(f"FITNESS_PASSWORD_KDF must be 'scrypt' or 'pbkdf2', got '{PASSWORD_KDF}'")
+
+
+def _parse(stored: str) -> Optional[Tuple[str, Tuple[int, ...], bytes, bytes]]:
+    """(algoritma, parameter, salt, hash), atau None kalau bukan hash (baris lama berisi plaintext)"""
+    parts = stored.split("$")
+    try:
+        if parts[0] == SCRYPT_PREFIX and len(parts) == 6:
+            return SCRYPT_PREFIX, tuple(map(int, parts[1:4])), _b64decode(parts[4]), _b64decode(parts[5])
+        if parts[0] == PBKDF2_PREFIX and len(parts) == 4:
+            return PBKDF2_PREFIX, (int(parts[1]),), _b64decode(parts[2]), _b64decode(parts[3])
+    except ValueError:
+        return None
+    return None
+
+
+def _current_params() -> Tuple[str, Tuple[int, ...]]:
+    if PASSWORD_KDF == "scrypt":
+        return SCRYPT_PREFIX, (SCRYPT_N, SCRYPT_R, SCRYPT_P)
+    return PBKDF2_PREFIX, (PBKDF2_ITERATIONS,)
+
+
+def needs_rehash(stored: str) -> bool:
+    """True kalau stored plaintext lama atau dibuat dengan algoritma/biaya yang berbeda dari setting sekarang"""
+    parsed = _parse(stored)
+    return parsed is None or parsed[:2] != _current_params()
+
+
+# Hash dummy untuk email yang tidak terdaftar, supaya waktu respons /login tidak membocorkan
+# apakah email ada (dibuat lazy karena biayanya sama dengan satu hash)
+_dummy_hash: Optional[str] = None
+
+
+def verify_password(password: str, stored: Optional[str]) -> Tuple[bool, Optional[str]]:
+    """Cek password terhadap kolom users.password.
+
+    Return (cocok, hash_baru). hash_baru diisi kalau password cocok tapi stored
+    perlu di-upgrade (plaintext lama atau parameter KDF berubah); simpan ke DB.
+    stored=None (user tidak ada) tetap menjalankan satu KDF dengan biaya yang sama.
+    """
+    global _dummy_hash
+    if stored is None:
+        if _dummy_hash is None:
+            _dummy_hash = hash_password("")
+        verify_password(password, _dummy_hash)
+        return False, None
+
+    parsed = _parse(stored)
+    if parsed is None:
+        # Baris lama: password tersimpan plaintext
+        ok = hmac.compare_digest(password.encode("utf-8"), stored.encode("utf-8"))
+    else:
+        algorithm, params, salt, expected = parsed
+        if algorithm == SCRYPT_PREFIX:
+            digest = _scrypt(password, salt, *params)
+        else:
+            digest = _pbkdf2(password, salt, *params)
+        ok = hmac.compare_digest(digest, expected)
+
+    if ok and needs_rehash(stored):
+        return True, hash_password(password)
+    return ok, None
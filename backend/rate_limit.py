@@ -0,0 +1,277 @@
+import hashlib
+import ipaddress
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, Optional, Tuple
+
+from database import ProcessConnection
+from fitness_engine.cache import LRUCache
+
+# memory (default, per proses) | sqlite (dibagi semua worker uvicorn lewat file DB)
+RATE_LIMIT_STORE = os.getenv("FITNESS_RATE_LIMIT_STORE", "memory").lower()
+
+# Batas /login dalam format "burst/detik": token bucket dengan kapasitas burst,
+# terisi penuh lagi dalam jumlah detik tersebut
+LOGIN_LIMIT_EMAIL = os.getenv("FITNESS_LOGIN_LIMIT_EMAIL", "5/60")
+LOGIN_LIMIT_IP = os.getenv("FITNESS_LOGIN_LIMIT_IP", "20/60")
+
+# Cache email yang tidak terdaftar (negative lookup), dihapus saat email itu register
+NEGATIVE_CACHE_SIZE = int(os.getenv("FITNESS_LOGIN_NEGATIVE_CACHE_SIZE", "10000"))
+NEGATIVE_CACHE_TTL = float(os.getenv("FITNESS_LOGIN_NEGATIVE_CACHE_TTL", "60"))
+
+# Reverse proxy di depan API (IP/CIDR, dipisah koma). Request dari alamat ini memakai
+# X-Forwarded-For untuk bucket per IP; tanpa ini semua client di belakang proxy berbagi satu bucket
+TRUSTED_PROXIES = os.getenv("FITNESS_TRUSTED_PROXIES", "")
+
+# Jumlah bucket maksimum di store memory (bucket penuh sama dengan tidak ada entry)
+MEMORY_STORE_SIZE = 100_000
+
+# Store SQLite: hapus baris kedaluwarsa setiap N operasi tulis
+SQLITE_PURGE_EVERY = 1000
+
+
+class RateLimit:
+    """Token bucket: kapasitas `burst`, isi ulang burst/period token per detik"""
+    __slots__ = ("burst", "period", "rate")
+
+    def __init__(self, burst: int, period: float):
+        if burst < 1 or period <= 0:
+            raise ValueError("Rate limit needs burst >= 1 and period > 0")
+        self.burst = burst
+        self.period = period
+        self.rate = burst / period
+
+    @classmethod
+    def parse(cls, spec: str) -> "RateLimit":
+        burst, _, period = spec.partition("/")
+        try:
+            return cls(int(burst), float(period or 60))
+        except ValueError:
+            raise ValueError(f"Rate limit must look like '<burst>/<seconds>', got '{spec}'")
+
+    def __repr__(self):
+        return f"RateLimit({self.burst}/{self.period:g}s)"
+
+
+def parse_networks(spec: str) -> Tuple:
+    try:
+        return tuple(ipaddress.ip_network(part.strip(), strict=False)
+                     for part in spec.split(",") if part.strip())
+    except ValueError:
+        raise ValueError(f"FITNESS_TRUSTED_PROXIES must be comma-separated IPs/CIDRs, got '{spec}'")
+
+
+TRUSTED_NETWORKS = parse_networks(TRUSTED_PROXIES)
+
+
+def _trusted(address: str, networks) -> bool:
+    try:
+        ip = ipaddress.ip_address(address)
+    except ValueError:
+        return False
+    return any(ip in network for network in networks)
+
+
+def client_ip(peer: Optional[str], forwarded_for: Optional[str], networks=None) -> Optional[str]:
+    """Alamat client untuk rate limit: peer, atau kalau peer proxy terpercaya, alamat paling
+    kanan di X-Forwarded-For yang bukan proxy terpercaya (bagian kiri bisa dipalsukan client)"""
+    networks = TRUSTED_NETWORKS if networks is None else networks
+    if peer is None or not forwarded_for or not _trusted(peer, networks):
+        return peer
+    hops = [hop.strip() for hop in forwarded_for.split(",") if hop.strip()]
+    for hop in reversed(hops):
+        if not _trusted(hop, networks):
+            return hop
+    return hops[0] if hops else peer
+
+
+def _key(kind: str, value: str) -> bytes:
+    # Email/IP asli tidak disimpan, hanya digest-nya
+    return hashlib.blake2b(f"{kind}:{value}".encode(), digest_size=16).digest()
+
+
+class MemoryStore:
+    """Bucket dan negative lookup di memori proses ini (satu worker)"""
+    blocking = False
+
+    def __init__(self, maxsize: int = MEMORY_STORE_SIZE, negative_size: int = NEGATIVE_CACHE_SIZE):
+        self.buckets = LRUCache(maxsize=maxsize)
+        self.negative = LRUCache(maxsize=negative_size)
+        self._lock = threading.Lock()
+
+    def take(self, key: bytes, limit: RateLimit) -> Tuple[bool, float]:
+        """Ambil satu token. Return (diizinkan, detik sampai token berikutnya tersedia)"""
+        now = time.time()
+        with self._lock:
+            tokens, updated_at = self.buckets.get(key) or (limit.burst, now)
+            tokens = min(limit.burst, tokens + (now - updated_at) * limit.rate)
+            allowed = tokens >= 1
+            if allowed:
+                tokens -= 1
+            # Setelah terisi penuh entry boleh hilang: bucket kosong = bucket penuh
+            self.buckets.set(key, (tokens, now), ttl=(limit.burst - tokens) / limit.rate or None)
+        return allowed, 0.0 if allowed else (1 - tokens) / limit.rate
+
+    def is_negative(self, key: bytes) -> bool:
+        return self.negative.get(key) is not None
+
+    def set_negative(self, key: bytes, ttl: float):
+        self.negative.set(key, True, ttl=ttl)
+
+    def clear_negative(self, key: bytes):
+        self.negative.delete(key)
+
+    def stats(self) -> Dict:
+        return {"store": "memory", "buckets": self.buckets.stats(), "negative": self.negative.stats()}
+
+
+class SQLiteStore:
+    """Bucket dan negative lookup di tabel SQLite, dipakai bersama oleh semua worker.
+
+    Refill + ambil token dilakukan dalam satu statement UPSERT, jadi atomik
+    walaupun beberapa proses menulis bucket yang sama.
+    """
+    blocking = True  # I/O SQLite: panggil lewat run_db
+
+    def __init__(self, db_path: str):
+        self.db_path = db_path
+        self._lock = threading.Lock()
+        # Autocommit: setiap UPSERT berdiri sendiri sebagai satu transaksi
+        self._db = ProcessConnection(db_path, self._create_tables, isolation_level=None)
+        self._writes = 0
+        self.allowed = 0
+        self.limited = 0
+
+    @staticmethod
+    def _create_tables(conn: sqlite3.Connection):
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS rate_limits(
+                key BLOB PRIMARY KEY,
+                tokens REAL NOT NULL,
+                updated_at REAL NOT NULL,
+                expires_at REAL NOT NULL
+            ) WITHOUT ROWID
+        """)
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS login_negative(
+                key BLOB PRIMARY KEY,
+                expires_at REAL NOT NULL
+            ) WITHOUT ROWID
+        """)
+
+    def _connection(self) -> sqlite3.Connection:
+        return self._db.get()
+
+    def _purge(self, conn, now: float):
+        self._writes += 1
+        if self._writes % SQLITE_PURGE_EVERY == 0:
+            conn.execute("DELETE FROM rate_limits WHERE expires_at <= ?", (now,))
+            conn.execute("DELETE FROM login_negative WHERE expires_at <= ?", (now,))
+
+    def take(self, key: bytes, limit: RateLimit) -> Tuple[bool, float]:
+        now = time.time()
+        refilled = "MIN(:burst, tokens + (:now - updated_at) * :rate)"
+        with self._lock:
+            conn = self._connection()
+            row = conn.execute(
+                f"""
+                INSERT INTO rate_limits(key, tokens, updated_at, expires_at)
+                VALUES (:key, :burst - 1, :now, :now + 1 / :rate)
+                ON CONFLICT(key) DO UPDATE SET
+                    tokens = {refilled} - 1,
+                    updated_at = :now,
+                    expires_at = :now + (:burst - ({refilled} - 1)) / :rate
+                WHERE {refilled} >= 1
+                RETURNING tokens
+                """,
+                {"key": key, "burst": limit.burst, "now": now, "rate": limit.rate},
+            ).fetchone()
+            if row is not None:
+                self.allowed += 1
+                self._purge(conn, now)
+                return True, 0.0
+
+            self.limited += 1
+            tokens = conn.execute(
+                f"SELECT {refilled} FROM rate_limits WHERE key = :key",
+                {"key": key, "burst": limit.burst, "now": now, "rate": limit.rate},
+            ).fetchone()[0]
+        return False, max(0.0, (1 - tokens) / limit.rate)
+
+    def is_negative(self, key: bytes) -> bool:
+        with self._lock:
+            row = self._connection().execute(
+                "SELECT 1 FROM login_negative WHERE key = ? AND expires_at > ?", (key, time.time())
+            ).fetchone()
+        return row is not None
+
+    def set_negative(self, key: bytes, ttl: float):
+        now = time.time()
+        with self._lock:
+            conn = self._connection()
+            conn.execute("INSERT OR REPLACE INTO login_negative(key, expires_at) VALUES (?, ?)", (key, now + ttl))
+            self._purge(conn, now)
+
+    def clear_negative(self, key: bytes):
+        with self._lock:
+            self._connection().execute("DELETE FROM login_negative WHERE key = ?", (key,))
+
+    def stats(self) -> Dict:
+        with self._lock:
+            conn = self._connection()
+            buckets = conn.execute("SELECT COUNT(*) FROM rate_limits").fetchone()[0]
+            negative = conn.execute("SELECT COUNT(*) FROM login_negative").fetchone()[0]
+        return {"store": "sqlite", "buckets": buckets, "negative": negative,
+                "allowed": self.allowed, "limited": self.limited}
+
+
+class LoginGuard:
+    """Rate limit /login per email dan per IP, plus cache email yang tidak terdaftar"""
+
+    def __init__(self, store, email_limit: RateLimit, ip_limit: RateLimit,
+                 negative_ttl: float = NEGATIVE_CACHE_TTL):
+        self.store = store
+        self.email_limit = email_limit
+        self.ip_limit = ip_limit
+        self.negative_ttl = negative_ttl
+
+    def check(self, email: str, ip: Optional[str]) -> Optional[float]:
+        """None kalau boleh lanjut, atau Retry-After (detik) kalau dibatasi"""
+        if ip:
+            allowed, retry_after = self.store.take(_key("ip", ip), self.ip_limit)
+            if not allowed:
+                return retry_after
+        allowed, retry_after = self.store.take(_key("email", email.lower()), self.email_limit)
+        return None if allowed else retry_after
+
+    # Negative cache di-key dengan string yang persis sama dengan lookup database.find_user
+    # (case-sensitive), jadi gagal login dengan variasi huruf besar/kecil tidak mengunci
+    # email yang terdaftar. Rate limit per email tetap lower() supaya tidak bisa dihindari.
+    def is_unknown_email(self, email: str) -> bool:
+        return self.negative_ttl > 0 and self.store.is_negative(_key("user", email))
+
+    def remember_unknown_email(self, email: str):
+        if self.negative_ttl > 0:
+            self.store.set_negative(_key("user", email), self.negative_ttl)
+
+    def forget_unknown_email(self, email: str):
+        """Panggil saat email didaftarkan supaya login berikutnya tidak ditolak dari cache"""
+        self.store.clear_negative(_key("user", email))
+
+    def stats(self) -> Dict:
+        stats = self.store.stats()
+        stats["email_limit"] = repr(self.email_limit)
+        stats["ip_limit"] = repr(self.ip_limit)
+        return stats
+
+
+def create_login_guard(db_path: str) -> LoginGuard:
+    if RATE_LIMIT_STORE == "sqlite":
+        store = SQLiteStore(db_path)
+    elif RATE_LIMIT_STORE == "memory":
+        store = MemoryStore()
+    else:
+        raise ValueError(f"FITNESS_RATE_LIMIT_STORE must be 'memory' or 'sqlite', got '{RATE_LIMIT_STORE}'")
+    return LoginGuard(store, RateLimit.parse(LOGIN_LIMIT_EMAIL), RateLimit.parse(LOGIN_LIMIT_IP))
@@ -0,0 +1,227 @@
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+from database import ProcessConnection
+
+# Batas ukuran body yang disimpan di memori per worker
+RESPONSE_CACHE_MAX_BYTES = int(float(os.getenv("FITNESS_RESPONSE_CACHE_MB", "64")) * 1024 * 1024)
+# Body lebih besar dari ini tidak di-cache (misalnya plan expand yang sangat besar)
+RESPONSE_CACHE_MAX_ENTRY_BYTES = 1024 * 1024
+
+# 1 = entry yang tergeser dari memori disimpan ke SQLite (dibaca lagi saat miss)
+RESPONSE_CACHE_SQLITE = os.getenv("FITNESS_RESPONSE_CACHE_SQLITE", "0") == "1"
+RESPONSE_CACHE_SPILL_MAX_BYTES = int(float(os.getenv("FITNESS_RESPONSE_CACHE_SPILL_MB", "512")) * 1024 * 1024)
+# 1 = setiap body baru langsung ditulis ke SQLite juga (tier bersama untuk semua worker:
+# plan yang dibuat satu worker jadi hit "spill" di worker lain, tidak digenerate ulang)
+RESPONSE_CACHE_WRITE_THROUGH = os.getenv("FITNESS_RESPONSE_CACHE_WRITE_THROUGH", "0") == "1"
+
+# Cek ukuran tabel spill setiap N penulisan
+SPILL_PURGE_EVERY = 200
+
+
+class CachedResponse(NamedTuple):
+    etag: str
+    body: bytes
+
+
+def make_etag(body: bytes) -> str:
+    """ETag kuat dari isi body (plan deterministik, jadi body sama = ETag sama)"""
+    return '"' + hashlib.blake2b(body, digest_size=16).hexdigest() + '"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """If-None-Match bisa berisi "*" atau daftar ETag (boleh weak W/...)"""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate == etag:
+            return True
+    return False
+
+
+class ResponseCache:
+    """Cache body response (bytes JSON) per key, LRU dengan batas total byte.
+
+    Entry yang tergeser bisa di-spill ke SQLite, atau dengan write_through semua
+    entry baru ditulis ke SQLite sehingga dipakai bersama oleh worker lain.
+    get() hanya memori (murah, aman di event loop); load_spilled(), persist() dan
+    spill() melakukan I/O (lewat run_db).
+    """
+
+    def __init__(self, max_bytes: int = RESPONSE_CACHE_MAX_BYTES,
+                 db_path: Optional[str] = None,
+                 spill_max_bytes: int = RESPONSE_CACHE_SPILL_MAX_BYTES,
+                 write_through: bool = False):
+        self.max_bytes = max_bytes
+        self.spill_max_bytes = spill_max_bytes
+        self.db_path = db_path
+        self.write_through = write_through
+        self._data: "OrderedDict[str, CachedResponse]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._db_lock = threading.Lock()
+        self._db: Optional[ProcessConnection] = None
+        self._spill_writes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.spill_hits = 0
+        self.spilled = 0
+        self.not_modified = 0
+
+    @property
+    def spill_enabled(self) -> bool:
+        return self.db_path is not None
+
+    # ----- memori -----
+
+    def get(self, key: str) -> Optional[CachedResponse]:
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return entry
+
+    def put(self, key: str, body: bytes, etag: Optional[str] = None) -> Tuple[CachedResponse, List[Tuple[str, CachedResponse]]]:
+        """Simpan body; return (entry, daftar (key, entry) yang tergeser untuk di-spill)"""
+        entry = CachedResponse(etag or make_etag(body), body)
+        if len(body) > min(RESPONSE_CACHE_MAX_ENTRY_BYTES, self.max_bytes):
+            return entry, []
+
+        evicted = []
+        with self._lock:
+            previous = self._data.pop(key, None)
+            if previous is not None:
+                self._bytes -= len(previous.body)
+            self._data[key] = entry
+            self._bytes += len(body)
+            while self._bytes > self.max_bytes:
+                old_key, old_entry = self._data.popitem(last=False)
+                self._bytes -= len(old_entry.body)
+                self.evictions += 1
+                evicted.append((old_key, old_entry))
+        return entry, evicted
+
+    def record_not_modified(self):
+        with self._lock:
+            self.not_modified += 1
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self._bytes = 0
+
+    # ----- spill SQLite -----
+
+    def attach_sqlite(self, db_path: str, write_through: bool = RESPONSE_CACHE_WRITE_THROUGH):
+        with self._db_lock:
+            self.db_path = db_path
+            self.write_through = write_through
+            self._db = ProcessConnection(db_path, self._create_table)
+
+    @staticmethod
+    def _create_table(conn: sqlite3.Connection):
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS response_cache(
+                key TEXT PRIMARY KEY,
+                etag TEXT NOT NULL,
+                body BLOB NOT NULL,
+                stored_at REAL NOT NULL
+            )
+        """)
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_response_cache_stored ON response_cache(stored_at)")
+
+    def _connection(self) -> sqlite3.Connection:
+        return self._db.get()
+
+    def load_spilled(self, key: str) -> Optional[CachedResponse]:
+        """Cari di SQLite; kalau ada, naikkan lagi ke memori"""
+        if self.db_path is None:
+            return None
+        with self._db_lock:
+            row = self._connection().execute(
+                "SELECT etag, body FROM response_cache WHERE key = ?", (key,)
+            ).fetchone()
+        if row is None:
+            return None
+        with self._lock:
+            self.spill_hits += 1
+        entry, evicted = self.put(key, bytes(row[1]), row[0])
+        if not self.write_through:
+            self.spill(evicted)
+        return entry
+
+    def persist(self, key: str, entry: CachedResponse, evicted: List[Tuple[str, CachedResponse]]):
+        """Setelah put() entry baru: write-through menulis entry itu (yang tergeser sudah
+        ada di SQLite), mode spill biasa hanya menulis yang tergeser"""
+        if self.write_through:
+            if len(entry.body) <= RESPONSE_CACHE_MAX_ENTRY_BYTES:
+                self.spill([(key, entry)])
+        else:
+            self.spill(evicted)
+
+    def spill(self, entries: List[Tuple[str, CachedResponse]]):
+        if self.db_path is None or not entries:
+            return
+        now = time.time()
+        with self._db_lock:
+            conn = self._connection()
+            conn.executemany(
+                "INSERT OR REPLACE INTO response_cache(key, etag, body, stored_at) VALUES (?, ?, ?, ?)",
+                [(key, entry.etag, entry.body, now) for key, entry in entries],
+            )
+            self._spill_writes += 1
+            if self._spill_writes % SPILL_PURGE_EVERY == 0:
+                self._purge_spill(conn)
+            conn.commit()
+        with self._lock:
+            self.spilled += len(entries)
+
+    def _purge_spill(self, conn):
+        # Buang entry tertua sampai total body di bawah batas
+        total = conn.execute("SELECT COALESCE(SUM(length(body)), 0) FROM response_cache").fetchone()[0]
+        if total <= self.spill_max_bytes:
+            return
+        excess = total - self.spill_max_bytes
+        removed = 0
+        for key, size in conn.execute(
+            "SELECT key, length(body) FROM response_cache ORDER BY stored_at"
+        ).fetchall():
+            if removed >= excess:
+                break
+            conn.execute("DELETE FROM response_cache WHERE key = ?", (key,))
+            removed += size
+
+    def stats(self) -> Dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._data),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+                "evictions": self.evictions,
+                "not_modified": self.not_modified,
+                "sqlite_spill": self.spill_enabled,
+                "write_through": self.write_through,
+                "spilled": self.spilled,
+                "spill_hits": self.spill_hits,
+            }
+
+
+plan_responses = ResponseCache()
@@ -0,0 +1,60 @@
+from typing import Any, AsyncIterator, Dict, List
+
+from fastapi.responses import Response
+
+from fitness_engine.serialization import RawJSON, dumps
+
+
+class FastJSONResponse(Response):
+    """JSON response yang di-serialize satu pass (orjson kalau ada) tanpa jsonable_encoder.
+
+    Endpoint harus mengembalikan instance ini langsung; konten boleh berisi RawJSON.
+    """
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+
+def _raw(value):
+    if isinstance(value, bytes):
+        return RawJSON(value)
+    if isinstance(value, str):
+        return RawJSON(value.encode("utf-8"))
+    return value
+
+
+def raw_history_rows(rows: List[Dict]) -> List[Dict]:
+    """plan_json/summary yang tersimpan dikirim sebagai JSON apa adanya (bukan string yang di-escape ulang)"""
+    raw_keys = ("plan_json", "summary")
+    return [{key: _raw(value) if key in raw_keys else value for key, value in row.items()}
+            for row in rows]
+
+
+# ?stream=<format> -> media type
+STREAM_MEDIA_TYPES = {
+    "ndjson": "application/x-ndjson",
+    "array": "application/json",
+}
+
+
+async def json_stream(batches: AsyncIterator[List[Dict]], fmt: str) -> AsyncIterator[bytes]:
+    """Encode batch demi batch: NDJSON (satu object per baris) atau satu JSON array yang di-chunk.
+
+    Hanya satu batch yang ada di memori pada satu waktu.
+    """
+    if fmt == "ndjson":
+        async for batch in batches:
+            if batch:
+                yield b"".join(dumps(item) + b"\n" for item in batch)
+        return
+
+    yield b"["
+    first = True
+    async for batch in batches:
+        if not batch:
+            continue
+        chunk = b",".join(dumps(item) for item in batch)
+        yield chunk if first else b"," + chunk
+        first = False
+    yield b"]"
@@ -0,0 +1,79 @@
+"""
+Jalankan API dengan satu atau beberapa worker uvicorn (mode multi-process yang didukung).
+
+    python serve.py                          # FITNESS_WORKERS (default 1)
+    python serve.py --workers 4 --port 8000
+
+Dengan lebih dari satu worker, state yang perlu dipakai bersama pindah ke SQLite
+(FITNESS_SHARED_CACHE, default aktif kalau workers > 1):
+    - rate limit /login + negative cache email   (FITNESS_RATE_LIMIT_STORE=sqlite)
+    - plan terakhir per user untuk chat           (FITNESS_PLAN_STORE_SQLITE=1)
+    - body /plan dan /meal_plan, write-through    (FITNESS_RESPONSE_CACHE_SQLITE=1,
+                                                   FITNESS_RESPONSE_CACHE_WRITE_THROUGH=1)
+Cache memori tetap ada di setiap worker sebagai tier pertama. Token JWT sengaja tidak
+diberi tier bersama: cache token per worker sudah membuat setiap token diverifikasi
+paling banyak sekali per worker (~70us), lebih murah daripada satu INSERT SQLite per
+token baru ditambah lookup lewat executor DB.
+
+Di belakang reverse proxy, set FITNESS_TRUSTED_PROXIES (IP/CIDR proxy) supaya rate limit
+/login per IP memakai alamat client dari X-Forwarded-For, bukan alamat proxy.
+
+Pool engine/KDF per worker dibagi dari jumlah CPU supaya N worker tidak membuat
+N x cpu thread. Variabel yang sudah di-set di environment tidak diubah.
+"""
+import argparse
+import os
+from typing import Dict
+
+WORKERS = int(os.getenv("FITNESS_WORKERS", "1"))
+HOST = os.getenv("FITNESS_HOST", "127.0.0.1")
+PORT = int(os.getenv("FITNESS_PORT", "8000"))
+
+SHARED_CACHE_ENV = {
+    "FITNESS_RATE_LIMIT_STORE": "sqlite",
+    "FITNESS_PLAN_STORE_SQLITE": "1",
+    "FITNESS_RESPONSE_CACHE_SQLITE": "1",
+    "FITNESS_RESPONSE_CACHE_WRITE_THROUGH": "1",
+}
+
+
+def worker_env(workers: int, shared_cache: bool, cpu_count: int = None) -> Dict[str, str]:
+    """Default environment untuk setiap worker"""
+    cpus = cpu_count or os.cpu_count() or 1
+    per_worker = max(1, cpus // workers)
+    env = {
+        "FITNESS_ENGINE_WORKERS": str(per_worker),
+        "FITNESS_KDF_WORKERS": str(min(4, per_worker)),
+    }
+    if shared_cache:
+        env.update(SHARED_CACHE_ENV)
+    return env
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--workers", type=int, default=WORKERS)
+    parser.add_argument("--host", default=HOST)
+    parser.add_argument("--port", type=int, default=PORT)
+    parser.add_argument("--log-level", default="info")
+    parser.add_argument("--no-access-log", action="store_true")
+    args = parser.parse_args()
+
+    workers = max(1, args.workers)
+    shared_cache = os.getenv("FITNESS_SHARED_CACHE", "1" if workers > 1 else "0") == "1"
+    # Worker uvicorn di-spawn sebagai proses baru dan mewarisi os.environ
+    for key, value in worker_env(workers, shared_cache).items():
+        os.environ.setdefault(key, value)
+
+    # Skema dan migrasi dibuat sekali di sini, bukan berebut lock di N worker saat startup
+    import database
+    database.init_db()
+    database.pool.close()
+
+    import uvicorn
+    uvicorn.run("main:app", host=args.host, port=args.port, workers=workers,
+                log_level=args.log_level, access_log=not args.no_access_log)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,35 @@
+import os
+import sys
+import tempfile
+import uuid
+
+import pytest
+
+# DB sementara; harus di-set sebelum main di-import (main membuat skema saat import)
+_TMP = tempfile.mkdtemp(prefix="fitness-tests-")
+os.environ["FITNESS_DB"] = os.path.join(_TMP, "fitness.db")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fastapi.testclient import TestClient  # noqa: E402
+
+import main  # noqa: E402
+
+USER_PROFILE = dict(name="Test", age=30, gender="male", height_cm=175, weight_kg=80,
+                    goal="fat_loss", active_level="moderate", target_weight=72)
+
+
+@pytest.fixture
+def client():
+    return TestClient(main.app)
+
+
+@pytest.fixture
+def account(client):
+    """Akun baru dengan email unik; return (email, password, headers)"""
+    email = f"user-{uuid.uuid4().hex[:8]}@example.com"
+    password = "pw-123456"
+    r = client.post("/register", json={"name": "Test", "email": email, "password": password})
+    assert r.status_code == 200, r.text
+    r = client.post("/login", json={"email": email, "password": password})
+    assert r.status_code == 200, r.text
+    return email, password, {"Authorization": "Bearer " + r.json()["token"]}
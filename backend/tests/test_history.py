@@ -0,0 +1,62 @@
+import json
+
+import main
+from conftest import USER_PROFILE
+
+BAD_COMPACT_PLAN = {"meal_refs": {"names": {}}, "diet_plan": [{"day": 1, "meals": {"breakfast": 5}}]}
+
+
+def _save(client, headers, plan):
+    r = client.post("/save_history", json=plan, headers=headers)
+    assert r.status_code == 200, r.text
+
+
+def test_expand_skips_rows_that_fail_to_expand(client, account):
+    _, _, headers = account
+    plan = client.post("/plan", json=USER_PROFILE).json()
+    assert "meal_refs" in plan
+    _save(client, headers, plan)
+    _save(client, headers, BAD_COMPACT_PLAN)
+
+    r = client.get("/history", params={"expand": "recipes"}, headers=headers)
+    assert r.status_code == 200, r.text
+    bad, good = [row["plan_json"] for row in r.json()]
+    assert bad == BAD_COMPACT_PLAN
+    assert "meal_refs" not in good
+    assert good["diet_plan"][0]["recipes"]
+
+
+def test_expand_stream_skips_rows_that_fail_to_expand(client, account):
+    _, _, headers = account
+    _save(client, headers, BAD_COMPACT_PLAN)
+
+    r = client.get("/history", params={"expand": "recipes", "stream": "ndjson"}, headers=headers)
+    assert r.status_code == 200, r.text
+    rows = [json.loads(line) for line in r.text.splitlines() if line]
+    assert [row["plan_json"] for row in rows] == [BAD_COMPACT_PLAN]
+
+
+def test_cross_origin_client_can_page_through_history(client, account):
+    _, _, headers = account
+    for day in range(3):
+        _save(client, headers, {"day": day})
+
+    cors = {**headers, "Origin": "http://frontend.example"}
+    r = client.get("/history", params={"limit": 2}, headers=cors)
+    exposed = [h.strip().lower() for h in r.headers["access-control-expose-headers"].split(",")]
+    assert "x-next-before" in exposed
+    r = client.get("/history", params={"limit": 2, "before": r.headers["x-next-before"]}, headers=cors)
+    assert [row["plan_json"] for row in r.json()] == [{"day": 0}]
+    assert "x-next-before" not in r.headers
+
+
+def test_request_connection_is_returned_to_pool(client, account):
+    _, _, headers = account
+    _save(client, headers, {"day": 1})
+    acquired = main.pool.stats()["acquired_total"]
+
+    for params in ({}, {"expand": "recipes"}, {"stream": "ndjson"}):
+        assert client.get("/history", params=params, headers=headers).status_code == 200
+    stats = main.pool.stats()
+    assert stats["in_use"] == 0
+    assert stats["acquired_total"] > acquired
@@ -0,0 +1,36 @@
+import asyncio
+
+from history_writer import HistoryWriter
+
+
+def test_flush_returns_when_flusher_dies():
+    async def scenario():
+        writer = HistoryWriter(mode="write_behind")
+        await writer.start()
+
+        async def crash(batch):
+            await asyncio.sleep(0.01)   # flush() sudah menunggu saat flusher mati
+            raise RuntimeError("boom")
+
+        writer._write = crash
+        await writer.add(1, b"{}", None)
+        await asyncio.wait_for(writer.flush(), timeout=2)
+        assert not writer.running
+
+    asyncio.run(scenario())
+
+
+def test_sync_writes_do_not_count_as_batches():
+    async def scenario():
+        writer = HistoryWriter(mode="batched")
+        await writer.add(1, b"{}", None)          # belum start: ditulis langsung
+        await writer.start()
+        await asyncio.gather(*(writer.add(1, b"{}", None) for _ in range(4)))
+        await writer.stop()
+        return writer.stats()
+
+    stats = asyncio.run(scenario())
+    assert stats["sync_rows"] == 1
+    assert stats["batched_rows"] == 4
+    assert stats["rows_written"] == 5
+    assert stats["avg_batch"] == stats["batched_rows"] / stats["batches"]
@@ -0,0 +1,33 @@
+from rate_limit import client_ip, parse_networks
+
+
+def test_case_variant_miss_does_not_lock_out_account(client, account):
+    email, password, _ = account
+    local, domain = email.split("@")
+    variant = f"{local.upper()}@{domain}"
+
+    r = client.post("/login", json={"email": variant, "password": password})
+    assert r.status_code == 401
+
+    r = client.post("/login", json={"email": email, "password": password})
+    assert r.status_code == 200, r.text
+    assert r.json()["token"]
+
+
+def test_register_clears_unknown_email_cache(client):
+    email, password = "late-signup@example.com", "pw-123456"
+    assert client.post("/login", json={"email": email, "password": password}).status_code == 401
+
+    r = client.post("/register", json={"name": "Late", "email": email, "password": password})
+    assert r.status_code == 200, r.text
+    assert client.post("/login", json={"email": email, "password": password}).status_code == 200
+
+
+def test_client_ip_behind_trusted_proxy():
+    networks = parse_networks("10.0.0.0/8, 127.0.0.1")
+    # Alamat paling kiri dikirim client sendiri; yang dipakai alamat yang ditambahkan proxy
+    assert client_ip("10.0.0.5", "6.6.6.6, 203.0.113.7, 10.0.0.9", networks) == "203.0.113.7"
+    assert client_ip("127.0.0.1", "203.0.113.8", networks) == "203.0.113.8"
+    assert client_ip("198.51.100.1", "203.0.113.7", networks) == "198.51.100.1"
+    assert client_ip("10.0.0.5", None, networks) == "10.0.0.5"
+    assert client_ip("10.0.0.5", "203.0.113.7", ()) == "10.0.0.5"
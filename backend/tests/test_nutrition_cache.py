@@ -0,0 +1,16 @@
+from conftest import USER_PROFILE
+from fitness_engine.calories import calculate_calories
+from models.user_model import UserData
+
+
+def test_users_sharing_a_name_keep_their_cache_entries():
+    budi_a = UserData(**{**USER_PROFILE, "name": "Budi", "weight_kg": 70})
+    budi_b = UserData(**{**USER_PROFILE, "name": "Budi", "weight_kg": 95})
+    cache = calculate_calories.cache
+
+    calculate_calories(budi_a)
+    calculate_calories(budi_b)
+    hits = cache.hits
+    for _ in range(3):
+        assert calculate_calories(budi_a) != calculate_calories(budi_b)
+    assert cache.hits - hits == 6
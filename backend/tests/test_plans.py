@@ -0,0 +1,28 @@
+from conftest import USER_PROFILE
+from fitness_engine.plan_store import plan_store
+from models.user_model import UserData
+
+
+def test_response_cache_hit_refills_plan_store(client):
+    profile = {**USER_PROFILE, "name": "Refill", "weight_kg": 83}
+    user = UserData(**profile)
+
+    for route, parts in (("/plan", ("workout_plan", "diet_plan", "grocery_list")),
+                         ("/meal_plan", ("diet_plan", "grocery_list"))):
+        first = client.post(route, json=profile)
+        assert first.status_code == 200, first.text
+        plan_store.forget(user)
+
+        r = client.post(route, json=profile, headers={"X-Profile": "1"})
+        assert r.status_code == 200
+        assert 'response_cache;desc="hit"' in r.headers["server-timing"]
+        assert r.content == first.content
+        record = plan_store.load(user)
+        assert all(record.get(part) for part in parts), route
+
+
+def test_cors_exposes_etag(client):
+    r = client.post("/plan", json=USER_PROFILE, headers={"Origin": "http://frontend.example"})
+    assert r.status_code == 200
+    exposed = [h.strip().lower() for h in r.headers["access-control-expose-headers"].split(",")]
+    assert "etag" in exposed
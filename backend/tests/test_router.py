@@ -0,0 +1,47 @@
+import pytest
+
+from benchmarks.chat_router import legacy_route, router_route
+from benchmarks.corpus import CHAT_MESSAGES, LONG_CHAT_MESSAGES
+from fitness_engine.engine import CHAT_ROUTER, HEALTH_ROUTER
+from fitness_engine.router import IntentRouter
+
+# Satu-satunya pesan korpus yang routing-nya berbeda dari rantai if/elif lama: intent
+# yang lebih awal di rantai menang di sana, padahal intent lain punya lebih banyak keyword
+SCORED_CHANGES = {
+    "what is the proper squat form for my leg workout?": ("workout/workout_split", "workout/exercise_form"),
+    "women's health tips about the menstrual cycle": ("health/immune_support", "health/womens_health"),
+    "men's health and testosterone tips": ("health/immune_support", "health/mens_health"),
+    "how do i cook and prepare food in advance?": ("diet", "recipe"),
+    "which ingredient makes food tasty?": ("diet", "recipe"),
+}
+
+
+@pytest.mark.parametrize("message", [m.lower() for m in CHAT_MESSAGES + LONG_CHAT_MESSAGES])
+def test_routing_matches_legacy_chain_except_scored_changes(message):
+    legacy, scored = legacy_route(message), router_route(message)
+    # Korpus panjang berisi pesan pendek yang diulang
+    changed = [change for prefix, change in SCORED_CHANGES.items() if message.startswith(prefix)]
+    if changed:
+        assert (legacy, scored) == changed[0]
+    else:
+        assert scored == legacy
+
+
+def test_score_and_tie_break():
+    intent = CHAT_ROUTER.classify("which ingredient makes food tasty?")
+    assert (intent.name, intent.score) == ("recipe", 2)
+    assert CHAT_ROUTER.scores("which ingredient makes food tasty?") == [0, 1, 0, 0, 2, 0]
+    # Skor seri: rule yang lebih awal menang, seperti urutan if/elif lama
+    assert CHAT_ROUTER.classify("gym and diet").name == "workout"
+    assert CHAT_ROUTER.classify("hello there") is CHAT_ROUTER.default
+
+
+def test_longest_keyword_wins_inside_a_token():
+    assert HEALTH_ROUTER.scores("women") == [0, 0, 0, 0, 0, 1, 0]
+
+
+def test_routers_without_shared_index_and_single_word_keywords():
+    router = IntentRouter([("a", ["alpha"], None), ("b", ["beta", "alphabet"], None)])
+    assert router.classify("alphabet soup").name == "b"
+    with pytest.raises(ValueError):
+        IntentRouter([("a", ["two words"], None)])